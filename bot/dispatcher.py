@@ -0,0 +1,107 @@
+import logging
+import queue
+import threading
+import typing
+from collections import deque
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+Handler = typing.Callable[[typing.Any], None]
+
+
+class UpdateDispatcher:
+    """
+    Пул потоков для обновлений бота: обновления разных чатов обрабатываются параллельно,
+    одного чата - строго по очереди. У каждого чата своя очередь; чат с необработанными
+    обновлениями стоит в общей очереди готовых и в каждый момент обрабатывается не больше чем одним потоком.
+    submit блокируется, пока в работе max_pending обновлений, - так опрос getUpdates ждёт воркеров
+    """
+    def __init__(self, handler: Handler, workers: int = 8, max_pending: int = 100) -> None:
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._chats: typing.Dict[int, typing.Deque[typing.Any]] = {}
+        self._ready: "queue.Queue[typing.Optional[int]]" = queue.Queue()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._threads: typing.List[threading.Thread] = []
+
+    def start(self) -> "UpdateDispatcher":
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"bot-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, chat_id: int, update: typing.Any, timeout: typing.Optional[float] = None) -> bool:
+        """
+        Ставим обновление в очередь его чата; False, если за timeout не освободилось место
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            self._pending += 1
+            updates = self._chats.get(chat_id)
+            if updates is not None:
+                # чат уже в работе или в очереди готовых - до обновления дойдёт очередь
+                updates.append(update)
+                return True
+            self._chats[chat_id] = deque([update])
+        self._ready.put(chat_id)
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def join(self, timeout: typing.Optional[float] = None) -> bool:
+        """
+        Ждём, пока обработаются все поставленные обновления
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        """
+        Дорабатываем очередь и останавливаем потоки
+        """
+        self.join(timeout)
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self) -> None:
+        while True:
+            chat_id = self._ready.get()
+            if chat_id is None:
+                return
+            with self._lock:
+                update = self._chats[chat_id].popleft()
+            self._handle(update)
+            # по одному обновлению за раз: занятый чат встаёт в конец очереди и не держит поток
+            with self._lock:
+                more = bool(self._chats[chat_id])
+                if not more:
+                    del self._chats[chat_id]
+            if more:
+                self._ready.put(chat_id)
+
+    def _handle(self, update: typing.Any) -> None:
+        try:
+            self.handler(update)
+        except Exception:
+            logger.exception("Bot update handling failed")
+        finally:
+            # соединение с БД живёт в потоке воркера: закрываем устаревшие и сломанные после каждой задачи
+            close_old_connections()
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.notify_all()
@@ -0,0 +1,50 @@
+import time
+import typing
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from bot.models import TgUpdate
+from bot.tg.dc import UPDATE_SCHEMA, Update
+
+# Телеграм повторяет неподтверждённое обновление не дольше суток - столько и помним обработанные update_id
+KEEP_HANDLED = timedelta(days=1)
+PURGE_INTERVAL = 60
+
+_purged = time.monotonic()
+
+
+def record_update(update: Update, data: typing.Dict[str, typing.Any]) -> typing.Optional[TgUpdate]:
+    """
+    Запоминаем принятое вебхуком обновление; None - этот update_id уже принимали (повторная доставка)
+    """
+    try:
+        with transaction.atomic():
+            return TgUpdate.objects.create(update_id=update.update_id, data=data)
+    except IntegrityError:
+        return None
+
+
+def mark_handled(update_id: int) -> None:
+    TgUpdate.objects.filter(update_id=update_id, handled=False).update(handled=True)
+
+
+def pending_updates(received_before: datetime) -> typing.Iterator[Update]:
+    """
+    Принятые до received_before, но так и не обработанные обновления: процесс перезапустился раньше
+    """
+    rows = TgUpdate.objects.filter(handled=False, created__lt=received_before).order_by("update_id")
+    for data in rows.values_list("data", flat=True).iterator():
+        yield UPDATE_SCHEMA().load(data)
+
+
+def maybe_purge() -> None:
+    """
+    Не чаще раза в PURGE_INTERVAL секунд забываем обработанные обновления старше KEEP_HANDLED
+    """
+    global _purged
+    if time.monotonic() - _purged < PURGE_INTERVAL:
+        return
+    _purged = time.monotonic()
+    TgUpdate.objects.filter(handled=True, created__lt=timezone.now() - KEEP_HANDLED).delete()
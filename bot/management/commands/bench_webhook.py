@@ -0,0 +1,126 @@
+import statistics
+import threading
+import time
+import typing
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand, CommandParser
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from bot.dispatcher import UpdateDispatcher
+from bot.management.commands.runbot import Command as RunBotCommand, handle_update, set_dispatcher, stop_dispatcher
+from bot.models import TgChatState, TgOutboxMessage, TgUpdate, TgUser
+from bot.views import TgWebhookView
+
+SECRET = "bench-secret"
+# синтетические обновления и чаты не должны пересечься с настоящими в той же БД
+BENCH_UPDATE_ID = 10 ** 15
+BENCH_CHAT_ID = 2_000_000_000
+
+
+def make_update(update_id: int, chat_id: int) -> typing.Dict[str, typing.Any]:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": f"message {update_id}",
+            "from": {"id": chat_id, "is_bot": False, "username": f"user{chat_id}"},
+            "chat": {"id": chat_id, "type": "private"},
+        },
+    }
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест вебхука: пачки синтетических обновлений приходят в bot/webhook параллельно
+    (обновления одного чата - из одного потока и по порядку, как у Телеграма) и обрабатываются настоящим
+    обработчиком бота (BotRunner) на настроенной БД. Отвечает 503 - повторяем, как Телеграм.
+    Считаем время ответа вебхука, скорость приёма и обработки и нарушения порядка в чатах; созданное
+    в БД после замера удаляется (python manage.py bench_webhook --updates 5000 --chats 200 --burst 500)
+    """
+    help = "drive bot/webhook with synthetic update bursts"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--updates", type=int, default=5000, help="обновлений всего")
+        parser.add_argument("--chats", type=int, default=200, help="разных чатов")
+        parser.add_argument("--burst", type=int, default=500, help="обновлений в пачке")
+        parser.add_argument("--pause-ms", type=float, default=100, help="пауза между пачками")
+        parser.add_argument("--senders", type=int, default=16, help="параллельных соединений Телеграма")
+        parser.add_argument("--workers", type=int, default=8, help="потоков обработки")
+        parser.add_argument("--max-pending", type=int, default=1000, help="обновлений в работе до ответов 503")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        handled: typing.Dict[int, typing.List[int]] = defaultdict(list)
+        done_lock = threading.Lock()
+
+        def handler(update: typing.Any) -> None:
+            handle_update(update)
+            with done_lock:
+                handled[update.message.chat.id].append(update.update_id)
+
+        set_dispatcher(
+            UpdateDispatcher(handler, workers=options["workers"], max_pending=options["max_pending"]).start()
+        )
+        view = TgWebhookView.as_view()
+        factory = APIRequestFactory()
+        latencies: typing.List[float] = []
+        rejected = [0]
+
+        def deliver(updates: typing.List[typing.Dict[str, typing.Any]]) -> None:
+            for update in updates:
+                while True:
+                    request = factory.post("/bot/webhook", update, format="json",
+                                           HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN=SECRET)
+                    started = time.perf_counter()
+                    response = view(request)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 503:
+                        break
+                    with done_lock:
+                        rejected[0] += 1
+                    time.sleep(0.01)
+
+        started = time.perf_counter()
+        try:
+            with override_settings(TG_WEBHOOK_SECRET=SECRET), ThreadPoolExecutor(options["senders"]) as executor:
+                for first in range(0, options["updates"], options["burst"]):
+                    by_sender = defaultdict(list)
+                    for number in range(first, min(first + options["burst"], options["updates"])):
+                        chat_id = number % options["chats"]
+                        by_sender[chat_id % options["senders"]].append(
+                            make_update(BENCH_UPDATE_ID + number, BENCH_CHAT_ID + chat_id)
+                        )
+                    list(executor.map(deliver, by_sender.values()))
+                    time.sleep(options["pause_ms"] / 1000)
+                received = time.perf_counter() - started
+                stop_dispatcher()
+            processed = time.perf_counter() - started
+        finally:
+            stop_dispatcher()
+            self.cleanup(options["chats"])
+
+        total = sum(len(ids) for ids in handled.values())
+        disordered = sum(1 for ids in handled.values() if ids != sorted(ids))
+        latencies.sort()
+        self.stdout.write(f"updates: {options['updates']}, handled: {total}, rejected (503, retried): {rejected[0]}")
+        self.stdout.write(
+            f"ack ms: median {statistics.median(latencies):.2f}, "
+            f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f}, max {latencies[-1]:.2f}"
+        )
+        self.stdout.write(f"received in {received:.2f}s, processed in {processed:.2f}s "
+                          f"({total / processed:.0f} updates/s)")
+        self.stdout.write(f"chats out of order: {disordered}")
+
+    @staticmethod
+    def cleanup(chats: int) -> None:
+        """
+        Удаляем пользователей, состояния, ответы и записи обновлений синтетических чатов
+        """
+        chat_ids = range(BENCH_CHAT_ID, BENCH_CHAT_ID + chats)
+        TgUpdate.objects.filter(update_id__gte=BENCH_UPDATE_ID).delete()
+        TgOutboxMessage.objects.filter(chat_id__in=chat_ids).delete()
+        TgChatState.objects.filter(chat_id__in=chat_ids).delete()
+        TgUser.objects.filter(tg_chat_id__in=chat_ids).delete()
+        for chat_id in chat_ids:
+            RunBotCommand.state_store.delete(chat_id)
@@ -1,15 +1,25 @@
+import functools
+import threading
+import time
 import typing
 from typing import Optional, List
 
-from django.core.management import BaseCommand
+from django.conf import settings
+from django.core.management import BaseCommand, CommandParser
 from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.crypto import get_random_string
 
+from bot import inbox
+from bot.dispatcher import UpdateDispatcher
 from bot.management.commands import LINK_TO_GOAL
-from bot.tg.client import TgClient
+from bot.tg.client import TgClient, TgRetryAfter
 from todolist.settings import TG_TOKEN
 
 from bot.models import TgUser
-from bot.tg.dc import Message, SendMessageResponse
+from bot.outbox import OutboxSender, enqueue
+from bot.state import ChatState, StateStore, get_state_store
+from bot.tg.dc import Message, Update
 from goals.models import Goal, GoalCategory
 
 
@@ -29,35 +39,34 @@ class BotMessage:
 class BotRunner(BotMessage):
     """
     Класс, отвечающий за общение с пользователем.
-    Имеет 4 вида состояний (condition)
+    Имеет 4 вида состояний (condition); состояние каждого чата хранится в state_store (bot/state.py)
     """
-    tg_user = None
-    category: Optional[GoalCategory] = None
-    condition: int = 0
-
-    def __init__(self, msg: Message, tg_client: TgClient) -> None:
+    def __init__(self, msg: Message, tg_client: TgClient, state_store: StateStore) -> None:
         self.msg = msg
         self.tg_client = tg_client
+        self.state_store = state_store
+        self.tg_user: Optional[TgUser] = None
+        # что сделать после обработки сообщения, когда блокировка чата уже снята (start_bot)
+        self.actions: List[typing.Callable[[], typing.Any]] = []
 
-    def send_message(self, text: str, msg: Message) -> SendMessageResponse:
+    def send_message(self, text: str, msg: Message) -> None:
         """
-        Функция для отправки сообщений пользователю
+        Функция для отправки сообщений пользователю: сообщение встанет в очередь после обработки,
+        отправит его OutboxSender
         """
-        message = self.tg_client.send_message_to_url(
-            chat_id=msg.chat.id,
-            text=f"{text}"
-        )
-        return message
+        self.actions.append(functools.partial(enqueue, chat_id=msg.chat.id, text=f"{text}"))
 
     def create_tg_user(self, msg: Message) -> tuple:
         """
         Создание пользователя в Телеграме (модель - TgUser)
         """
-        BotRunner.tg_user, created = TgUser.objects.get_or_create(
+        # у нового пользователя сразу свой код: пустые коды одновременно пришедших чатов нарушили бы unique
+        self.tg_user, created = TgUser.objects.get_or_create(
             tg_user_id=msg.message_from.id,
-            tg_chat_id=msg.chat.id
+            tg_chat_id=msg.chat.id,
+            defaults={"verification_code": get_random_string(10)},
         )
-        return BotRunner.tg_user, created
+        return self.tg_user, created
 
     def get_goals(self) -> typing.Union[QuerySet, List[Goal]]:
         """
@@ -65,7 +74,8 @@ class BotRunner(BotMessage):
         """
         try:
             result = Goal.objects.filter(
-                category__board__participants__user=self.tg_user.user).exclude(status=Goal.Status.archived)
+                board__participants__user=self.tg_user.user, board__is_deleted=False
+            ).exclude(status=Goal.Status.archived)
         except AttributeError:
             text = "Не создано ни одной цели"
             self.send_message(text=text, msg=self.msg)
@@ -78,7 +88,8 @@ class BotRunner(BotMessage):
         """
         try:
             result = GoalCategory.objects.filter(
-                board__participants__user=self.tg_user.user).exclude(is_deleted=True)
+                board__participants__user=self.tg_user.user, board__is_deleted=False
+            ).exclude(is_deleted=True)
         except AttributeError:
             text = "Не создано ни одной категории"
             self.send_message(text=text, msg=self.msg)
@@ -87,50 +98,61 @@ class BotRunner(BotMessage):
 
     def start_bot(self) -> typing.Generator:
         """
-        Основная функция с логикой работы бота
+        Основная функция с логикой работы бота: состояние чата берём из хранилища,
+        обрабатываем сообщение и сохраняем новое состояние под блокировкой чата в хранилище.
+        Цель и ответы пишутся уже после снятия блокировки
+        """
+        chat_id = self.msg.chat.id
+        with self.state_store.locked(chat_id):
+            state = self.state_store.get(chat_id)
+            self.handle_message(state)
+            self.state_store.set(chat_id, state)
+        for action in self.actions:
+            action()
+        yield
+
+    def handle_message(self, state: ChatState) -> None:
         """
-        while BotRunner.condition == 0:
-            BotRunner.tg_user, created = self.create_tg_user(self.msg)
+        Переход состояния чата по сообщению
+        """
+        self.create_tg_user(self.msg)
+        if state.condition == 0:
             if not self.tg_user.user:
                 code = self.tg_user.generate_verification_code()
                 text = f"{self.message_verify_code} \n {code}"
-                yield self.send_message(text=text, msg=self.msg)
-            else:
-                BotRunner.condition = 1
+                return self.send_message(text=text, msg=self.msg)
+            state.condition = 1
 
-        while BotRunner.condition == 1:
+        if state.condition == 1:
             if self.msg.text == "/goals":
                 self.send_goals(self.msg)
-                yield
+                return None
             if self.msg.text == "/create":
                 self.send_categories(self.msg)
-                BotRunner.condition = 2
-                yield
-            else:
-                yield self.send_message(text=self.message_unknown_command, msg=self.msg)
+                state.condition = 2
+                return None
+            return self.send_message(text=self.message_unknown_command, msg=self.msg)
 
-        while BotRunner.condition == 2:
-            if self.msg.text == "/cancel":
-                self.send_message(text=self.message_operation_canceled, msg=self.msg)
-                BotRunner.condition = 1
-                yield
-            elif self.get_categories().filter(title=self.msg.text):
-                BotRunner.category = self.get_categories().filter(title=self.msg.text).first()
-                self.send_message(text=self.message_choose_goal, msg=self.msg)
-                BotRunner.condition = 3
-                yield
-            else:
-                yield self.send_message(text=self.message_unknown_category, msg=self.msg)
-
-        while BotRunner.condition == 3:
+        if state.condition == 2:
             if self.msg.text == "/cancel":
-                self.send_message(text=self.message_operation_canceled, msg=self.msg)
-                BotRunner.condition = 1
-                yield
-            else:
-                self.create_goal(msg=self.msg, category=BotRunner.category)
-                BotRunner.condition = 0
-                yield
+                state.condition = 1
+                return self.send_message(text=self.message_operation_canceled, msg=self.msg)
+            category = self.get_categories().filter(title=self.msg.text).first()
+            if category is None:
+                return self.send_message(text=self.message_unknown_category, msg=self.msg)
+            state.condition, state.category_id = 3, category.pk
+            return self.send_message(text=self.message_choose_goal, msg=self.msg)
+
+        if self.msg.text == "/cancel":
+            state.condition, state.category_id = 1, None
+            return self.send_message(text=self.message_operation_canceled, msg=self.msg)
+        category = self.get_categories().filter(pk=state.category_id).first()
+        if category is None:
+            state.condition, state.category_id = 2, None
+            return self.send_message(text=self.message_unknown_category, msg=self.msg)
+        self.create_goal(msg=self.msg, category=category)
+        state.condition, state.category_id = 0, None
+        return None
 
     def send_categories(self, msg: Message) -> None:
         """
@@ -156,33 +178,114 @@ class BotRunner(BotMessage):
 
     def create_goal(self, msg: Message, category: Optional[GoalCategory]) -> None:
         """
-        Функция для создания новой цели с помощью Телеграма
+        Функция для создания новой цели с помощью Телеграма: цель создаётся после обработки сообщения
         """
+        self.actions.append(functools.partial(self.save_goal, msg, category))
+
+    def save_goal(self, msg: Message, category: Optional[GoalCategory]) -> None:
         goal = Goal.objects.create(title=msg.text,
                                    category=category,
-                                   user=BotRunner.tg_user.user
+                                   user=self.tg_user.user
                                    )
         text = f"Цель создана: \n{LINK_TO_GOAL}goals?goal={goal.id}"
-        self.send_message(text=text, msg=msg)
+        enqueue(chat_id=msg.chat.id, text=text)
 
 
 class Command(BaseCommand):
     """
-    Запускает работу бота (python manage.py runbot)
+    Запускает работу бота (python manage.py runbot --workers 8 --max-pending 100)
     """
     help = "run bot in Telegram"
-    tg_client: TgClient = TgClient(TG_TOKEN)
+    tg_client: TgClient = TgClient(TG_TOKEN, pool_size=settings.BOT_WORKERS)
+    state_store: StateStore = get_state_store()
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--workers", type=int, default=settings.BOT_WORKERS,
+                            help="threads handling updates; updates of one chat are handled in order")
+        parser.add_argument("--max-pending", type=int, default=settings.BOT_MAX_PENDING,
+                            help="updates in work before polling getUpdates waits")
+        parser.add_argument("--no-sender", action="store_true",
+                            help="do not send the outbox here (it is sent by manage.py send_outbox)")
 
     def handle(self, *args: typing.Any, **options: typing.Any) -> None:
         """
         Запускаем бота.
-        Получаем обновления с Телеграма и передаём в BotRunner.
+        Получаем обновления с Телеграма и раздаём их пулу потоков (UpdateDispatcher).
+        Когда в работе max_pending обновлений, следующий getUpdates ждёт.
+        Ответы уходят через очередь исходящих сообщений, её отправляет OutboxSender в этом же процессе
         """
+        dispatcher = get_dispatcher(workers=options["workers"], max_pending=options["max_pending"])
+        sender = None if options["no_sender"] else OutboxSender().start()
         offset: int = 0
-        while True:
-            res = self.tg_client.get_updates(offset=offset)
-            for item in res.result:
-                offset = item.update_id + 1
-                if hasattr(item, "message"):
-                    bot_runner = BotRunner(msg=item.message, tg_client=self.tg_client)
-                    next(bot_runner.start_bot())
+        try:
+            while True:
+                try:
+                    res = self.tg_client.get_updates(offset=offset)
+                except TgRetryAfter as error:
+                    time.sleep(error.retry_after)
+                    continue
+                self.state_store.maybe_purge()
+                for item in res.result:
+                    offset = item.update_id + 1
+                    if hasattr(item, "message"):
+                        dispatcher.submit(item.message.chat.id, item)
+        finally:
+            stop_dispatcher(timeout=30)
+            if sender is not None:
+                sender.stop(timeout=30)
+            self.stdout.write(f"Telegram connections: {self.tg_client.connection_stats()}")
+
+
+def handle_update(item: Update) -> None:
+    """
+    Передаём обновление в BotRunner; принятое вебхуком отмечаем обработанным (bot/inbox.py)
+    """
+    bot_runner = BotRunner(msg=item.message, tg_client=Command.tg_client, state_store=Command.state_store)
+    try:
+        next(bot_runner.start_bot())
+    finally:
+        inbox.mark_handled(item.update_id)
+
+
+_dispatcher: Optional[UpdateDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(workers: Optional[int] = None, max_pending: Optional[int] = None) -> UpdateDispatcher:
+    """
+    Общий на процесс пул обработки обновлений: в него пишут и опрос getUpdates (runbot), и вебхук (bot/webhook).
+    Создаётся при первом обращении с BOT_WORKERS и BOT_MAX_PENDING, если не переданы свои значения;
+    первыми в него встают обновления, которые вебхук принял, но не успел обработать до перезапуска
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            started = timezone.now()
+            _dispatcher = UpdateDispatcher(
+                handle_update,
+                workers=workers or settings.BOT_WORKERS,
+                max_pending=max_pending or settings.BOT_MAX_PENDING,
+            ).start()
+            for update in inbox.pending_updates(received_before=started):
+                _dispatcher.submit(update.message.chat.id, update)
+        return _dispatcher
+
+
+def set_dispatcher(dispatcher: Optional[UpdateDispatcher]) -> None:
+    """
+    Подменяем общий пул (нагрузочный тест, тесты)
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        _dispatcher = dispatcher
+
+
+def stop_dispatcher(timeout: Optional[float] = None) -> None:
+    """
+    Дорабатываем очередь общего пула и останавливаем его
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.stop(timeout)
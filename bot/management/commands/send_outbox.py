@@ -0,0 +1,34 @@
+import threading
+import time
+import typing
+
+from django.core.management import BaseCommand, CommandParser
+
+from bot.models import TgOutboxMessage
+from bot.outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    """
+    Отправляет очередь исходящих сообщений бота (python manage.py send_outbox), если runbot запущен с --no-sender
+    """
+    help = "send queued Telegram messages with rate limits"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--once", action="store_true", help="send what is due now and exit")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        sender = OutboxSender()
+        if not options["once"]:
+            sender.run(threading.Event())
+            return
+        sent = 0
+        while True:
+            count, wait = sender.run_once()
+            sent += count
+            if not count and wait >= 1:
+                break
+            if wait:
+                time.sleep(wait)
+        pending = TgOutboxMessage.objects.filter(status=TgOutboxMessage.Status.pending).count()
+        self.stdout.write(f"sent {sent}, pending {pending}")
@@ -0,0 +1,28 @@
+# Generated by Django 4.1.4 on 2026-10-18 07:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0019_board_version'),
+        ('bot', '0006_alter_tguser_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgChatState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(unique=True)),
+                ('condition', models.PositiveSmallIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True, db_index=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='goals.goalcategory')),
+            ],
+            options={
+                'verbose_name': 'Состояние чата',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.4 on 2026-10-18 07:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0007_chat_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TgOutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField()),
+                ('text', models.TextField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Ожидает отправки'), (2, 'Не отправлено')], default=1)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Исходящее сообщение',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tgoutboxmessage',
+            index=models.Index(fields=['status', 'id'], name='outbox_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.4 on 2026-10-18 08:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0008_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tgoutboxmessage',
+            index=models.Index(fields=['status', 'chat_id', 'id'], name='outbox_chat_head_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 
@@ -17,3 +18,56 @@ class TgUser(models.Model):
 
     class Meta:
         verbose_name = "Бот"
+
+
+class TgChatState(models.Model):
+    """
+    Состояние диалога бота с чатом (bot/state.py, BOT_STATE_STORE=db)
+    """
+    chat_id = models.BigIntegerField(unique=True)
+    condition = models.PositiveSmallIntegerField(default=0)
+    category = models.ForeignKey("goals.GoalCategory", null=True, blank=True, on_delete=models.SET_NULL)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Состояние чата"
+
+
+class TgOutboxMessage(models.Model):
+    """
+    Сообщение в очереди на отправку (bot/outbox.py); отправленные удаляются, неотправленные после всех попыток
+    остаются со статусом failed
+    """
+    class Status(models.IntegerChoices):
+        pending = 1, "Ожидает отправки"
+        failed = 2, "Не отправлено"
+
+    chat_id = models.BigIntegerField()
+    text = models.TextField()
+    status = models.PositiveSmallIntegerField(choices=Status.choices, default=Status.pending)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True, default="")
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Исходящее сообщение"
+        indexes = [
+            models.Index(fields=["status", "id"], name="outbox_status_idx"),
+            # первое сообщение каждого чата (OutboxSender.run_once) - только по индексу
+            models.Index(fields=["status", "chat_id", "id"], name="outbox_chat_head_idx"),
+        ]
+
+
+class TgUpdate(models.Model):
+    """
+    Обновление, принятое вебхуком (bot/inbox.py): повторная доставка того же update_id не обрабатывается,
+    а принятые, но не обработанные до перезапуска процесса обновления обрабатываются заново
+    """
+    update_id = models.BigIntegerField(unique=True)
+    data = models.JSONField()
+    handled = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Обновление Телеграма"
@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+from marshmallow import ValidationError
+
+from bot.models import TgOutboxMessage
+from bot.tg.client import TgClient, TgRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# будит отправителя в этом процессе, как только в очередь что-то положили
+outbox_wakeup = threading.Event()
+
+
+def enqueue(chat_id: int, text: str) -> TgOutboxMessage:
+    """
+    Ставим сообщение в очередь и сразу возвращаемся; отправит его OutboxSender
+    """
+    message = TgOutboxMessage.objects.create(chat_id=chat_id, text=text)
+    transaction.on_commit(outbox_wakeup.set)
+    return message
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity про запас
+    """
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        Через сколько секунд будет токен (0 - уже есть)
+        """
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """
+    Лимиты Телеграма: общий на бота (global_rate сообщений в секунду) и на каждый чат (chat_rate)
+    """
+    max_chats = 10_000
+
+    def __init__(self, global_rate: float, chat_rate: float) -> None:
+        self.chat_rate = chat_rate
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_buckets: typing.Dict[int, TokenBucket] = {}
+
+    def acquire(self, chat_id: int) -> float:
+        """
+        Берём токен для сообщения в чат; если нельзя - не берём ничего и возвращаем, сколько ждать
+        """
+        now = time.monotonic()
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= self.max_chats:
+                self.forget_idle(now)
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, capacity=1)
+        wait = max(bucket.wait_time(now), self.global_bucket.wait_time(now))
+        if wait == 0:
+            bucket.take()
+            self.global_bucket.take()
+        return wait
+
+    def forget_idle(self, now: float) -> None:
+        """
+        Вёдра, которые уже наполнились, ничем не отличаются от новых - их можно забыть
+        """
+        for chat_id in [chat_id for chat_id, bucket in self.chat_buckets.items() if bucket.wait_time(now) == 0]:
+            del self.chat_buckets[chat_id]
+
+
+class SendError(typing.NamedTuple):
+    error: str
+    # сколько секунд просит подождать Телеграм (429)
+    retry_after: typing.Optional[float] = None
+
+
+class OutboxSender:
+    """
+    Отправляет очередь TgOutboxMessage с соблюдением лимитов RateLimiter. Проход берёт первое
+    неотправленное сообщение каждого чата (до batch_size чатов); из чата уходит не больше одного
+    сообщения (ведро чата на один токен), поэтому проход отправляет параллельно и порядок сообщений
+    в чате не нарушается.
+    Клиент Телеграма не повторяет запросы сам, повторами занимается очередь: ошибки повторяются
+    с экспоненциальной задержкой, после retries попыток сообщение остаётся со статусом failed;
+    на 429 сообщение ждёт retry_after, попытка не засчитывается.
+    Лимиты считаются в процессе - отправитель на токен бота должен быть один
+    """
+    def __init__(self, tg_client: typing.Optional[TgClient] = None, limiter: typing.Optional[RateLimiter] = None,
+                 batch_size: int = 500, workers: int = 8, retries: typing.Optional[int] = None) -> None:
+        self.tg_client = tg_client or TgClient(settings.TG_TOKEN, pool_size=workers, retries=0)
+        self.limiter = limiter or RateLimiter(settings.BOT_SEND_RATE, settings.BOT_CHAT_SEND_RATE)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.retries = settings.BOT_SEND_RETRIES if retries is None else retries
+
+    def run_once(self) -> typing.Tuple[int, float]:
+        """
+        Один проход по очереди: сколько сообщений отправлено и через сколько секунд стоит прийти снова
+        """
+        now = timezone.now()
+        # первое неотправленное сообщение каждого чата: длинная очередь одного чата не заслоняет остальные
+        heads = list(
+            TgOutboxMessage.objects.filter(status=TgOutboxMessage.Status.pending).values("chat_id")
+            .annotate(head=Min("id")).order_by("head").values_list("head", flat=True)[:self.batch_size]
+        )
+        batch, wait = [], 1.0
+        for message in TgOutboxMessage.objects.filter(pk__in=heads).order_by("id"):
+            if message.next_attempt_at > now:
+                # первое сообщение чата ждёт повтора - следующие за ним ждут вместе с ним
+                continue
+            delay = self.limiter.acquire(message.chat_id)
+            if delay:
+                wait = min(wait, delay)
+                continue
+            batch.append(message)
+        if not batch:
+            return 0, wait
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batch))) as executor:
+            errors = list(executor.map(self.send, batch))
+        sent = [message.pk for message, error in zip(batch, errors) if error is None]
+        TgOutboxMessage.objects.filter(pk__in=sent).delete()
+        for message, error in zip(batch, errors):
+            if error is not None:
+                self.mark_failed(message, error)
+        return len(sent), 0.0
+
+    def send(self, message: TgOutboxMessage) -> typing.Optional[SendError]:
+        try:
+            response = self.tg_client.send_message_to_url(chat_id=message.chat_id, text=message.text)
+        except TgRetryAfter as error:
+            return SendError(str(error), error.retry_after)
+        except ValidationError as error:
+            # ответ без ok (400, 403...): {"ok": false, "description": "Bad Request: chat not found"}
+            data = error.data if isinstance(error.data, dict) else {}
+            return SendError(f"not ok: {data.get('description', error.messages)}")
+        except Exception as error:
+            return SendError(repr(error))
+        return None if response.ok else SendError("not ok")
+
+    def mark_failed(self, message: TgOutboxMessage, error: SendError) -> None:
+        message.error = error.error
+        if error.retry_after is not None:
+            message.next_attempt_at = timezone.now() + timedelta(seconds=error.retry_after)
+            message.save(update_fields=["error", "next_attempt_at"])
+            return
+        message.attempts += 1
+        if message.attempts >= self.retries:
+            message.status = TgOutboxMessage.Status.failed
+            logger.error("Telegram message %s to chat %s failed: %s", message.pk, message.chat_id, error.error)
+        else:
+            message.next_attempt_at = timezone.now() + timedelta(seconds=min(2 ** message.attempts, 300))
+        message.save(update_fields=["attempts", "error", "status", "next_attempt_at"])
+
+    def start(self) -> "OutboxSender":
+        """
+        Отправляем в фоновом потоке до stop()
+        """
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, args=(self._stop,), name="bot-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: typing.Optional[float] = None) -> None:
+        self._stop.set()
+        outbox_wakeup.set()
+        self._thread.join(timeout)
+
+    def run(self, stop: threading.Event) -> None:
+        """
+        Отправляем, пока не попросят остановиться; без работы ждём новых сообщений (outbox_wakeup)
+        """
+        while not stop.is_set():
+            try:
+                _, wait = self.run_once()
+            except Exception:
+                logger.exception("Outbox sending failed")
+                wait = 1.0
+            finally:
+                close_old_connections()
+            if wait:
+                outbox_wakeup.wait(wait)
+                outbox_wakeup.clear()
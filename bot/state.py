@@ -0,0 +1,147 @@
+import abc
+import contextlib
+import dataclasses
+import threading
+import time
+import typing
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from bot.models import TgChatState
+
+
+@dataclasses.dataclass
+class ChatState:
+    """
+    Состояние диалога с чатом: 0 - не подтверждён, 1 - ждём команду,
+    2 - выбор категории, 3 - ввод названия цели (category_id - выбранная категория)
+    """
+    condition: int = 0
+    category_id: typing.Optional[int] = None
+
+
+class StateStore(abc.ABC):
+    """
+    Хранилище состояний чатов; состояние, которое не меняли дольше ttl секунд, забывается
+    """
+    purge_interval = 60
+
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+        self._purged = time.monotonic()
+
+    @contextlib.contextmanager
+    def locked(self, chat_id: int) -> typing.Iterator[None]:
+        """
+        Обработка сообщения чата от get до set; внутри процесса чат и так обрабатывается одним потоком
+        (UpdateDispatcher), поэтому по умолчанию ничего не блокируем
+        """
+        yield
+
+    @abc.abstractmethod
+    def get(self, chat_id: int) -> ChatState:
+        """
+        Состояние чата; для нового или забытого чата - ChatState()
+        """
+
+    @abc.abstractmethod
+    def set(self, chat_id: int, state: ChatState) -> None:
+        ...
+
+    @abc.abstractmethod
+    def delete(self, chat_id: int) -> None:
+        ...
+
+    @abc.abstractmethod
+    def purge(self) -> None:
+        """
+        Удаляем устаревшие состояния
+        """
+
+    def maybe_purge(self) -> None:
+        """
+        Чистим не чаще раза в purge_interval секунд
+        """
+        if time.monotonic() - self._purged >= self.purge_interval:
+            self._purged = time.monotonic()
+            self.purge()
+
+
+class MemoryStateStore(StateStore):
+    """
+    Состояния в памяти процесса: для одного процесса runbot с любым числом потоков
+    """
+    def __init__(self, ttl: int) -> None:
+        super().__init__(ttl)
+        self._data: typing.Dict[int, typing.Tuple[float, ChatState]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chat_id: int) -> ChatState:
+        with self._lock:
+            entry = self._data.get(chat_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._data.pop(chat_id, None)
+                return ChatState()
+            return dataclasses.replace(entry[1])
+
+    def set(self, chat_id: int, state: ChatState) -> None:
+        with self._lock:
+            self._data[chat_id] = (time.monotonic() + self.ttl, dataclasses.replace(state))
+
+    def delete(self, chat_id: int) -> None:
+        with self._lock:
+            self._data.pop(chat_id, None)
+
+    def purge(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for chat_id in [chat_id for chat_id, (expires, _) in self._data.items() if expires < now]:
+                del self._data[chat_id]
+
+
+class DatabaseStateStore(StateStore):
+    """
+    Состояния в таблице TgChatState: общие для нескольких процессов runbot
+    """
+    @contextlib.contextmanager
+    def locked(self, chat_id: int) -> typing.Iterator[None]:
+        """
+        Блокируем строку чата до конца транзакции: обновления одного чата в разных процессах
+        обрабатываются по одному и не затирают состояние друг друга (порядок между процессами не гарантирован).
+        Под блокировкой только чтение и запись состояния - цели и ответы BotRunner пишет после коммита
+        """
+        with transaction.atomic():
+            TgChatState.objects.select_for_update().get_or_create(chat_id=chat_id)
+            yield
+
+    def get(self, chat_id: int) -> ChatState:
+        row = TgChatState.objects.filter(chat_id=chat_id, updated__gte=self.expired_before()) \
+            .values("condition", "category_id").first()
+        return ChatState(**row) if row else ChatState()
+
+    def set(self, chat_id: int, state: ChatState) -> None:
+        TgChatState.objects.update_or_create(
+            chat_id=chat_id, defaults={"condition": state.condition, "category_id": state.category_id}
+        )
+
+    def delete(self, chat_id: int) -> None:
+        TgChatState.objects.filter(chat_id=chat_id).delete()
+
+    def purge(self) -> None:
+        TgChatState.objects.filter(updated__lt=self.expired_before()).delete()
+
+    def expired_before(self) -> datetime:
+        return timezone.now() - timedelta(seconds=self.ttl)
+
+
+STATE_STORES = {"memory": MemoryStateStore, "db": DatabaseStateStore}
+
+
+def get_state_store() -> StateStore:
+    """
+    Хранилище из настройки BOT_STATE_STORE ("memory" или "db") со сроком жизни BOT_STATE_TTL
+    """
+    return STATE_STORES[settings.BOT_STATE_STORE](ttl=settings.BOT_STATE_TTL)
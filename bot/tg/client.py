@@ -1,38 +1,144 @@
-from typing import Optional
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 
 from bot.tg.dc import GetUpdatesResponse, SendMessageResponse, GET_UPDATES_SCHEMA, SEND_MESSAGE_RESPONSE_SCHEMA
 
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TgRetryAfter(Exception):
+    """
+    Телеграм ответил 429 и просит подождать retry_after секунд, а клиент ждать не стал
+    (больше max_backoff или повторы кончились) - когда повторить, решает вызывающий
+    """
+    def __init__(self, method: str, retry_after: float) -> None:
+        super().__init__(f"Telegram {method}: retry after {retry_after:g}s")
+        self.method = method
+        self.retry_after = retry_after
+
 
 class TgClient:
     """
-    Класс для общения с Телеграм API
+    Класс для общения с Телеграм API.
+    Запросы идут через одну сессию requests с пулом keep-alive соединений (pool_size на поток бота),
+    у каждого вызова свой таймаут. 429 и 5xx, а также сетевые ошибки повторяются до retries раз
+    с экспоненциальной задержкой; на 429 ждём столько, сколько просит Телеграм (retry_after), а если это
+    дольше max_backoff - сразу отдаём TgRetryAfter.
+    Отправку (POST) после сетевой ошибки повторяем, только если соединение так и не установилось
     """
-    def __init__(self, token: Optional[str]) -> None:
+    def __init__(self, token: Optional[str], base_url: str = "https://api.telegram.org", pool_size: int = 10,
+                 connect_timeout: float = 5, send_timeout: float = 10, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 30) -> None:
         self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._lock = threading.Lock()
+        self._retried = 0
 
     def get_url(self, method: str) -> str:
         """
         Получаем адрес API Телеграм
         """
-        return f"https://api.telegram.org/bot{self.token}/{method}"
+        return f"{self.base_url}/bot{self.token}/{method}"
 
     def get_updates(self, offset: int = 0, timeout: int = 60) -> GetUpdatesResponse:
         """
-        Проверяем, есть ли для нас сообщение в Телеграм API
+        Проверяем, есть ли для нас сообщение в Телеграм API (long polling: ответ ждём timeout секунд и чуть дольше)
         """
-        url = self.get_url("getUpdates")
-        response = requests.get(url, params={"offset": offset, "timeout": timeout})
-        return GET_UPDATES_SCHEMA().load(response.json())
+        data = self.call("getUpdates", params={"offset": offset, "timeout": timeout}, read_timeout=timeout + 10)
+        return GET_UPDATES_SCHEMA().load(data)
 
     def send_message_to_url(self, chat_id: int, text: str) -> SendMessageResponse:
         """
         Отправляем сообщение в Телеграм API
         """
-        url = self.get_url("sendMessage")
-        response = requests.get(url, params={"chat_id": chat_id, "text": text})
-        return SEND_MESSAGE_RESPONSE_SCHEMA().load(response.json())
+        data = self.call("sendMessage", json={"chat_id": chat_id, "text": text}, read_timeout=self.send_timeout)
+        return SEND_MESSAGE_RESPONSE_SCHEMA().load(data)
+
+    def call(self, method: str, read_timeout: float, params: Optional[Dict[str, Any]] = None,
+             json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Запрос к методу API с повторами; возвращает разобранный JSON последнего ответа
+        """
+        http_method = "POST" if json is not None else "GET"
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(http_method, self.get_url(method), params=params, json=json,
+                                                timeout=(self.connect_timeout, read_timeout))
+            except (requests.ConnectionError, requests.Timeout) as error:
+                # sendMessage, отправленный в установленное соединение, мог дойти - не повторяем, чтобы не задвоить
+                if attempt >= self.retries or (json is not None and not self.is_not_sent(error)):
+                    raise
+                delay = self.get_backoff(attempt)
+            else:
+                retry_after = self.get_retry_after(response)
+                if retry_after is not None and (retry_after > self.max_backoff or attempt >= self.retries):
+                    raise TgRetryAfter(method, retry_after)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response.json()
+                delay = self.get_backoff(attempt) if retry_after is None else retry_after
+            logger.warning("Telegram %s failed, retry %s in %.1fs", method, attempt + 1, delay)
+            with self._lock:
+                self._retried += 1
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def is_not_sent(error: requests.RequestException) -> bool:
+        """
+        Запрос точно не ушёл: не успели подключиться (ConnectTimeout) или соединение не установилось.
+        "Connection aborted" и таймаут чтения бывают уже после отправки тела
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.ConnectionError) or not error.args:
+            return False
+        # requests заворачивает MaxRetryError, причина ошибки - в его reason
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, NewConnectionError)
 
+    def get_backoff(self, attempt: int) -> float:
+        return min(self.backoff * 2 ** attempt, self.max_backoff)
 
+    @staticmethod
+    def get_retry_after(response: requests.Response) -> Optional[float]:
+        """
+        На 429 Телеграм сообщает, сколько ждать: {"parameters": {"retry_after": 5}}
+        """
+        if response.status_code != 429:
+            return None
+        try:
+            return float(response.json()["parameters"]["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            return None
 
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Сколько запросов отправлено и сколько TCP/TLS соединений для них открыто; reused - запросы
+        по уже открытому соединению
+        """
+        container = self.adapter.poolmanager.pools
+        pools = [container[key] for key in container.keys()]
+        requests_count = sum(pool.num_requests for pool in pools)
+        connections = sum(pool.num_connections for pool in pools)
+        return {
+            "requests": requests_count, "connections": connections, "reused": requests_count - connections,
+            "retried": self._retried,
+        }
@@ -83,3 +83,4 @@ class SendMessageResponse:
 
 GET_UPDATES_SCHEMA = marshmallow_dataclass.class_schema(GetUpdatesResponse)
 SEND_MESSAGE_RESPONSE_SCHEMA = marshmallow_dataclass.class_schema(SendMessageResponse)
+UPDATE_SCHEMA = marshmallow_dataclass.class_schema(Update)
@@ -4,4 +4,5 @@ from bot import views
 
 urlpatterns = [
     path('verify', views.VerifyTgBotView.as_view(), name="bot_verify"),
+    path('webhook', views.TgWebhookView.as_view(), name="bot_webhook"),
 ]
@@ -1,14 +1,21 @@
+import hmac
 import typing
 
+import marshmallow
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 from rest_framework import permissions, status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.generics import UpdateAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from bot.management.commands.runbot import Command
+from bot import inbox
+from bot.management.commands.runbot import Command, get_dispatcher
 from bot.models import TgUser
+from bot.outbox import enqueue
 from bot.serializers import VerifyTgBotSerializer
+from bot.tg.dc import UPDATE_SCHEMA
 
 
 class VerifyTgBotView(UpdateAPIView):
@@ -19,10 +26,6 @@ class VerifyTgBotView(UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = VerifyTgBotSerializer
 
-    def __init__(self) -> None:
-        self.tg_client = Command.tg_client
-        super().__init__()
-
     def patch(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
         data = self.serializer_class(request.data).data
         tg_user = TgUser.objects.filter(verification_code=data["verification_code"]).first()
@@ -30,5 +33,43 @@ class VerifyTgBotView(UpdateAPIView):
             return Response(ValidationError)
         tg_user.user = request.user
         tg_user.save()
-        self.tg_client.send_message_to_url(chat_id=tg_user.tg_chat_id, text="Верификация прошла успешно")
+        enqueue(chat_id=tg_user.tg_chat_id, text="Верификация прошла успешно")
         return Response(data=data, status=status.HTTP_200_OK)
+
+
+class TgWebhookView(APIView):
+    """
+    Приём обновлений от Телеграма вместо опроса getUpdates (setWebhook с secret_token = TG_WEBHOOK_SECRET).
+    Отвечаем сразу, а обновление обрабатывает общий пул UpdateDispatcher; если он переполнен,
+    отвечаем 503 - Телеграм повторит доставку позже.
+    Порядок обновлений чата соблюдается только внутри процесса: вебхук должен обслуживать один процесс.
+    Принятое обновление записывается в TgUpdate (bot/inbox.py): повторная доставка того же update_id
+    подтверждается без обработки, а не обработанные до перезапуска процесса обрабатываются после него
+    """
+    authentication_classes: typing.List[typing.Any] = []
+    permission_classes = [permissions.AllowAny]
+    secret_header = "X-Telegram-Bot-Api-Secret-Token"
+
+    def post(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        secret = settings.TG_WEBHOOK_SECRET
+        if not secret:
+            raise NotFound
+        if not hmac.compare_digest(request.headers.get(self.secret_header, "").encode(), secret.encode()):
+            raise PermissionDenied
+        try:
+            update = UPDATE_SCHEMA().load(request.data)
+        except marshmallow.ValidationError:
+            # обновления без сообщения бот не обрабатывает - подтверждаем, чтобы Телеграм их не повторял
+            return Response(status=status.HTTP_200_OK)
+        Command.state_store.maybe_purge()
+        inbox.maybe_purge()
+        # пул создаём до записи: при создании он подбирает необработанные записи прошлого процесса
+        dispatcher = get_dispatcher()
+        record = inbox.record_update(update, request.data)
+        if record is None:
+            return Response(status=status.HTTP_200_OK)
+        if not dispatcher.submit(update.message.chat.id, update, timeout=0):
+            # Телеграм повторит доставку - запись не должна принять повтор за дубль
+            record.delete()
+            return Response(status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(status=status.HTTP_200_OK)
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.4 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='board_roles_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -6,3 +6,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            # поиск по началу username (LIKE 'abc%') в PostgreSQL при любой локали БД
+            models.Index(fields=["username"], opclasses=["varchar_pattern_ops"], name="user_username_prefix_idx"),
+        ]
+
+    # растёт при каждом изменении участников досок пользователя: по нему устаревают роли в LRU (goals/roles.py)
+    board_roles_version = models.PositiveIntegerField(default=0, editable=False)
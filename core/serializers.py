@@ -40,7 +40,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = "__all__"
+        exclude = ("board_roles_version",)
 
 
 class LoginSerializer(serializers.ModelSerializer):
@@ -60,7 +60,7 @@ class LoginSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = '__all__'
+        exclude = ('board_roles_version',)
 
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -1,6 +1,21 @@
+import typing
+
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def restore_search_triggers(sender: AppConfig, using: str, **kwargs: typing.Any) -> None:
+    """
+    После каждого migrate возвращаем триггеры полнотекстового поиска SQLite, если миграции их потеряли
+    """
+    from goals.search import restore_sqlite_fts_triggers
+
+    restore_sqlite_fts_triggers(using)
 
 
 class GoalsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'goals'
+
+    def ready(self) -> None:
+        post_migrate.connect(restore_search_triggers, sender=self)
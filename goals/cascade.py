@@ -0,0 +1,77 @@
+import typing
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from goals.counters import STATUS_FIELDS, apply
+from goals.models import Board, Goal, GoalCategory
+from goals.stats import invalidate_board_stats
+from goals.versions import bump_board_versions
+
+
+def delete_categories_batch(board_id: int, batch_size: int) -> int:
+    with transaction.atomic():
+        pks = list(
+            GoalCategory.objects.filter(board_id=board_id, is_deleted=False)
+            .order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        return GoalCategory.objects.filter(pk__in=pks).update(is_deleted=True) if pks else 0
+
+
+def archive_goals_batch(board_id: int, batch_size: int) -> int:
+    """
+    Архивируем пачку целей и сдвигаем счётчики на её разницу статусов в той же транзакции
+    """
+    with transaction.atomic():
+        rows = list(
+            Goal.objects.filter(board_id=board_id).exclude(status=Goal.Status.archived)
+            .order_by("pk").select_for_update().values_list("pk", "category_id", "status")[:batch_size]
+        )
+        if not rows:
+            return 0
+        Goal.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(status=Goal.Status.archived)
+
+        category_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+        board_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+        for _, category_id, old_status in rows:
+            for deltas in (category_deltas[category_id], board_deltas[board_id]):
+                deltas[STATUS_FIELDS[old_status]] -= 1
+                deltas["goals_archived"] += 1
+        apply(category_deltas, board_deltas)
+        return len(rows)
+
+
+def cascade_board_delete(board_id: int, batch_size: typing.Optional[int] = None,
+                         max_batches: typing.Optional[int] = None) -> bool:
+    """
+    Каскад удаления доски, уже помеченной is_deleted: категории помечаем удалёнными, цели архивируем.
+    Каждая пачка из batch_size строк - отдельная короткая транзакция, поэтому блокировки держатся недолго,
+    а прерванный каскад можно продолжить с того же места (resume_board_deletes).
+    Возвращает True, если каскад закончен, и False, если упёрся в max_batches
+    """
+    batch_size = batch_size or settings.BOARD_DELETE_BATCH_SIZE
+    batches = 0
+    for step in (delete_categories_batch, archive_goals_batch):
+        while True:
+            if max_batches is not None and batches >= max_batches:
+                return False
+            batches += 1
+            if step(board_id, batch_size) < batch_size:
+                break
+    bump_board_versions(board_id)
+    invalidate_board_stats(board_id)
+    return True
+
+
+def pending_board_deletes() -> typing.List[int]:
+    """
+    Удалённые доски, каскад которых не закончен
+    """
+    return list(
+        Board.objects.filter(is_deleted=True).filter(
+            Exists(GoalCategory.objects.filter(board=OuterRef("pk"), is_deleted=False))
+            | Exists(Goal.objects.filter(board=OuterRef("pk")).exclude(status=Goal.Status.archived))
+        ).order_by("pk").values_list("pk", flat=True)
+    )
@@ -0,0 +1,138 @@
+import typing
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Model
+
+from goals.models import (
+    Board,
+    BoardCounters,
+    BoardParticipant,
+    CategoryCounters,
+    Goal,
+    GoalCategory,
+    GoalComment,
+)
+
+# статус цели -> поле счётчика: goals_to_do, goals_in_progress, goals_done, goals_archived
+STATUS_FIELDS: typing.Dict[int, str] = dict(zip(Goal.Status.values, (f"goals_{name}" for name in Goal.Status.names)))
+GOAL_COUNTER_FIELDS = [*STATUS_FIELDS.values(), "comments"]
+BOARD_COUNTER_FIELDS = [*GOAL_COUNTER_FIELDS, "participants"]
+
+# (категория, доска, статус), с которыми цель учтена в счётчиках
+GoalState = typing.Tuple[int, int, int]
+
+
+def increment(model: typing.Type[Model], pk: int, **deltas: int) -> None:
+    """
+    Атомарно сдвигаем счётчики через F(). Если строки счётчиков нет
+    (объект создан в обход save, например bulk_create), пересчитываем её целиком
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = model.objects.filter(pk=pk).update(**{name: F(name) + delta for name, delta in deltas.items()})
+    if not updated:
+        RECOUNTERS[model]([pk])
+
+
+def apply(category_deltas: typing.Dict[int, Counter], board_deltas: typing.Dict[int, Counter]) -> None:
+    for category_id, deltas in category_deltas.items():
+        increment(CategoryCounters, category_id, **deltas)
+    for board_id, deltas in board_deltas.items():
+        increment(BoardCounters, board_id, **deltas)
+
+
+def goal_changed(old: typing.Optional[GoalState], new: typing.Optional[GoalState], comments: int = 0) -> None:
+    """
+    Цель создана (old is None), удалена (new is None) или сменила категорию/статус.
+    comments - сколько комментариев переехало вместе с ней в другую категорию
+    """
+    category_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+    board_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        category_id, board_id, status = state
+        for deltas in (category_deltas[category_id], board_deltas[board_id]):
+            deltas[STATUS_FIELDS[status]] += sign
+            deltas["comments"] += sign * comments
+    apply(category_deltas, board_deltas)
+
+
+def comment_changed(old_goal: typing.Optional[Goal], new_goal: typing.Optional[Goal]) -> None:
+    """
+    Комментарий добавлен к цели new_goal, удалён у old_goal или перенесён между ними
+    """
+    category_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+    board_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+    for goal, sign in ((old_goal, -1), (new_goal, 1)):
+        if goal is not None:
+            category_deltas[goal.category_id]["comments"] += sign
+            board_deltas[goal.board_id]["comments"] += sign
+    apply(category_deltas, board_deltas)
+
+
+def recount_categories(category_ids: typing.Iterable[int]) -> None:
+    """
+    Пересчитываем счётчики категорий двумя сгруппированными запросами и записываем одним upsert
+    """
+    counters = {
+        pk: CategoryCounters(category_id=pk)
+        for pk in GoalCategory.objects.filter(pk__in=list(category_ids)).values_list("pk", flat=True)
+    }
+    if not counters:
+        return
+    goals = (
+        Goal.objects.filter(category_id__in=counters)
+        .values_list("category_id", "status").annotate(total=Count("id")).order_by()
+    )
+    for category_id, status, total in goals:
+        setattr(counters[category_id], STATUS_FIELDS[status], total)
+    comments = (
+        GoalComment.objects.filter(goal__category_id__in=counters)
+        .values_list("goal__category_id").annotate(total=Count("id")).order_by()
+    )
+    for category_id, total in comments:
+        counters[category_id].comments = total
+    CategoryCounters.objects.bulk_create(
+        counters.values(), update_conflicts=True, unique_fields=["category"], update_fields=GOAL_COUNTER_FIELDS
+    )
+
+
+def recount_boards(board_ids: typing.Iterable[int]) -> None:
+    """
+    То же для досок, плюс число участников
+    """
+    counters = {
+        pk: BoardCounters(board_id=pk)
+        for pk in Board.objects.filter(pk__in=list(board_ids)).values_list("pk", flat=True)
+    }
+    if not counters:
+        return
+    goals = (
+        Goal.objects.filter(board_id__in=counters)
+        .values_list("board_id", "status").annotate(total=Count("id")).order_by()
+    )
+    for board_id, status, total in goals:
+        setattr(counters[board_id], STATUS_FIELDS[status], total)
+    comments = (
+        GoalComment.objects.filter(board_id__in=counters)
+        .values_list("board_id").annotate(total=Count("id")).order_by()
+    )
+    for board_id, total in comments:
+        counters[board_id].comments = total
+    participants = (
+        BoardParticipant.objects.filter(board_id__in=counters)
+        .values_list("board_id").annotate(total=Count("id")).order_by()
+    )
+    for board_id, total in participants:
+        counters[board_id].participants = total
+    BoardCounters.objects.bulk_create(
+        counters.values(), update_conflicts=True, unique_fields=["board"], update_fields=BOARD_COUNTER_FIELDS
+    )
+
+
+RECOUNTERS: typing.Dict[typing.Type[Model], typing.Callable[[typing.Iterable[int]], None]] = {
+    CategoryCounters: recount_categories,
+    BoardCounters: recount_boards,
+}
@@ -0,0 +1,133 @@
+import abc
+import csv
+import datetime
+import io
+import json
+import typing
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from rest_framework.renderers import BaseRenderer
+
+# сколько строк читать из курсора БД за раз и сколько строк отдавать клиенту одним куском
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FLUSH_ROWS = 500
+
+# имя в выгрузке -> колонка .values()
+GOAL_COLUMNS = {
+    "id": "id", "board": "board_id", "category": "category_id", "title": "title", "description": "description",
+    "status": "status", "priority": "priority", "due_date": "due_date", "user": "user__username",
+    "created": "created", "updated": "updated",
+}
+COMMENT_COLUMNS = {
+    "id": "id", "board": "board_id", "goal": "goal_id", "text": "text", "user": "user__username",
+    "created": "created", "updated": "updated",
+}
+EXPORT_FIELDS = [
+    "type", "id", "board", "category", "goal", "title", "description", "text", "status", "priority", "due_date",
+    "user", "created", "updated",
+]
+
+Row = typing.Dict[str, typing.Any]
+
+
+def read_rows(queryset: QuerySet, row_type: str, columns: typing.Dict[str, str],
+              chunk_size: int = EXPORT_CHUNK_SIZE) -> typing.Iterator[Row]:
+    """
+    Строки выгрузки через серверный курсор: в памяти только текущая пачка chunk_size
+    """
+    for row in queryset.order_by("pk").values_list(*columns.values()).iterator(chunk_size=chunk_size):
+        yield {"type": row_type, **dict(zip(columns, row))}
+
+
+def export_rows(goals: QuerySet, comments: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> typing.Iterator[Row]:
+    yield from read_rows(goals, "goal", GOAL_COLUMNS, chunk_size)
+    yield from read_rows(comments, "comment", COMMENT_COLUMNS, chunk_size)
+
+
+class StreamingRenderer(BaseRenderer, abc.ABC):
+    """
+    Рендерер, который умеет отдавать строки потоком (stream) кусками по EXPORT_FLUSH_ROWS строк.
+    render нужен для обычных ответов, например ошибок
+    """
+    charset = "utf-8"
+
+    def render(self, data: typing.Any, accepted_media_type: typing.Optional[str] = None,
+               renderer_context: typing.Optional[typing.Dict[str, typing.Any]] = None) -> bytes:
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(self.stream(rows, list(rows[0]) if rows and isinstance(rows[0], dict) else []))
+
+    @abc.abstractmethod
+    def stream(self, rows: typing.Iterable[Row], fields: typing.List[str]) -> typing.Iterator[bytes]:
+        """
+        Строки выгрузки кусками байт; fields - колонки, если формату они нужны
+        """
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def stream(self, rows: typing.Iterable[Row], fields: typing.List[str]) -> typing.Iterator[bytes]:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        lines = []
+        for row in rows:
+            lines.append(encoder.encode(row))
+            if len(lines) >= EXPORT_FLUSH_ROWS:
+                yield ("\n".join(lines) + "\n").encode(self.charset)
+                lines = []
+        if lines:
+            yield ("\n".join(lines) + "\n").encode(self.charset)
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    @staticmethod
+    def format_value(value: typing.Any) -> typing.Any:
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            return value.isoformat()
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def stream(self, rows: typing.Iterable[Row], fields: typing.List[str]) -> typing.Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow({name: self.format_value(value) for name, value in row.items()})
+            if count % EXPORT_FLUSH_ROWS == 0:
+                yield buffer.getvalue().encode(self.charset)
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode(self.charset)
+
+
+class JSONArrayRenderer(StreamingRenderer):
+    """
+    Для клиентов с Accept: application/json - те же строки одним JSON-массивом, тоже потоком
+    """
+    media_type = "application/json"
+    format = "json"
+
+    def render(self, data: typing.Any, accepted_media_type: typing.Optional[str] = None,
+               renderer_context: typing.Optional[typing.Dict[str, typing.Any]] = None) -> bytes:
+        if data is None:
+            return b""
+        return DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":")).encode(data).encode(self.charset)
+
+    def stream(self, rows: typing.Iterable[Row], fields: typing.List[str]) -> typing.Iterator[bytes]:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        lines, separator = [], "["
+        for row in rows:
+            lines.append(separator + encoder.encode(row))
+            separator = ","
+            if len(lines) >= EXPORT_FLUSH_ROWS:
+                yield "".join(lines).encode(self.charset)
+                lines = []
+        lines.append("[]" if separator == "[" else "]")
+        yield "".join(lines).encode(self.charset)
@@ -0,0 +1,255 @@
+import csv
+import io
+import itertools
+import json
+import os
+import time
+import typing
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import User
+from goals.counters import STATUS_FIELDS, apply
+from goals.models import BoardParticipant, CategoryCounters, Goal, GoalCategory
+from goals.permissions import WRITER_ROLES
+from goals.stats import invalidate_board_stats
+from goals.versions import bump_board_versions
+
+IMPORT_BATCH_SIZE = 5000
+# сколько ошибок хранить в отчёте (считаются все)
+MAX_REPORTED_ERRORS = 100
+
+Row = typing.Dict[str, typing.Any]
+# номер строки, (доска, категория) и поля цели
+CleanedRow = typing.Tuple[int, typing.Tuple[int, str], typing.Dict[str, typing.Any]]
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_ndjson(stream: typing.IO[str]) -> typing.Iterator[Row]:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {"_error": "invalid JSON object"}
+
+
+def read_csv(stream: typing.IO[str]) -> typing.Iterator[Row]:
+    yield from csv.DictReader(stream)
+
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+def detect_format(name: str) -> str:
+    return "csv" if name.lower().endswith(".csv") else "ndjson"
+
+
+def read_rows(stream: typing.IO[bytes], fmt: str) -> typing.Iterator[Row]:
+    """
+    Потоковое чтение файла: в памяти только текущая строка
+    """
+    return READERS[fmt](io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+
+
+class Checkpoint:
+    """
+    Сколько строк файла уже импортировано и закоммичено: после сбоя импорт продолжится с них
+    """
+    def __init__(self, path: typing.Optional[str]) -> None:
+        self.path = path
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path) as file:
+            return int(json.load(file)["rows"])
+
+    def save(self, rows: int) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"rows": rows}, file)
+        os.replace(tmp_path, self.path)
+
+
+class ImportReport:
+    def __init__(self, skipped: int = 0) -> None:
+        self.skipped = skipped
+        self.rows = 0
+        self.goals = 0
+        self.categories = 0
+        self.error_count = 0
+        self.errors: typing.List[typing.Dict[str, typing.Any]] = []
+        self.started = time.monotonic()
+
+    def add_error(self, row_number: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    @property
+    def rate(self) -> float:
+        """
+        Целей в минуту
+        """
+        elapsed = time.monotonic() - self.started
+        return self.goals * 60 / elapsed if elapsed else 0.0
+
+    def as_dict(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "rows": self.rows, "skipped": self.skipped, "goals": self.goals, "categories": self.categories,
+            "error_count": self.error_count, "errors": self.errors,
+        }
+
+
+class GoalImporter:
+    """
+    Импорт целей пачками: строка - это board (id доски), category (название категории), title,
+    description, status, priority, due_date. Категории ищутся по названию на доске одним запросом на пачку,
+    недостающие создаются; цели вставляются через bulk_create. Каждая пачка - своя транзакция,
+    в ней же сдвигаются счётчики, версии досок и контрольная точка
+    """
+    def __init__(self, user: User, batch_size: int = IMPORT_BATCH_SIZE, checkpoint: typing.Optional[str] = None,
+                 progress: typing.Optional[typing.Callable[[ImportReport], None]] = None) -> None:
+        self.user = user
+        self.batch_size = batch_size
+        self.checkpoint = Checkpoint(checkpoint)
+        self.progress = progress
+        self.writable = set(
+            BoardParticipant.objects.filter(user=user, role__in=WRITER_ROLES, board__is_deleted=False)
+            .values_list("board_id", flat=True)
+        )
+
+    def run(self, rows: typing.Iterable[Row]) -> ImportReport:
+        done = self.checkpoint.load()
+        report = ImportReport(skipped=done)
+        numbered = enumerate(itertools.islice(rows, done, None), done + 1)
+        while True:
+            batch = list(itertools.islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch, report, done + report.rows + len(batch))
+            report.rows += len(batch)
+            if self.progress is not None:
+                self.progress(report)
+        return report
+
+    def clean(self, row: Row) -> typing.Tuple[typing.Tuple[int, str], typing.Dict[str, typing.Any]]:
+        """
+        Проверяем строку и приводим её к полям Goal; ошибки - ImportRowError
+        """
+        if "_error" in row:
+            raise ImportRowError(row["_error"])
+        try:
+            board_id = int(row.get("board") or "")
+        except (TypeError, ValueError):
+            raise ImportRowError("board: a valid integer is required")
+        if board_id not in self.writable:
+            raise ImportRowError("board: You do not have permission to perform this action.")
+        category = self.get_text(row, "category").strip()
+        if not category or len(category) > 255:
+            raise ImportRowError("category: a title up to 255 characters is required")
+        title = self.get_text(row, "title").strip()
+        if not title or len(title) > 255:
+            raise ImportRowError("title: up to 255 characters is required")
+
+        data = {"title": title, "description": self.get_text(row, "description") or None}
+        for name, choices in (("status", Goal.Status), ("priority", Goal.Priority)):
+            value = row.get(name)
+            if value in (None, ""):
+                continue
+            try:
+                data[name] = choices(int(value))
+            except (TypeError, ValueError):
+                raise ImportRowError(f'{name}: "{value}" is not a valid choice.')
+        due_date = row.get("due_date")
+        if due_date:
+            parsed = parse_datetime(str(due_date))
+            if parsed is None:
+                raise ImportRowError("due_date: datetime has wrong format.")
+            data["due_date"] = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+        return (board_id, category), data
+
+    @staticmethod
+    def get_text(row: Row, name: str) -> str:
+        """
+        Текстовое поле строки: в NDJSON вместо строки может прийти число, список или объект
+        """
+        value = row.get(name)
+        if value is None:
+            return ""
+        if not isinstance(value, str):
+            raise ImportRowError(f"{name}: not a valid string.")
+        return value
+
+    def import_batch(self, batch: typing.List[typing.Tuple[int, Row]], report: ImportReport, rows: int) -> None:
+        """
+        Пачка и контрольная точка rows пишутся в одной транзакции: не записалась точка - откатывается и пачка
+        """
+        cleaned: typing.List[CleanedRow] = []
+        for row_number, row in batch:
+            try:
+                cleaned.append((row_number, *self.clean(row)))
+            except ImportRowError as error:
+                report.add_error(row_number, str(error))
+
+        with transaction.atomic():
+            created = self.create_goals(cleaned, report) if cleaned else 0
+            self.checkpoint.save(rows)
+        report.goals += created
+
+    def create_goals(self, cleaned: typing.List[CleanedRow], report: ImportReport) -> int:
+        categories = self.resolve_categories({key for _, key, _ in cleaned}, report)
+        goals = []
+        for row_number, key, data in cleaned:
+            category = categories[key]
+            if category.user_id != self.user.pk:
+                report.add_error(row_number, "category: not owner of category")
+                continue
+            goals.append(Goal(**data, user=self.user, category=category, board_id=category.board_id))
+        Goal.objects.bulk_create(goals)
+
+        category_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+        board_deltas: typing.Dict[int, Counter] = defaultdict(Counter)
+        for goal in goals:
+            category_deltas[goal.category_id][STATUS_FIELDS[goal.status]] += 1
+            board_deltas[goal.board_id][STATUS_FIELDS[goal.status]] += 1
+        apply(category_deltas, board_deltas)
+        bump_board_versions(*board_deltas)
+        invalidate_board_stats(*board_deltas)
+        return len(goals)
+
+    def resolve_categories(self, keys: typing.Set[typing.Tuple[int, str]],
+                           report: ImportReport) -> typing.Dict[typing.Tuple[int, str], GoalCategory]:
+        """
+        Все категории пачки одним запросом; недостающие создаём одним bulk_create со счётчиками
+        """
+        board_ids = {board_id for board_id, _ in keys}
+        titles = {title for _, title in keys}
+        categories: typing.Dict[typing.Tuple[int, str], GoalCategory] = {}
+        for category in GoalCategory.objects.filter(board_id__in=board_ids, title__in=titles, is_deleted=False) \
+                .order_by("pk"):
+            categories.setdefault((category.board_id, category.title), category)
+
+        missing = [
+            GoalCategory(board_id=board_id, title=title, user=self.user)
+            for board_id, title in sorted(keys - set(categories))
+        ]
+        if missing:
+            GoalCategory.objects.bulk_create(missing)
+            CategoryCounters.objects.bulk_create([CategoryCounters(category=category) for category in missing])
+            bump_board_versions(*{category.board_id for category in missing})
+            report.categories += len(missing)
+            categories.update({(category.board_id, category.title): category for category in missing})
+        return categories
@@ -0,0 +1,56 @@
+import statistics
+import time
+import typing
+
+from django.core.management import BaseCommand, CommandError
+from django.core.management.base import CommandParser
+from rest_framework.renderers import JSONRenderer
+
+from goals.fast_read import FastRows
+from goals.models import Goal
+from goals.renderers import FastJSONRenderer
+from goals.serializers import GoalSerializer
+from goals.views import with_author
+
+
+class Command(BaseCommand):
+    """
+    Сравнение обычного и быстрого пути списка целей: запрос, сборка ответа и рендеринг
+    (python manage.py bench_goal_list --limit 500; данные можно засеять bench_indexes)
+    """
+    help = "compare GoalSerializer + JSONRenderer with the GOALS_FAST_READ path"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--limit", type=int, default=500, help="целей в странице")
+        parser.add_argument("--repeat", type=int, default=20, help="повторов каждого варианта")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        queryset = with_author(Goal.objects.order_by("title", "pk"))[:options["limit"]]
+        if not queryset.exists():
+            raise CommandError("no goals, seed them first: python manage.py bench_indexes")
+        fast_rows = FastRows(GoalSerializer)
+
+        def serializer_path() -> bytes:
+            return JSONRenderer().render(GoalSerializer(list(queryset), many=True).data)
+
+        def fast_path() -> bytes:
+            return FastJSONRenderer().render(fast_rows.render(fast_rows.values(queryset)))
+
+        if serializer_path() != fast_path():
+            raise CommandError("fast path output differs from GoalSerializer")
+
+        results = {name: self.measure(path, options["repeat"]) for name, path in (
+            ("serializer", serializer_path), ("fast", fast_path),
+        )}
+        for name, median in results.items():
+            self.stdout.write(f"{name}: {median:.2f} ms")
+        self.stdout.write(f"speedup: {results['serializer'] / results['fast']:.1f}x")
+
+    @staticmethod
+    def measure(path: typing.Callable[[], bytes], repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            path()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,199 @@
+import random
+import statistics
+import time
+import typing
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.core.management.base import CommandParser
+from django.db import connection, models, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from core.models import User
+from goals.counters import recount_boards, recount_categories
+from goals.models import (
+    Board, BoardCounters, BoardParticipant, CategoryCounters, GoalCategory, Goal, GoalComment,
+)
+
+BENCH_USERNAME = "bench_user"
+INDEXED_MODELS: typing.Tuple[typing.Type[models.Model], ...] = (
+    Board, BoardParticipant, GoalCategory, Goal, GoalComment,
+)
+
+
+class Command(BaseCommand):
+    """
+    Бенчмарк горячих запросов до и после индексов из Meta.indexes
+    (python manage.py bench_indexes --goals 1000000).
+    Работает с настроенной БД: индексы возвращаются на место при любой ошибке, засеянные данные
+    после замеров удаляются (--keep оставляет их для следующих запусков с --no-seed)
+    """
+    help = "seed goals and compare query plans and latencies with and without indexes"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--goals", type=int, default=1_000_000, help="сколько целей засеять")
+        parser.add_argument("--boards", type=int, default=200, help="сколько досок засеять")
+        parser.add_argument("--categories", type=int, default=10, help="категорий на доску")
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5, help="повторов каждого запроса")
+        parser.add_argument("--no-seed", action="store_true", help="использовать уже засеянные данные")
+        parser.add_argument("--keep", action="store_true", help="не удалять засеянные данные")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        try:
+            if not options["no_seed"]:
+                self.seed(options)
+            user = User.objects.get(username=BENCH_USERNAME)
+            queries = self.get_queries(user)
+
+            self.drop_indexes()
+            try:
+                before = self.measure(queries, options["repeat"])
+            finally:
+                self.create_indexes()
+            after = self.measure(queries, options["repeat"])
+        finally:
+            if not options["no_seed"] and not options["keep"]:
+                self.cleanup()
+
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(f"before: {before[name][0]:.2f} ms\n{before[name][1]}")
+            self.stdout.write(f"after:  {after[name][0]:.2f} ms\n{after[name][1]}")
+            self.stdout.write("")
+
+    def seed(self, options: typing.Dict[str, typing.Any]) -> None:
+        """
+        Засеваем доски, участников, категории, цели и комментарии пачками
+        """
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        others = [User.objects.get_or_create(username=f"{BENCH_USERNAME}_{i}")[0] for i in range(5)]
+        now = timezone.now()
+
+        with transaction.atomic():
+            boards = Board.objects.bulk_create(
+                [Board(title=f"bench board {i}") for i in range(options["boards"])]
+            )
+            # бенчмарк-пользователь видит только каждую вторую доску
+            BoardParticipant.objects.bulk_create(
+                [BoardParticipant(board=board, user=user, role=random.choice(BoardParticipant.Role.values))
+                 for board in boards[::2]]
+                + [BoardParticipant(board=board, user=other, role=BoardParticipant.Role.reader)
+                   for board in boards for other in others]
+            )
+            categories = GoalCategory.objects.bulk_create(
+                [GoalCategory(title=f"category {i}", board=board, user=user,
+                              is_deleted=random.random() < 0.1)
+                 for board in boards for i in range(options["categories"])]
+            )
+            # bulk_create обходит save(): строки счётчиков создаём сами, досчитаем их после целей
+            BoardCounters.objects.bulk_create([BoardCounters(board=board) for board in boards])
+            CategoryCounters.objects.bulk_create([CategoryCounters(category=category) for category in categories])
+
+        statuses = Goal.Status.values
+        priorities = Goal.Priority.values
+        created = 0
+        while created < options["goals"]:
+            size = min(options["batch_size"], options["goals"] - created)
+            with transaction.atomic():
+                goals = Goal.objects.bulk_create([
+                    Goal(
+                        title=f"goal {created + i}",
+                        user=user,
+                        category=category,
+                        board_id=category.board_id,
+                        status=random.choice(statuses),
+                        priority=random.choice(priorities),
+                        due_date=now + timedelta(days=random.randint(-60, 60)),
+                    )
+                    for i, category in enumerate(random.choices(categories, k=size))
+                ])
+                GoalComment.objects.bulk_create([
+                    GoalComment(goal=goal, board_id=goal.board_id, user=user, text="bench comment")
+                    for goal in random.sample(goals, k=max(1, size // 10))
+                ])
+            created += size
+            self.stdout.write(f"seeded {created}/{options['goals']} goals")
+        recount_categories([category.pk for category in categories])
+        recount_boards([board.pk for board in boards])
+
+    @staticmethod
+    def get_bench_users() -> QuerySet:
+        return User.objects.filter(username__in=[BENCH_USERNAME, *(f"{BENCH_USERNAME}_{i}" for i in range(5))])
+
+    def cleanup(self) -> None:
+        """
+        Удаляем засеянное по доскам: все бенчмарк-доски видит служебный пользователь bench_user_0
+        """
+        board_ids = list(
+            Board.objects.filter(participants__user__username=f"{BENCH_USERNAME}_0").values_list("pk", flat=True)
+        )
+        for board_id in board_ids:
+            with transaction.atomic():
+                GoalComment.objects.filter(board_id=board_id).delete()
+                Goal.objects.filter(board_id=board_id).delete()
+                GoalCategory.objects.filter(board_id=board_id).delete()
+                BoardParticipant.objects.filter(board_id=board_id).delete()
+                Board.objects.filter(pk=board_id).delete()
+        self.get_bench_users().delete()
+        self.stdout.write(f"removed {len(board_ids)} seeded boards")
+
+    def get_queries(self, user: User) -> typing.Dict[str, QuerySet]:
+        """
+        Запросы, повторяющие get_queryset представлений goals/views.py
+        """
+        category = GoalCategory.objects.filter(board__participants__user=user, is_deleted=False).first()
+        goal = Goal.objects.filter(category=category).first()
+        now = timezone.now()
+        return {
+            "goal list": Goal.objects.filter(board__participants__user=user)
+            .exclude(status=Goal.Status.archived).order_by("title", "id")[:100],
+            "goal list by category and status": Goal.objects.filter(
+                category=category, status=Goal.Status.in_progress).order_by("title", "id")[:100],
+            "overdue goals": Goal.objects.filter(
+                status=Goal.Status.to_do, due_date__lt=now).order_by("due_date")[:100],
+            "goal comments": GoalComment.objects.filter(goal=goal).order_by("-created")[:100],
+            "comment list": GoalComment.objects.filter(
+                board__participants__user=user).order_by("-created", "-id")[:100],
+            "category list": GoalCategory.objects.filter(
+                board__participants__user=user, is_deleted=False).order_by("title", "id")[:100],
+            "board list": Board.objects.filter(
+                participants__user=user, is_deleted=False).order_by("title", "id")[:100],
+            "permission check": BoardParticipant.objects.filter(
+                user=user, board=category.board_id,
+                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer]),
+        }
+
+    def measure(self, queries: typing.Dict[str, QuerySet],
+                repeat: int) -> typing.Dict[str, typing.Tuple[float, str]]:
+        """
+        Медиана времени выполнения и план каждого запроса
+        """
+        self.analyze()
+        result = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            result[name] = (statistics.median(timings), queryset.explain())
+        return result
+
+    def drop_indexes(self) -> None:
+        with connection.schema_editor() as schema_editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    schema_editor.remove_index(model, index)
+
+    def create_indexes(self) -> None:
+        with connection.schema_editor() as schema_editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    schema_editor.add_index(model, index)
+
+    @staticmethod
+    def analyze() -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
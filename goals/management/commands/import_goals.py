@@ -0,0 +1,43 @@
+import typing
+
+from django.core.management import BaseCommand, CommandError
+from django.core.management.base import CommandParser
+
+from core.models import User
+from goals.importer import IMPORT_BATCH_SIZE, GoalImporter, ImportReport, READERS, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Импорт целей из NDJSON/CSV от имени пользователя
+    (python manage.py import_goals goals.ndjson --user name --checkpoint goals.ckpt)
+    """
+    help = "import goals from an NDJSON or CSV file in batches"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="файл NDJSON или CSV")
+        parser.add_argument("--user", required=True, help="username автора целей и новых категорий")
+        parser.add_argument("--format", choices=sorted(READERS), help="по умолчанию - по расширению файла")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--checkpoint", help="файл контрольной точки; при повторном запуске импорт продолжится")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f'user "{options["user"]}" does not exist')
+
+        importer = GoalImporter(user, batch_size=options["batch_size"], checkpoint=options["checkpoint"],
+                                progress=self.report_progress)
+        with open(options["path"], "rb") as file:
+            report = importer.run(read_rows(file, options["format"] or detect_format(options["path"])))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"done: {report.rows} rows, {report.goals} goals, {report.categories} categories, "
+            f"{report.error_count} errors, {report.skipped} skipped by checkpoint"
+        ))
+        for error in report.errors:
+            self.stdout.write(f"row {error['row']}: {error['error']}")
+
+    def report_progress(self, report: ImportReport) -> None:
+        self.stdout.write(f"{report.skipped + report.rows} rows, {report.goals} goals, {report.rate:.0f} goals/min")
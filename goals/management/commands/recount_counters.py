@@ -0,0 +1,44 @@
+import typing
+
+from django.core.management import BaseCommand
+from django.core.management.base import CommandParser
+from django.db import transaction
+from django.db.models import Model
+
+from goals.counters import recount_boards, recount_categories
+from goals.models import Board, GoalCategory
+
+Recount = typing.Callable[[typing.List[int]], None]
+COUNTED_MODELS: typing.Tuple[typing.Tuple[typing.Type[Model], Recount], ...] = (
+    (GoalCategory, recount_categories), (Board, recount_boards),
+)
+
+
+class Command(BaseCommand):
+    """
+    Пересчёт счётчиков категорий и досок с нуля, пачками (python manage.py recount_counters)
+    """
+    help = "recompute goal, comment and participant counters of categories and boards"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        for model, recount in COUNTED_MODELS:
+            total = self.recount(model, recount, options["batch_size"])
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {total}")
+
+    @staticmethod
+    def recount(model: typing.Type[Model], recount: Recount, batch_size: int) -> int:
+        """
+        Каждая пачка пересчитывается в своей транзакции
+        """
+        last_pk, total = 0, 0
+        while True:
+            pks = list(model.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return total
+            with transaction.atomic():
+                recount(pks)
+            last_pk = pks[-1]
+            total += len(pks)
@@ -0,0 +1,18 @@
+import typing
+
+from django.core.management import BaseCommand
+
+from goals.response_cache import get_response_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Попадания и промахи кэша ответов списков (python manage.py response_cache_stats)
+    """
+    help = "show hit/miss counters of the goals list response cache"
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        stats = get_response_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(f"hits: {stats['hits']}\nmisses: {stats['misses']}\nhit ratio: {ratio:.1%}")
@@ -0,0 +1,25 @@
+import typing
+
+from django.core.management import BaseCommand
+from django.core.management.base import CommandParser
+
+from goals.cascade import cascade_board_delete, pending_board_deletes
+
+
+class Command(BaseCommand):
+    """
+    Доводит до конца каскады удаления досок, прерванные или не уместившиеся в запрос.
+    Больше их никто не доделывает - команду нужно запускать по расписанию (cron, см. README)
+    (python manage.py resume_board_deletes)
+    """
+    help = "finish soft-delete cascades of deleted boards in batches"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, help="по умолчанию BOARD_DELETE_BATCH_SIZE")
+
+    def handle(self, *args: typing.Any, **options: typing.Any) -> None:
+        board_ids = pending_board_deletes()
+        for board_id in board_ids:
+            cascade_board_delete(board_id, batch_size=options["batch_size"])
+            self.stdout.write(f"board {board_id}: done")
+        self.stdout.write(self.style.SUCCESS(f"finished {len(board_ids)} boards"))
@@ -0,0 +1,76 @@
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_board(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """
+    Заполняем board у целей (из категории), затем у комментариев (из цели).
+    Каждая пачка коммитится отдельно, поэтому миграцию можно перезапустить
+    """
+    Goal = apps.get_model("goals", "Goal")
+    GoalCategory = apps.get_model("goals", "GoalCategory")
+    GoalComment = apps.get_model("goals", "GoalComment")
+
+    sources = (
+        (Goal, GoalCategory.objects.filter(pk=OuterRef("category_id")).values("board_id")[:1]),
+        (GoalComment, Goal.objects.filter(pk=OuterRef("goal_id")).values("board_id")[:1]),
+    )
+    for model, board_id in sources:
+        last_pk = 0
+        while True:
+            pks = list(
+                model.objects.filter(pk__gt=last_pk, board__isnull=True)
+                .order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE]
+            )
+            if not pks:
+                break
+            with transaction.atomic(using=schema_editor.connection.alias):
+                model.objects.filter(pk__gte=pks[0], pk__lte=pks[-1], board__isnull=True).update(
+                    board_id=Subquery(board_id)
+                )
+            last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('goals', '0015_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='board',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='goals', to='goals.board', verbose_name='Доска'),
+        ),
+        migrations.AddField(
+            model_name='goalcomment',
+            name='board',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='comments', to='goals.board', verbose_name='Доска'),
+        ),
+        migrations.RunPython(backfill_board, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='goal',
+            name='board',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='goals', to='goals.board', verbose_name='Доска'),
+        ),
+        migrations.AlterField(
+            model_name='goalcomment',
+            name='board',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='comments', to='goals.board', verbose_name='Доска'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('status', 4), _negated=True), fields=['board', 'title'], name='goal_active_board_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goalcomment',
+            index=models.Index(fields=['board', 'created'], name='goalcomment_board_created_idx'),
+        ),
+    ]
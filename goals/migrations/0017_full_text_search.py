@@ -0,0 +1,80 @@
+import typing
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+# PostgreSQL: поддерживаемая самой БД колонка tsvector (GENERATED ... STORED) и GIN-индекс по ней
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE goals_goal ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX goals_goal_search_idx ON goals_goal USING GIN (search_vector)",
+    """
+    ALTER TABLE goals_goalcomment ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('russian', coalesce(text, ''))
+    ) STORED
+    """,
+    "CREATE INDEX goals_goalcomment_search_idx ON goals_goalcomment USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "ALTER TABLE goals_goal DROP COLUMN search_vector",
+    "ALTER TABLE goals_goalcomment DROP COLUMN search_vector",
+]
+
+
+def sqlite_fts(table: str, columns: typing.Sequence[str]) -> typing.List[str]:
+    """
+    SQLite: теневая таблица FTS5 с внешним содержимым и триггеры, которые её поддерживают.
+    Пересоздание таблицы схемой Django (AlterField на SQLite) удаляет триггеры -
+    их создаёт заново goals.search.restore_sqlite_fts_triggers после каждого migrate
+    """
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_FORWARD = sqlite_fts("goals_goal", ("title", "description")) + sqlite_fts("goals_goalcomment", ("text",))
+SQLITE_BACKWARD = ["DROP TABLE goals_goal_fts", "DROP TABLE goals_goalcomment_fts"] + [
+    f"DROP TRIGGER {table}_fts_{suffix}"
+    for table in ("goals_goal", "goals_goalcomment") for suffix in ("ai", "ad", "au")
+]
+
+
+def run(
+    statements: typing.Dict[str, typing.List[str]]
+) -> typing.Callable[[StateApps, BaseDatabaseSchemaEditor], None]:
+    def apply(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0016_goal_board_goalcomment_board'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 4.1.4 on 2026-10-18 07:17
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import Count
+import django.db.models.deletion
+
+BATCH_SIZE = 5000
+STATUS_FIELDS = {1: "goals_to_do", 2: "goals_in_progress", 3: "goals_done", 4: "goals_archived"}
+
+
+def backfill_counters(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """
+    Считаем счётчики всех категорий и досок пачками по BATCH_SIZE.
+    Повторный расчёт делает команда recount_counters
+    """
+    Board = apps.get_model("goals", "Board")
+    BoardCounters = apps.get_model("goals", "BoardCounters")
+    BoardParticipant = apps.get_model("goals", "BoardParticipant")
+    CategoryCounters = apps.get_model("goals", "CategoryCounters")
+    Goal = apps.get_model("goals", "Goal")
+    GoalCategory = apps.get_model("goals", "GoalCategory")
+    GoalComment = apps.get_model("goals", "GoalComment")
+
+    targets = (
+        (GoalCategory, CategoryCounters, "category_id", [
+            (Goal, "category_id"), (GoalComment, "goal__category_id"),
+        ]),
+        (Board, BoardCounters, "board_id", [
+            (Goal, "board_id"), (GoalComment, "board_id"), (BoardParticipant, "board_id"),
+        ]),
+    )
+    for owner, counters_model, key, sources in targets:
+        last_pk = 0
+        while True:
+            pks = list(owner.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE])
+            if not pks:
+                break
+            counters = {pk: counters_model(**{key: pk}) for pk in pks}
+            for model, field in sources:
+                rows = model.objects.filter(**{f"{field}__in": pks})
+                if model is Goal:
+                    for pk, status, total in rows.values_list(field, "status").annotate(total=Count("id")).order_by():
+                        setattr(counters[pk], STATUS_FIELDS[status], total)
+                else:
+                    name = "participants" if model is BoardParticipant else "comments"
+                    for pk, total in rows.values_list(field).annotate(total=Count("id")).order_by():
+                        setattr(counters[pk], name, total)
+            counters_model.objects.bulk_create(counters.values(), ignore_conflicts=True)
+            last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0017_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardCounters',
+            fields=[
+                ('goals_to_do', models.IntegerField(default=0, verbose_name='К выполнению')),
+                ('goals_in_progress', models.IntegerField(default=0, verbose_name='В процессе')),
+                ('goals_done', models.IntegerField(default=0, verbose_name='Выполнено')),
+                ('goals_archived', models.IntegerField(default=0, verbose_name='В архиве')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментарии')),
+                ('board', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='goals.board', verbose_name='Доска')),
+                ('participants', models.IntegerField(default=0, verbose_name='Участники')),
+            ],
+            options={
+                'verbose_name': 'Счётчики доски',
+                'verbose_name_plural': 'Счётчики досок',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryCounters',
+            fields=[
+                ('goals_to_do', models.IntegerField(default=0, verbose_name='К выполнению')),
+                ('goals_in_progress', models.IntegerField(default=0, verbose_name='В процессе')),
+                ('goals_done', models.IntegerField(default=0, verbose_name='Выполнено')),
+                ('goals_archived', models.IntegerField(default=0, verbose_name='В архиве')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментарии')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to='goals.goalcategory', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Счётчики категории',
+                'verbose_name_plural': 'Счётчики категорий',
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
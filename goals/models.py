@@ -1,4 +1,6 @@
-from django.db import models
+import typing
+
+from django.db import models, transaction
 from django.utils import timezone
 
 from core.models import User
@@ -16,9 +18,35 @@ class Board(DateModelMixin):
     class Meta:
         verbose_name = "Доска"
         verbose_name_plural = "Доски"
+        indexes = [
+            models.Index(fields=["title"], condition=models.Q(is_deleted=False), name="board_active_title_idx"),
+        ]
 
     title = models.CharField(verbose_name="Название", max_length=255)
     is_deleted = models.BooleanField(verbose_name="Удалена", default=False)
+    # растёт при каждой записи в доску, её категории, цели, комментарии и участников (goals/versions.py)
+    version = models.PositiveBigIntegerField(verbose_name="Версия", default=0)
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Новой доске заводим счётчики; удалённая доска пропадает из кэша ролей всех её участников.
+        Версию save не перезаписывает - её меняет только bump_board_versions
+        """
+        from goals.versions import bump_board_versions
+
+        adding = self._state.adding
+        if not adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields if not field.primary_key and field.name != "version"
+            ]
+        super().save(*args, **kwargs)
+        if adding:
+            BoardCounters.objects.get_or_create(board_id=self.pk)
+        else:
+            bump_board_versions(self.pk)
+        if self.is_deleted:
+            from goals.roles import board_roles_cache
+            board_roles_cache.invalidate(*self.participants.values_list("user_id", flat=True))
 
 
 class BoardParticipant(DateModelMixin):
@@ -26,6 +54,9 @@ class BoardParticipant(DateModelMixin):
         unique_together = ("board", "user")
         verbose_name = "Участник"
         verbose_name_plural = "Участники"
+        indexes = [
+            models.Index(fields=["user", "board", "role"], name="participant_user_board_idx"),
+        ]
 
     class Role(models.IntegerChoices):
         owner = 1, "Владелец"
@@ -48,6 +79,31 @@ class BoardParticipant(DateModelMixin):
         verbose_name="Роль", choices=Role.choices, default=Role.owner
     )
 
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        from goals.counters import increment
+        from goals.roles import board_roles_cache
+        from goals.versions import bump_board_versions
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                increment(BoardCounters, self.board_id, participants=1)
+            bump_board_versions(self.board_id)
+            board_roles_cache.invalidate(self.user_id)
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Tuple[int, typing.Dict[str, int]]:
+        from goals.counters import increment
+        from goals.roles import board_roles_cache
+        from goals.versions import bump_board_versions
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            increment(BoardCounters, self.board_id, participants=-1)
+            bump_board_versions(self.board_id)
+            board_roles_cache.invalidate(self.user_id)
+        return result
+
 
 class GoalCategory(DateModelMixin):
     title = models.CharField(verbose_name="Название", max_length=255)
@@ -60,6 +116,20 @@ class GoalCategory(DateModelMixin):
     class Meta:
         verbose_name = "Категория"
         verbose_name_plural = "Категории"
+        indexes = [
+            models.Index(fields=["board", "title"], condition=models.Q(is_deleted=False),
+                         name="category_active_board_idx"),
+        ]
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        from goals.versions import bump_board_versions
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                CategoryCounters.objects.get_or_create(category_id=self.pk)
+            bump_board_versions(self.board_id)
 
 
 class Goal(DateModelMixin):
@@ -83,17 +153,172 @@ class Goal(DateModelMixin):
                                                 default=Priority.medium)
     status = models.PositiveSmallIntegerField(verbose_name="Статус", choices=Status.choices, default=Status.to_do)
     category = models.ForeignKey(GoalCategory, verbose_name="Категория", on_delete=models.CASCADE, related_name="goals")
+    board = models.ForeignKey(Board, verbose_name="Доска", on_delete=models.PROTECT, related_name="goals")
 
     class Meta:
         verbose_name = "Цель"
         verbose_name_plural = "Цели"
+        indexes = [
+            models.Index(fields=["category", "status"], name="goal_category_status_idx"),
+            models.Index(fields=["status", "due_date"], name="goal_status_due_date_idx"),
+            # 4 - Goal.Status.archived: списки целей всегда исключают архив
+            models.Index(fields=["category", "title"], condition=~models.Q(status=4),
+                         name="goal_active_category_title_idx"),
+            models.Index(fields=["board", "title"], condition=~models.Q(status=4),
+                         name="goal_active_board_title_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db: str, field_names: typing.List[str], values: typing.List[typing.Any]) -> "Goal":
+        """
+        Запоминаем категорию, доску и статус, с которыми цель учтена в счётчиках
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._counted = instance.get_counted_state()
+        return instance
+
+    def get_counted_state(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        state = tuple(self.__dict__.get(name) for name in ("category_id", "board_id", "status"))
+        return None if None in state else typing.cast(typing.Tuple[int, int, int], state)
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Доска цели берётся из её категории. При переносе цели в другую категорию
+        вслед за ней переезжают комментарии. Счётчики меняются в той же транзакции
+        """
+        from goals.counters import goal_changed, recount_boards, recount_categories
+        from goals.stats import invalidate_board_stats
+        from goals.versions import bump_board_versions
+
+        adding = self._state.adding
+        old = None if adding else getattr(self, "_counted", None)
+        self.board_id = self.category.board_id
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "category" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "board"}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            new = self.get_counted_state()
+            if adding:
+                goal_changed(None, new)
+            elif old is None:
+                recount_categories([self.category_id])
+                recount_boards([self.board_id])
+            else:
+                moved_comments = 0
+                if old[0] != self.category_id:
+                    moved_comments = GoalComment.objects.filter(goal=self).update(board_id=self.board_id)
+                goal_changed(old, new, comments=moved_comments)
+            bump_board_versions(self.board_id, *([old[1]] if old is not None else []))
+        self._counted = new
+
+        if old is not None and old[1] != self.board_id:
+            invalidate_board_stats(old[1])
+        invalidate_board_stats(self.board_id)
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Tuple[int, typing.Dict[str, int]]:
+        from goals.counters import goal_changed
+        from goals.stats import invalidate_board_stats
+        from goals.versions import bump_board_versions
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            goal_changed(self.get_counted_state(), None)
+            bump_board_versions(self.board_id)
+        invalidate_board_stats(self.board_id)
+        return result
 
 
 class GoalComment(DateModelMixin):
     class Meta:
         verbose_name = "Комментарий"
         verbose_name_plural = "Комментарии"
+        indexes = [
+            models.Index(fields=["goal", "created"], name="goalcomment_goal_created_idx"),
+            models.Index(fields=["board", "created"], name="goalcomment_board_created_idx"),
+        ]
 
     user = models.ForeignKey("core.User", verbose_name="Автор", on_delete=models.PROTECT)
     text = models.TextField(verbose_name="Текст")
     goal = models.ForeignKey(Goal, verbose_name="Цель", on_delete=models.PROTECT)
+    board = models.ForeignKey(Board, verbose_name="Доска", on_delete=models.PROTECT, related_name="comments",
+                              db_index=False)
+
+    @classmethod
+    def from_db(cls, db: str, field_names: typing.List[str], values: typing.List[typing.Any]) -> "GoalComment":
+        instance = super().from_db(db, field_names, values)
+        instance._counted_goal_id = instance.__dict__.get("goal_id")
+        return instance
+
+    def save(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        """
+        Доска комментария всегда совпадает с доской его цели.
+        Счётчики комментариев меняются в той же транзакции
+        """
+        from goals.counters import comment_changed
+        from goals.versions import bump_board_versions
+
+        adding = self._state.adding
+        old_goal_id = getattr(self, "_counted_goal_id", None)
+        self.board_id = self.goal.board_id
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "goal" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "board"}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            old_goal = None
+            if adding:
+                comment_changed(None, self.goal)
+            elif old_goal_id is not None and old_goal_id != self.goal_id:
+                old_goal = Goal.objects.only("category_id", "board_id").get(pk=old_goal_id)
+                comment_changed(old_goal, self.goal)
+            bump_board_versions(self.board_id, *([old_goal.board_id] if old_goal is not None else []))
+        self._counted_goal_id = self.goal_id
+
+    def delete(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Tuple[int, typing.Dict[str, int]]:
+        from goals.counters import comment_changed
+        from goals.versions import bump_board_versions
+
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            comment_changed(Goal.objects.only("category_id", "board_id").get(pk=self.goal_id), None)
+            bump_board_versions(self.board_id)
+        return result
+
+
+class GoalCounters(models.Model):
+    """
+    Счётчики целей по статусам и комментариев; поддерживаются при каждой записи (goals/counters.py),
+    пересчитываются командой recount_counters
+    """
+    goals_to_do = models.IntegerField(verbose_name="К выполнению", default=0)
+    goals_in_progress = models.IntegerField(verbose_name="В процессе", default=0)
+    goals_done = models.IntegerField(verbose_name="Выполнено", default=0)
+    goals_archived = models.IntegerField(verbose_name="В архиве", default=0)
+    comments = models.IntegerField(verbose_name="Комментарии", default=0)
+
+    class Meta:
+        abstract = True
+
+
+class CategoryCounters(GoalCounters):
+    category = models.OneToOneField(
+        GoalCategory, verbose_name="Категория", primary_key=True, on_delete=models.CASCADE, related_name="counters"
+    )
+
+    class Meta:
+        verbose_name = "Счётчики категории"
+        verbose_name_plural = "Счётчики категорий"
+
+
+class BoardCounters(GoalCounters):
+    board = models.OneToOneField(
+        Board, verbose_name="Доска", primary_key=True, on_delete=models.CASCADE, related_name="counters"
+    )
+    participants = models.IntegerField(verbose_name="Участники", default=0)
+
+    class Meta:
+        verbose_name = "Счётчики доски"
+        verbose_name_plural = "Счётчики досок"
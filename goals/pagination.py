@@ -0,0 +1,231 @@
+import base64
+import datetime
+import json
+import typing
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Пагинация по ключу (keyset/cursor) с запасным режимом limit/offset.
+
+    Режим включается параметром ?page_size= или ?cursor=. Страница выбирается
+    условием по кортежу (поле сортировки, id), поэтому глубокие страницы стоят
+    столько же, сколько первая, а вставки между запросами не сдвигают выдачу.
+    Без этих параметров работает обычный LimitOffsetPagination.
+    Поля сортировки должны быть NOT NULL.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    keyset = False
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request,
+                          view: typing.Optional[APIView] = None) -> typing.Optional[list]:
+        """
+        Выбираем режим пагинации и возвращаем страницу
+        """
+        self.keyset = self.is_keyset_request(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.display_page_controls = False
+        self.page_size = self.get_page_size(request)
+        self.with_count = self.get_with_count(request)
+        self.count = queryset.count() if self.with_count else None
+
+        ordering = self.get_ordering(queryset)
+        reverse, position = self.decode_cursor(request, ordering, queryset.model)
+
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(ordering, position, reverse))
+        queryset = queryset.order_by(*[
+            ("-" if descending != reverse else "") + name for name, descending in ordering
+        ])
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.first_position = self.get_position(rows[0], ordering) if rows else None
+        self.last_position = self.get_position(rows[-1], ordering) if rows else None
+        return rows
+
+    def get_paginated_response(self, data: typing.Any) -> Response:
+        """
+        Формируем ответ: count отдаём только если о нём не отказались (?count=false)
+        """
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.with_count:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["previous"] = self.get_previous_link()
+        response["results"] = data
+        return Response(response)
+
+    def get_next_link(self) -> typing.Optional[str]:
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or self.last_position is None:
+            return None
+        return self.build_link(reverse=False, position=self.last_position)
+
+    def get_previous_link(self) -> typing.Optional[str]:
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self.build_link(reverse=True, position=self.first_position)
+
+    def is_keyset_request(self, request: Request) -> bool:
+        """
+        Keyset-режим включается параметрами ?cursor= или ?page_size=
+        """
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_with_count(self, request: Request) -> bool:
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("0", "false", "no")
+
+    def get_ordering(self, queryset: QuerySet) -> typing.List[typing.Tuple[str, bool]]:
+        """
+        Достаём сортировку из queryset и дополняем её первичным ключом,
+        чтобы позиция в выдаче была однозначной
+        """
+        order_by = list(queryset.query.order_by)
+        if not order_by and queryset.query.default_ordering:
+            order_by = list(queryset.model._meta.ordering)
+
+        ordering = []
+        for item in order_by:
+            if not isinstance(item, str):
+                raise ImproperlyConfigured("KeysetPagination supports only field names in ordering")
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = queryset.model._meta.pk.name
+            if "__" in name:
+                raise ImproperlyConfigured(f"KeysetPagination can not order by related field {name}")
+            ordering.append((name, descending))
+
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in ordering]:
+            ordering.append((pk_name, ordering[-1][1] if ordering else False))
+        return ordering
+
+    def get_position(self, row: typing.Union[Model, dict], ordering: typing.List[typing.Tuple[str, bool]]) -> list:
+        """
+        Значения полей сортировки строки (модели или словаря из .values())
+        """
+        position = []
+        for name, _ in ordering:
+            if isinstance(row, dict):
+                value = row[name]
+            else:
+                try:
+                    value = getattr(row, row._meta.get_field(name).attname)
+                except FieldDoesNotExist:
+                    value = getattr(row, name)
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    @staticmethod
+    def get_position_filter(ordering: typing.List[typing.Tuple[str, bool]], position: list, reverse: bool) -> Q:
+        """
+        Раскрываем сравнение кортежей (a, b, id) > (x, y, z) в условия
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        """
+        conditions = []
+        for index, (name, descending) in enumerate(ordering):
+            lookup = "lt" if descending != reverse else "gt"
+            equal = {ordering[i][0]: position[i] for i in range(index)}
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": position[index]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def decode_cursor(self, request: Request, ordering: typing.List[typing.Tuple[str, bool]],
+                      model: typing.Type[Model]) -> typing.Tuple[bool, typing.Optional[list]]:
+        """
+        Курсор приходит от клиента: каждое значение позиции приводим к типу своего поля сортировки,
+        а всё, что не приводится, - тот же NotFound, что и для испорченного курсора
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            reverse, position = bool(data["r"]), data["p"]
+            if not isinstance(position, list) or len(position) != len(ordering):
+                raise ValueError("position does not match ordering")
+            position = [self.clean_position_value(model, name, value) for (name, _), value in zip(ordering, position)]
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    @staticmethod
+    def clean_position_value(model: typing.Type[Model], name: str, value: typing.Any) -> typing.Any:
+        if value is None or isinstance(value, (list, dict)):
+            raise ValueError(f"invalid cursor value for {name}")
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # аннотация: тип не известен, годится любое скалярное значение
+            return value
+        return field.to_python(value)
+
+    def encode_cursor(self, reverse: bool, position: list) -> str:
+        data = json.dumps({"r": int(reverse), "p": position}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+    def build_link(self, reverse: bool, position: list) -> str:
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "offset")
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(reverse, position))
+
+
+class AlwaysKeysetPagination(KeysetPagination):
+    """
+    Только keyset-режим: для списков, которые могут быть очень длинными
+    """
+    page_size = 50
+    max_page_size = 500
+
+    def is_keyset_request(self, request: Request) -> bool:
+        return True
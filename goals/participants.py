@@ -0,0 +1,34 @@
+import typing
+
+from django.db import transaction
+from django.utils import timezone
+
+from goals.counters import increment
+from goals.models import Board, BoardCounters, BoardParticipant
+from goals.roles import board_roles_cache
+from goals.versions import bump_board_versions
+
+
+def apply_participant_changes(board: Board, create: typing.List[BoardParticipant],
+                              update: typing.List[BoardParticipant],
+                              delete: typing.List[BoardParticipant]) -> None:
+    """
+    Применяем изменения участников доски одним DELETE, одним bulk_update и одним bulk_create;
+    счётчик участников, версию доски и кэш ролей сдвигаем один раз на всю пачку
+    """
+    now = timezone.now()
+    for participant in update:
+        participant.updated = now
+
+    with transaction.atomic():
+        if delete:
+            BoardParticipant.objects.filter(pk__in=[participant.pk for participant in delete]).delete()
+        if update:
+            BoardParticipant.objects.bulk_update(update, fields=["role", "updated"])
+        if create:
+            BoardParticipant.objects.bulk_create(create)
+        if create or delete:
+            increment(BoardCounters, board.pk, participants=len(create) - len(delete))
+        if create or update or delete:
+            bump_board_versions(board.pk)
+        board_roles_cache.invalidate(*[participant.user_id for participant in (*create, *update, *delete)])
@@ -1,11 +1,13 @@
 import typing
-from typing import Union
 
 from django.http import HttpRequest
 from rest_framework import permissions
 from rest_framework.generics import GenericAPIView
 
 from goals.models import BoardParticipant
+from goals.roles import get_object_role
+
+WRITER_ROLES = (BoardParticipant.Role.owner, BoardParticipant.Role.writer)
 
 
 class BoardPermissions(permissions.BasePermission):
@@ -17,13 +19,10 @@ class BoardPermissions(permissions.BasePermission):
     def has_object_permission(self, request: HttpRequest, view: GenericAPIView, obj: typing.Any) -> bool:
         if not request.user.is_authenticated:
             return False
+        role = get_object_role(request, obj, obj.pk)
         if request.method in permissions.SAFE_METHODS:
-            return BoardParticipant.objects.filter(
-                user=request.user, board=obj
-            ).exists()
-        return BoardParticipant.objects.filter(
-            user=request.user, board=obj, role=BoardParticipant.Role.owner
-        ).exists()
+            return role is not None
+        return role == BoardParticipant.Role.owner
 
 
 class CategoryPermissions(permissions.BasePermission):
@@ -33,10 +32,7 @@ class CategoryPermissions(permissions.BasePermission):
     """
     def has_object_permission(self, request: HttpRequest, view: GenericAPIView, obj: typing.Any) -> bool:
         if request.method not in permissions.SAFE_METHODS:
-            return BoardParticipant.objects.filter(
-                user=request.user, board=obj.board,
-                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer]
-            ).exists()
+            return get_object_role(request, obj, obj.board_id) in WRITER_ROLES
         return True
 
 
@@ -47,10 +43,7 @@ class GoalPermissions(permissions.BasePermission):
     """
     def has_object_permission(self, request: HttpRequest, view: GenericAPIView, obj: typing.Any) -> bool:
         if request.method not in permissions.SAFE_METHODS:
-            return BoardParticipant.objects.filter(
-                user=request.user, board=obj.category.board,
-                role__in=[BoardParticipant.Role.owner, BoardParticipant.Role.writer]
-            ).exists()
+            return get_object_role(request, obj, obj.board_id) in WRITER_ROLES
         return True
 
 
@@ -61,9 +54,7 @@ class CommentPermissions(permissions.BasePermission):
     """
     def has_object_permission(self, request: HttpRequest, view: GenericAPIView, obj: typing.Any) -> bool:
         if request.method not in permissions.SAFE_METHODS:
-            return BoardParticipant.objects.filter(
-                user=request.user, board=obj.goal.category.board,
-            ).exists()
-        if obj.user != request.user:
+            return get_object_role(request, obj, obj.board_id) is not None
+        if obj.user_id != request.user.pk:
             return False
         return True
@@ -0,0 +1,42 @@
+import types
+import typing
+
+from rest_framework.renderers import JSONRenderer
+
+orjson: typing.Optional[types.ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def has_floats(data: typing.Any) -> bool:
+    """
+    Есть ли в данных float: orjson и json записывают их по-разному (1e16 и 1e+16, NaN превращается в null)
+    """
+    if isinstance(data, float):
+        return True
+    if isinstance(data, dict):
+        return any(has_floats(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_floats(value) for value in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON через orjson, если он установлен; вывод байт в байт совпадает с JSONRenderer
+    (компактный, без экранирования не-ASCII, с экранированными U+2028/U+2029).
+    Без orjson, с отступами, с float или на данных, которые orjson не умеет, работает обычный JSONRenderer
+    """
+    def render(self, data: typing.Any, accepted_media_type: typing.Optional[str] = None,
+               renderer_context: typing.Optional[typing.Dict[str, typing.Any]] = None) -> bytes:
+        if (orjson is None or data is None or self.get_indent(accepted_media_type or "", renderer_context or {})
+                or has_floats(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # как и JSONRenderer: эти символы допустимы в JSON, но не в JavaScript
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -0,0 +1,57 @@
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from goals.versions import BoardVersionETagMixin
+
+RESPONSE_CACHE_KEY = "goals:response:{version_hash}"
+STATS_CACHE_KEY = "goals:response_cache:{name}"
+
+
+def count(name: str) -> None:
+    """
+    Счётчик попаданий/промахов в общем кэше, чтобы его видели все процессы
+    """
+    key = STATS_CACHE_KEY.format(name=name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ключ успели вытеснить между add и incr
+        cache.add(key, 1, timeout=None)
+
+
+def get_response_cache_stats() -> typing.Dict[str, int]:
+    names = ("hits", "misses")
+    values = cache.get_many([STATS_CACHE_KEY.format(name=name) for name in names])
+    return {name: values.get(STATS_CACHE_KEY.format(name=name), 0) for name in names}
+
+
+class VersionedResponseCacheMixin(BoardVersionETagMixin):
+    """
+    Кэш ответов списков по ключу из пользователя, адреса запроса и версий его досок.
+    Запись в доску меняет её версию, а значит и ключ - старые ответы просто перестают читаться
+    и истекают по таймауту, сканировать и удалять ключи не нужно
+    """
+    def get_versioned_response(self, version_hash: str, request: HttpRequest,
+                               *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        timeout = settings.GOALS_RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_versioned_response(version_hash, request, *args, **kwargs)
+
+        key = RESPONSE_CACHE_KEY.format(version_hash=version_hash)
+        data = cache.get(key)
+        if data is not None:
+            count("hits")
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        count("misses")
+        response = super().get_versioned_response(version_hash, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=timeout)
+        response["X-Cache"] = "MISS"
+        return response
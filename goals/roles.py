@@ -0,0 +1,113 @@
+import threading
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F, OuterRef, QuerySet, Subquery
+from django.http import HttpRequest
+
+from core.models import User
+from goals.models import BoardParticipant
+
+RoleMap = typing.Dict[int, int]
+
+
+class BoardRoleCache:
+    """
+    Ограниченный LRU-кэш ролей внутри процесса: user_id -> {board_id: role}.
+    Каждая запись помечена версией ролей пользователя (User.board_roles_version). Версия лежит в БД
+    и растёт вместе с изменением участников, а строка пользователя и так читается в каждом запросе -
+    поэтому записи устаревают во всех процессах без лишних запросов
+    """
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[int, typing.Tuple[int, RoleMap]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, version: int) -> typing.Optional[RoleMap]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._data.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id: int, version: int, roles: RoleMap) -> None:
+        with self._lock:
+            self._data[user_id] = (version, roles)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *user_ids: int) -> None:
+        """
+        Сдвигаем версии ролей пользователей в БД (в текущей транзакции, если она есть)
+        и сразу выбрасываем их записи в этом процессе
+        """
+        if not user_ids:
+            return
+        User.objects.filter(pk__in=set(user_ids)).update(board_roles_version=F("board_roles_version") + 1)
+        with self._lock:
+            for user_id in user_ids:
+                self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+board_roles_cache = BoardRoleCache(maxsize=settings.BOARD_ROLES_CACHE_SIZE)
+
+
+def get_board_roles(request: HttpRequest) -> RoleMap:
+    """
+    Роли пользователя на всех его неудалённых досках.
+    Загружаются одним запросом и живут весь запрос, а между запросами - в LRU
+    """
+    roles = getattr(request, "_board_roles", None)
+    if roles is not None:
+        return roles
+
+    user_id, version = request.user.pk, request.user.board_roles_version
+    roles = board_roles_cache.get(user_id, version)
+    if roles is None:
+        roles = dict(
+            BoardParticipant.objects.filter(user_id=user_id, board__is_deleted=False)
+            .values_list("board_id", "role")
+        )
+        board_roles_cache.set(user_id, version, roles)
+    request._board_roles = roles
+    return roles
+
+
+def get_board_role(request: HttpRequest, board_id: int) -> typing.Optional[int]:
+    """
+    Роль пользователя на доске или None, если он не участник
+    """
+    return get_board_roles(request).get(board_id)
+
+
+def get_writable_board_ids(request: HttpRequest) -> typing.List[int]:
+    """
+    Доски, на которых пользователь может редактировать категории и цели
+    """
+    writer_roles = (BoardParticipant.Role.owner, BoardParticipant.Role.writer)
+    return [board_id for board_id, role in get_board_roles(request).items() if role in writer_roles]
+
+
+def get_object_role(request: HttpRequest, obj: typing.Any, board_id: int) -> typing.Optional[int]:
+    """
+    Роль берём из аннотации user_role (см. annotate_role), если объект загружен с ней
+    """
+    if hasattr(obj, "user_role"):
+        return obj.user_role
+    return get_board_role(request, board_id)
+
+
+def annotate_role(queryset: QuerySet, user_id: int, board_field: str = "board") -> QuerySet:
+    """
+    Добавляем к объектам роль пользователя на их доске подзапросом в том же SELECT
+    и оставляем только объекты досок, где он участник
+    """
+    role = BoardParticipant.objects.filter(board=OuterRef(board_field), user_id=user_id).values("role")[:1]
+    return queryset.annotate(user_role=Subquery(role)).filter(user_role__isnull=False)
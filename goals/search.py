@@ -0,0 +1,148 @@
+import functools
+import operator
+import typing
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.http import HttpRequest
+from rest_framework import filters
+from rest_framework.views import APIView
+
+
+class SearchIndex(typing.NamedTuple):
+    """
+    Поля модели, попавшие в полнотекстовый индекс (см. миграцию 0017_full_text_search и restore_sqlite_fts_triggers),
+    и их веса при ранжировании на SQLite
+    """
+    columns: typing.Tuple[str, ...]
+    weights: typing.Tuple[float, ...]
+
+
+SEARCH_INDEXES = {
+    "goals.Goal": SearchIndex(columns=("title", "description"), weights=(10.0, 1.0)),
+    "goals.GoalComment": SearchIndex(columns=("text",), weights=(1.0,)),
+}
+
+POSTGRES_TS_CONFIG = "russian"
+
+
+def sqlite_fts_triggers(table: str, columns: typing.Sequence[str]) -> typing.Dict[str, str]:
+    """
+    Триггеры, которыми миграция 0017 поддерживает теневую таблицу FTS5 в актуальном состоянии
+    """
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return {
+        f"{fts}_ai": f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                     f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"{fts}_ad": f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"{fts}_au": f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+                     f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    }
+
+
+def restore_sqlite_fts_triggers(using: str = DEFAULT_DB_ALIAS) -> typing.List[str]:
+    """
+    Пересоздание таблицы схемой Django (AlterField и т.п. на SQLite) молча удаляет триггеры FTS.
+    Создаём недостающие заново и перестраиваем индекс, раз он мог отстать; возвращаем имена восстановленных
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    restored: typing.List[str] = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = set(cursor.fetchall())
+        for label, index in SEARCH_INDEXES.items():
+            table = apps.get_model(label)._meta.db_table
+            if ("table", f"{table}_fts") not in existing:
+                # миграция 0017 ещё не применена
+                continue
+            missing = {
+                name: sql for name, sql in sqlite_fts_triggers(table, index.columns).items()
+                if ("trigger", name) not in existing
+            }
+            for sql in missing.values():
+                cursor.execute(sql)
+            if missing:
+                cursor.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+                restored.extend(missing)
+    return restored
+
+
+def postgres_search(queryset: QuerySet, query: str, index: SearchIndex) -> QuerySet:
+    """
+    Поиск по колонке search_vector с GIN-индексом, ранжирование ts_rank
+    """
+    table = queryset.model._meta.db_table
+    tsquery = f"websearch_to_tsquery('{POSTGRES_TS_CONFIG}', %s)"
+    return queryset.filter(
+        RawSQL(f'"{table}"."search_vector" @@ {tsquery}', (query,), output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(f'ts_rank("{table}"."search_vector", {tsquery})', (query,), output_field=FloatField())
+    )
+
+
+def sqlite_search(queryset: QuerySet, query: str, index: SearchIndex) -> QuerySet:
+    """
+    Поиск по теневой таблице FTS5, ранжирование bm25 (чем меньше, тем лучше - поэтому со знаком минус)
+    """
+    table = queryset.model._meta.db_table
+    fts = f"{table}_fts"
+    match = " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+    weights = ", ".join(str(weight) for weight in index.weights)
+    return queryset.filter(
+        RawSQL(f'"{table}"."id" IN (SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s)', (match,),
+               output_field=BooleanField())
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT -bm25("{fts}", {weights}) FROM "{fts}" WHERE "{fts}" MATCH %s AND "{fts}".rowid = "{table}"."id"',
+            (match,), output_field=FloatField(),
+        )
+    )
+
+
+def icontains_search(queryset: QuerySet, query: str, index: SearchIndex) -> QuerySet:
+    """
+    Запасной вариант для остальных БД: каждое слово должно встретиться хотя бы в одном поле
+    """
+    for term in query.split():
+        queryset = queryset.filter(
+            functools.reduce(operator.or_, [Q(**{f"{column}__icontains": term}) for column in index.columns])
+        )
+    return queryset
+
+
+SEARCH_BACKENDS = {
+    "postgresql": postgres_search,
+    "sqlite": sqlite_search,
+}
+
+
+def search(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Полнотекстовый поиск по queryset. Найденное ранжируется (search_rank),
+    исходная сортировка остаётся вторичной
+    """
+    index = SEARCH_INDEXES[queryset.model._meta.label]
+    backend = SEARCH_BACKENDS.get(connections[queryset.db].vendor)
+    if backend is None:
+        return icontains_search(queryset, query, index)
+    return backend(queryset, query, index).order_by("-search_rank", *queryset.query.order_by)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Параметр ?search= через полнотекстовый индекс вместо ILIKE '%q%'
+    """
+    def filter_queryset(self, request: HttpRequest, queryset: QuerySet, view: APIView) -> QuerySet:
+        query = " ".join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        return search(queryset, query)
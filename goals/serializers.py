@@ -1,11 +1,18 @@
 import typing
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, Expression, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 
 from core.models import User
 from core.serializers import ProfileSerializer
-from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.filters import GoalDateFilter
+from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant, BoardCounters, CategoryCounters
+from goals.participants import apply_participant_changes
+from goals.sparse import Include, SparseFieldsSerializerMixin
 
 
 class BoardCreateSerializer(serializers.ModelSerializer):
@@ -14,7 +21,7 @@ class BoardCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Board
         read_only_fields = ("id", "created", "updated")
-        fields = "__all__"
+        exclude = ("version",)
 
     def create(self, validated_data: typing.Any) -> Board:
         """
@@ -28,11 +35,56 @@ class BoardCreateSerializer(serializers.ModelSerializer):
         return board
 
 
+class ParticipantUserField(serializers.SlugRelatedField):
+    """
+    Участник по username. При записи списка участников пользователи уже загружены
+    одним запросом в context["participant_users"] (см. load_participant_users)
+    """
+    def to_internal_value(self, data: typing.Any) -> User:
+        users = self.context.get("participant_users")
+        if users is None:
+            return super().to_internal_value(data)
+        user = users.get(str(data))
+        if user is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=smart_str(data))
+        return user
+
+
+def load_participant_users(context: typing.Dict[str, typing.Any], usernames: typing.Iterable[typing.Any]) -> None:
+    """
+    Догружаем одним запросом пользователей, которых ещё нет в context["participant_users"]
+    """
+    users = context.setdefault("participant_users", {})
+    missing = {str(username) for username in usernames} - set(users)
+    if missing:
+        users.update(User.objects.in_bulk(missing, field_name="username"))
+
+
+class BoardParticipantListSerializer(serializers.ListSerializer):
+    def get_attribute(self, instance: typing.Any) -> typing.Any:
+        """
+        Участников большой доски не встраиваем (null) - их постранично отдаёт goals/board/<pk>/participants
+        """
+        if isinstance(instance, Board) and instance.counters.participants > settings.BOARD_PARTICIPANTS_EMBED_LIMIT:
+            return None
+        return super().get_attribute(instance)
+
+    def to_internal_value(self, data: typing.Any) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+        Все username списка разрешаем одним запросом до валидации элементов
+        """
+        if isinstance(data, list):
+            load_participant_users(
+                self.context, [item["user"] for item in data if isinstance(item, dict) and "user" in item]
+            )
+        return super().to_internal_value(data)
+
+
 class BoardParticipantSerializer(serializers.ModelSerializer):
     role = serializers.ChoiceField(
         required=True, choices=BoardParticipant.Role.choices
     )
-    user = serializers.SlugRelatedField(
+    user = ParticipantUserField(
         slug_field="username", queryset=User.objects.all()
     )
 
@@ -40,73 +92,184 @@ class BoardParticipantSerializer(serializers.ModelSerializer):
         model = BoardParticipant
         fields = "__all__"
         read_only_fields = ("id", "created", "updated", "board")
+        list_serializer_class = BoardParticipantListSerializer
+
+
+class BoardParticipantBulkSerializer(serializers.Serializer):
+    """
+    Пакет изменений участников: добавить, сменить роль, удалить
+    """
+    add = BoardParticipantSerializer(many=True, required=False)
+    update = BoardParticipantSerializer(many=True, required=False)
+    remove = serializers.ListField(
+        child=ParticipantUserField(slug_field="username", queryset=User.objects.all()), required=False
+    )
+    max_items = 1000
+
+    def to_internal_value(self, data: typing.Any) -> typing.Dict[str, typing.Any]:
+        """
+        Пользователей всех трёх списков загружаем одним запросом
+        """
+        if isinstance(data, dict):
+            usernames = []
+            for name in ("add", "update"):
+                if isinstance(data.get(name), list):
+                    usernames += [item["user"] for item in data[name] if isinstance(item, dict) and "user" in item]
+            if isinstance(data.get("remove"), list):
+                usernames += [username for username in data["remove"] if isinstance(username, (str, int))]
+            load_participant_users(self.context, usernames)
+        return super().to_internal_value(data)
+
+    def validate(self, attrs: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        users = [
+            *(item["user"] for item in attrs.get("add", [])),
+            *(item["user"] for item in attrs.get("update", [])),
+            *attrs.get("remove", []),
+        ]
+        if len(users) > self.max_items:
+            raise serializers.ValidationError(f"Ensure there are no more than {self.max_items} changes")
+        if len({user.pk for user in users}) != len(users):
+            raise serializers.ValidationError("Each user can appear only once")
+        return attrs
+
+
+class ParticipantCandidateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ("id", "username", "first_name", "last_name")
 
 
 class BoardSerializer(serializers.ModelSerializer):
-    participants = BoardParticipantSerializer(many=True)
+    participants = BoardParticipantSerializer(many=True, required=False)
+    participants_count = serializers.IntegerField(source="counters.participants", read_only=True)
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
     class Meta:
         model = Board
-        fields = "__all__"
+        exclude = ("version",)
         read_only_fields = ("id", "created", "updated")
 
+    def to_representation(self, instance: Board) -> typing.Dict[str, typing.Any]:
+        """
+        После обновления DRF сбрасывает prefetch участников - подгружаем их с пользователями одним запросом,
+        если доска не слишком большая, чтобы их встраивать
+        """
+        if "participants" not in getattr(instance, "_prefetched_objects_cache", {}) \
+                and instance.counters.participants <= settings.BOARD_PARTICIPANTS_EMBED_LIMIT:
+            prefetch_related_objects(
+                [instance], Prefetch("participants", queryset=BoardParticipant.objects.select_related("user"))
+            )
+        return super().to_representation(instance)
+
     def update(self, instance: Board, validated_data: typing.Any) -> Board:
         """
-        Обновляем участников и сохраняем в бд
+        Обновляем участников (если они переданы) и сохраняем в бд
         """
         owner = validated_data.pop("user")
-        new_participants = validated_data.pop("participants")
-        new_by_id = {part["user"].id: part for part in new_participants}
-
-        old_participants = instance.participants.exclude(user=owner)
+        new_participants = validated_data.pop("participants", None)
         with transaction.atomic():
-            for old_participant in old_participants:
-                if old_participant.user_id not in new_by_id:
-                    old_participant.delete()
-                else:
-                    if (
-                            old_participant.role
-                            != new_by_id[old_participant.user_id]["role"]
-                    ):
-                        old_participant.role = new_by_id[old_participant.user_id][
-                            "role"
-                        ]
-                        old_participant.save()
-                    new_by_id.pop(old_participant.user_id)
-            for new_part in new_by_id.values():
-                BoardParticipant.objects.create(
-                    board=instance, user=new_part["user"], role=new_part["role"]
-                )
-
-            instance.title = validated_data["title"]
+            if new_participants is not None:
+                self.sync_participants(instance, owner, new_participants)
+            instance.title = validated_data.get("title", instance.title)
             instance.save()
 
         return instance
 
+    @staticmethod
+    def sync_participants(
+        board: Board, owner: User, new_participants: typing.List[typing.Dict[str, typing.Any]]
+    ) -> None:
+        """
+        Разница между текущими и новыми участниками считается в памяти и применяется
+        одним DELETE, одним bulk_update и одним bulk_create. Себя (владельца) не трогаем
+        """
+        new_by_id = {part["user"].id: part for part in new_participants if part["user"].id != owner.id}
+        old_by_id = {participant.user_id: participant for participant in board.participants.exclude(user=owner)}
+
+        to_delete = [participant for user_id, participant in old_by_id.items() if user_id not in new_by_id]
+        to_update = []
+        for user_id, participant in old_by_id.items():
+            if user_id in new_by_id and participant.role != new_by_id[user_id]["role"]:
+                participant.role = new_by_id[user_id]["role"]
+                to_update.append(participant)
+        to_create = [
+            BoardParticipant(board=board, user=part["user"], role=part["role"])
+            for user_id, part in new_by_id.items() if user_id not in old_by_id
+        ]
+        apply_participant_changes(board, to_create, to_update, to_delete)
+
+
+class BoardCountersSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BoardCounters
+        exclude = ("board",)
+
+
+class CategoryCountersSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryCounters
+        exclude = ("category",)
+
 
 class BoardListSerializer(serializers.ModelSerializer):
+    counters = BoardCountersSerializer(read_only=True)
+
     class Meta:
         model = Board
-        fields = "__all__"
+        exclude = ("version",)
 
 
 class GoalCategoryCreateSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
+    def validate_board(self, value: Board) -> Board:
+        if value.is_deleted:
+            raise serializers.ValidationError("not allowed in deleted board")
+        return value
+
     class Meta:
         model = GoalCategory
         read_only_fields = ("id", "created", "updated", "user")
         fields = "__all__"
 
 
-class GoalCategorySerializer(serializers.ModelSerializer):
+class BoardBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Board
+        fields = ("id", "title")
+
+
+class GoalCategoryBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoalCategory
+        fields = ("id", "title", "board")
+
+
+class GoalBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Goal
+        fields = ("id", "title", "status")
+
+
+def comment_count() -> Expression:
+    """
+    Число комментариев цели подзапросом, без GROUP BY по всему списку
+    """
+    comments = GoalComment.objects.filter(goal=OuterRef("pk")).order_by().values("goal").annotate(total=Count("id"))
+    return Coalesce(Subquery(comments.values("total")), 0)
+
+
+class GoalCategorySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user = ProfileSerializer(read_only=True)
+    counters = CategoryCountersSerializer(read_only=True)
 
     class Meta:
         model = GoalCategory
         fields = "__all__"
         read_only_fields = ("id", "created", "updated", "user", "board")
+        includes = {
+            "board": Include(lambda: BoardBriefSerializer(read_only=True), select_related="board"),
+        }
 
 
 class GoalCreateSerializer(serializers.ModelSerializer):
@@ -116,7 +279,7 @@ class GoalCreateSerializer(serializers.ModelSerializer):
         """
         Проверки валидации
         """
-        if value.is_deleted:
+        if value.is_deleted or value.board.is_deleted:
             raise serializers.ValidationError("not allowed in deleted category")
 
         if value.user != self.context["request"].user:
@@ -127,31 +290,128 @@ class GoalCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Goal
         read_only_fields = ("id", "created", "updated", "user")
-        fields = "__all__"
+        exclude = ("board",)
 
 
-class GoalSerializer(serializers.ModelSerializer):
+class GoalSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user = ProfileSerializer(read_only=True)
 
     class Meta:
         model = Goal
-        fields = "__all__"
+        exclude = ("board",)
         read_only_fields = ("id", "created", "updated", "user")
+        includes = {
+            "category": Include(lambda: GoalCategoryBriefSerializer(read_only=True), select_related="category"),
+            "comment_count": Include(lambda: serializers.IntegerField(read_only=True), annotation=comment_count),
+        }
 
 
 class GoalCommentCreateSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
+    def validate_goal(self, value: Goal) -> Goal:
+        if value.board.is_deleted:
+            raise serializers.ValidationError("not allowed in deleted board")
+        return value
+
     class Meta:
         model = GoalComment
         read_only_fields = ("id", "created", "updated", "user")
-        fields = "__all__"
+        exclude = ("board",)
 
 
-class GoalCommentSerializer(serializers.ModelSerializer):
+class GoalCommentSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     user = ProfileSerializer(read_only=True)
 
     class Meta:
         model = GoalComment
         read_only_fields = ("id", "created", "updated", "user")
-        fields = "__all__"
+        exclude = ("board",)
+        includes = {
+            "goal": Include(lambda: GoalBriefSerializer(read_only=True), select_related="goal"),
+        }
+
+
+class BulkCategoryField(serializers.Field):
+    """
+    Категория из заранее загруженного словаря context["categories"]:
+    в пакетных операциях категории читаются одним запросом на всю пачку
+    """
+    default_error_messages = {
+        "does_not_exist": 'Invalid pk "{pk_value}" - object does not exist.',
+        "incorrect_type": "Incorrect type. Expected pk value, received {data_type}.",
+    }
+
+    def to_internal_value(self, data: typing.Any) -> GoalCategory:
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        category = self.context["categories"].get(pk)
+        if category is None:
+            self.fail("does_not_exist", pk_value=pk)
+        return category
+
+    def to_representation(self, value: GoalCategory) -> int:
+        return value.pk
+
+
+class GoalBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Элемент пакетного создания/обновления целей (goals/goal/bulk).
+    Элемент с id - частичное обновление, без id - создание
+    """
+    id = serializers.IntegerField(required=False)
+    category = BulkCategoryField()
+
+    class Meta:
+        model = Goal
+        fields = ("id", "title", "description", "due_date", "priority", "status", "category")
+
+    def validate_category(self, value: GoalCategory) -> GoalCategory:
+        """
+        Доступ к категории проверен заранее, один раз на каждую категорию пачки
+        """
+        error = self.context["category_errors"].get(value.pk)
+        if error:
+            raise serializers.ValidationError(error)
+        return value
+
+    def validate(self, attrs: typing.Any) -> typing.Any:
+        """
+        Создавать цели, как и в GoalCreateSerializer, можно только в своей категории
+        """
+        if self.instance is None and attrs["category"].user_id != self.context["request"].user.pk:
+            raise serializers.ValidationError({"category": "not owner of category"})
+        attrs.pop("id", None)
+        return attrs
+
+
+class GoalBatchStatusSerializer(serializers.Serializer):
+    """
+    Массовая смена статуса и/или приоритета целей: по списку id или по фильтру GoalDateFilter
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False,
+                                max_length=10_000)
+    filter = serializers.DictField(required=False)
+    status = serializers.ChoiceField(choices=Goal.Status.choices, required=False)
+    priority = serializers.ChoiceField(choices=Goal.Priority.choices, required=False)
+
+    def validate(self, attrs: typing.Any) -> typing.Any:
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Exactly one of ids or filter is required")
+        if "status" not in attrs and "priority" not in attrs:
+            raise serializers.ValidationError("Nothing to change: status or priority is required")
+        return attrs
+
+    def validate_filter(self, value: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        """
+        Пустой фильтр или опечатка в ключе (django-filter молча пропускает незнакомые ключи)
+        задели бы все цели на всех наших досках
+        """
+        if not value:
+            raise serializers.ValidationError("Filter must not be empty")
+        unknown = sorted(set(value) - set(GoalDateFilter.get_filters()))
+        if unknown:
+            raise serializers.ValidationError(f"Unknown filter keys: {', '.join(unknown)}")
+        return value
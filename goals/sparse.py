@@ -0,0 +1,126 @@
+import typing
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Expression, QuerySet
+from django.http import HttpRequest
+from rest_framework import serializers
+from rest_framework.generics import GenericAPIView
+
+
+class Include(typing.NamedTuple):
+    """
+    Поле, которое добавляется в ответ только по ?include=<name>: фабрика поля сериализатора
+    и то, что нужно queryset, чтобы не было N+1 - JOIN (select_related) или аннотация
+    """
+    field: typing.Callable[[], serializers.Field]
+    select_related: typing.Optional[str] = None
+    annotation: typing.Optional[typing.Callable[[], Expression]] = None
+
+
+class Sparse(typing.NamedTuple):
+    fields: typing.Optional[typing.Set[str]]
+    include: typing.Set[str]
+
+
+def parse_list(request: HttpRequest, name: str) -> typing.Optional[typing.Set[str]]:
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+class SparseFieldsSerializerMixin(serializers.Serializer):
+    """
+    Сериализатор с разреженным набором полей: context["sparse"] оставляет поля из ?fields=
+    и добавляет поля из ?include= (описаны в Meta.includes)
+    """
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        super().__init__(*args, **kwargs)
+        sparse = self.context.get("sparse")
+        if sparse is None:
+            return
+        for name in sparse.include:
+            self.fields[name] = self.Meta.includes[name].field()
+        if sparse.fields is not None:
+            for name in set(self.fields) - sparse.fields - sparse.include:
+                self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin(GenericAPIView):
+    """
+    ?fields=id,title оставляет в ответе только эти поля и читает из БД только их колонки (.only()),
+    ?include=... добавляет связанные данные с нужным JOIN или аннотацией.
+    Работает для чтения (GET); колонки из sparse_required_fields и сортировки читаются всегда
+    """
+    sparse_required_fields = ("board", "user")
+
+    def get_sparse(self) -> typing.Optional[Sparse]:
+        if self.request.method != "GET":
+            return None
+        fields = parse_list(self.request, "fields")
+        include = parse_list(self.request, "include") or set()
+        if fields is None and not include:
+            return None
+
+        serializer_class = self.get_serializer_class()
+        includes = getattr(serializer_class.Meta, "includes", {})
+        errors = {}
+        unknown_include = include - set(includes)
+        if unknown_include:
+            errors["include"] = [f"Unknown includes: {', '.join(sorted(unknown_include))}"]
+        if fields is not None:
+            unknown_fields = fields - set(serializer_class().fields) - set(includes)
+            if unknown_fields:
+                errors["fields"] = [f"Unknown fields: {', '.join(sorted(unknown_fields))}"]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return Sparse(fields=fields, include=include)
+
+    def initial(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> None:
+        super().initial(request, *args, **kwargs)
+        self.sparse = self.get_sparse()
+
+    def get_serializer_context(self) -> typing.Dict[str, typing.Any]:
+        return {**super().get_serializer_context(), "sparse": getattr(self, "sparse", None)}
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """
+        После фильтров и сортировки: добавляем JOIN и аннотации для include
+        и оставляем в SELECT только колонки выбранных полей
+        """
+        queryset = super().filter_queryset(queryset)
+        sparse = getattr(self, "sparse", None)
+        if sparse is None:
+            return queryset
+
+        serializer = self.get_serializer()
+        includes = serializer.Meta.includes if sparse.include else {}
+        for name in sparse.include:
+            if includes[name].annotation is not None:
+                queryset = queryset.annotate(**{name: includes[name].annotation()})
+        if sparse.fields is None:
+            related = [includes[name].select_related for name in sparse.include if includes[name].select_related]
+            return queryset.select_related(*related) if related else queryset
+
+        model = queryset.model
+        columns, related = {"pk", *self.sparse_required_fields}, []
+        for item in queryset.query.order_by:
+            name = item.lstrip("-")
+            if name not in queryset.query.annotations:
+                columns.add(name)
+        for name, field in serializer.fields.items():
+            source = field.source
+            if isinstance(field, serializers.BaseSerializer):
+                related.append(source)
+                columns.update(f"{source}__{child.source}" for child in field.fields.values())
+                continue
+            try:
+                model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue
+            columns.add(source)
+        queryset = queryset.select_related(None)
+        # select_related() без аргументов подтянул бы все связи
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
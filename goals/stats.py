@@ -0,0 +1,86 @@
+import datetime
+import typing
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from goals.models import Goal
+
+STATS_CACHE_KEY = "goals:board_stats:{board_id}"
+# просрочка зависит от текущего времени, поэтому кэш живёт недолго даже без записей
+STATS_CACHE_TIMEOUT = 60
+OPEN_STATUSES = (Goal.Status.to_do, Goal.Status.in_progress)
+
+
+def empty_stats() -> typing.Dict[str, typing.Any]:
+    return {
+        "total": 0,
+        "by_status": {value: 0 for value in Goal.Status.values if value != Goal.Status.archived},
+        "by_priority": {value: 0 for value in Goal.Priority.values},
+        "overdue": 0,
+        "due_this_week": 0,
+    }
+
+
+def compute_board_stats(board_id: int, now: typing.Optional[datetime.datetime] = None) -> typing.Dict[str, typing.Any]:
+    """
+    Сводка по доске одним сгруппированным запросом: по категориям - количество целей
+    по статусам и приоритетам, просроченные и со сроком на этой неделе (среди открытых)
+    """
+    now = now or timezone.now()
+    week_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start -= datetime.timedelta(days=week_start.weekday())
+    week_end = week_start + datetime.timedelta(days=7)
+
+    rows = (
+        Goal.objects.filter(board_id=board_id)
+        .exclude(status=Goal.Status.archived)
+        .values("category_id", "status", "priority")
+        .annotate(
+            total=Count("id"),
+            overdue=Count("id", filter=Q(status__in=OPEN_STATUSES, due_date__lt=now)),
+            due_this_week=Count(
+                "id", filter=Q(status__in=OPEN_STATUSES, due_date__gte=week_start, due_date__lt=week_end)
+            ),
+        )
+        .order_by()
+    )
+
+    total = empty_stats()
+    categories: typing.Dict[int, typing.Dict[str, typing.Any]] = {}
+    for row in rows:
+        for stats in (total, categories.setdefault(row["category_id"], empty_stats())):
+            stats["total"] += row["total"]
+            stats["by_status"][row["status"]] += row["total"]
+            stats["by_priority"][row["priority"]] += row["total"]
+            stats["overdue"] += row["overdue"]
+            stats["due_this_week"] += row["due_this_week"]
+
+    return {
+        "board": board_id,
+        "total": total,
+        "categories": [{"category": category_id, **stats} for category_id, stats in sorted(categories.items())],
+    }
+
+
+def get_board_stats(board_id: int) -> typing.Dict[str, typing.Any]:
+    key = STATS_CACHE_KEY.format(board_id=board_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_board_stats(board_id)
+        cache.set(key, stats, timeout=STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_board_stats(*board_ids: int) -> None:
+    """
+    Сбрасываем сводку сразу и после коммита, чтобы не закэшировать незакоммиченное
+    """
+    def drop() -> None:
+        cache.delete_many([STATS_CACHE_KEY.format(board_id=board_id) for board_id in board_ids])
+
+    if board_ids:
+        drop()
+        transaction.on_commit(drop)
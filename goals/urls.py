@@ -8,6 +8,8 @@ urlpatterns = [
     path("goal_category/<pk>", views.GoalCategoryView.as_view(), name="goal_category"),
     path("goal/create", views.GoalCreateView.as_view(), name="goal_create"),
     path("goal/list", views.GoalListView.as_view(), name="goal_list"),
+    path("goal/bulk", views.GoalBulkView.as_view(), name="goal_bulk"),
+    path("goal/batch_status", views.GoalBatchStatusView.as_view(), name="goal_batch_status"),
     path("goal/<pk>", views.GoalView.as_view(), name="goal"),
     path("goal_comment/create", views.GoalCommentCreateView.as_view(), name="goal_comment_create"),
     path("goal_comment/list", views.GoalCommentListView.as_view(), name="goal_comment_list"),
@@ -15,4 +17,10 @@ urlpatterns = [
     path("board/create", views.BoardCreateView.as_view(), name="board_create"),
     path("board/list", views.BoardListView.as_view(), name="board_list"),
     path("board/<pk>", views.BoardView.as_view(), name="board"),
+    path("board/<pk>/participants", views.BoardParticipantListView.as_view(), name="board_participants"),
+    path("board/<pk>/participants/lookup", views.BoardParticipantLookupView.as_view(),
+         name="board_participants_lookup"),
+    path("board/<pk>/stats", views.BoardStatsView.as_view(), name="board_stats"),
+    path("export", views.GoalExportView.as_view(), name="goals_export"),
+    path("import", views.GoalImportView.as_view(), name="goals_import"),
 ]
@@ -0,0 +1,86 @@
+import hashlib
+import typing
+
+from django.db.models import F
+from django.http import HttpRequest, HttpResponse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from goals.models import Board, BoardParticipant
+
+BoardVersions = typing.List[typing.Tuple[int, int]]
+
+
+def bump_board_versions(*board_ids: int) -> None:
+    """
+    Новая версия досок после записи в них. Вызывается в той же транзакции, что и запись
+    """
+    if board_ids:
+        Board.objects.filter(pk__in=set(board_ids)).update(version=F("version") + 1)
+
+
+def get_user_board_versions(user_id: int) -> BoardVersions:
+    """
+    Версии всех досок пользователя одним запросом, в порядке id доски
+    """
+    return list(
+        BoardParticipant.objects.filter(user_id=user_id).order_by("board_id").values_list("board_id", "board__version")
+    )
+
+
+class BoardVersionETagMixin(GenericAPIView):
+    """
+    Условный GET: ETag считается из версий досок, видимых в ответе, до основного запроса.
+    Совпавший If-None-Match сразу отдаёт 304.
+    Данные профилей авторов в версию не входят
+    """
+    # путь от объекта к его доске; пустая строка - объект сам является доской
+    etag_board_field = "board"
+
+    def get_etag_versions(self) -> typing.Optional[BoardVersions]:
+        """
+        Для списка - все доски пользователя, для объекта - его доска (None, если объекта нам не видно)
+        """
+        user_id = self.request.user.pk
+        if "pk" not in self.kwargs:
+            return get_user_board_versions(user_id)
+        try:
+            pk = int(self.kwargs["pk"])
+        except ValueError:
+            return None
+        prefix = f"{self.etag_board_field}__" if self.etag_board_field else ""
+        versions = list(
+            self.model.objects.filter(pk=pk, **{f"{prefix}participants__user_id": user_id})
+            .values_list(f"{prefix}pk", f"{prefix}version")[:1]
+        )
+        return versions or None
+
+    def get_version_hash(self, request: HttpRequest) -> typing.Optional[str]:
+        """
+        Хеш пользователя, полного адреса запроса, Accept и версий досок
+        """
+        versions = self.get_etag_versions()
+        if versions is None:
+            return None
+        key = repr((request.user.pk, request.build_absolute_uri(), request.headers.get("Accept", ""), versions))
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def get(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        version_hash = self.get_version_hash(request)
+        if version_hash is None:
+            return super().get(request, *args, **kwargs)
+
+        etag = quote_etag(version_hash)
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response = self.get_versioned_response(version_hash, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    def get_versioned_response(self, version_hash: str, request: HttpRequest,
+                               *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        return super().get(request, *args, **kwargs)
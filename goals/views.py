@@ -1,44 +1,106 @@
 import typing
+from collections import defaultdict
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveUpdateDestroyAPIView
-from rest_framework import permissions, filters
-from rest_framework.pagination import LimitOffsetPagination
-
+from rest_framework.generics import CreateAPIView, GenericAPIView, ListAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework import permissions, filters, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.response import Response
+
+from core.models import User
+from core.serializers import ProfileSerializer
+from goals.cascade import cascade_board_delete
+from goals.counters import recount_boards, recount_categories
+from goals.export import EXPORT_FIELDS, CSVRenderer, JSONArrayRenderer, NDJSONRenderer, export_rows
+from goals.fast_read import FastRows
 from goals.filters import GoalDateFilter
-from goals.models import GoalCategory, Goal, GoalComment, Board
+from goals.importer import GoalImporter, detect_format, read_rows
+from goals.models import GoalCategory, Goal, GoalComment, Board, BoardParticipant
+from goals.pagination import AlwaysKeysetPagination, KeysetPagination
+from goals.participants import apply_participant_changes
 from goals.permissions import BoardPermissions, CategoryPermissions, GoalPermissions, CommentPermissions
+from goals.renderers import FastJSONRenderer
+from goals.response_cache import VersionedResponseCacheMixin
+from goals.roles import annotate_role, get_board_role, get_board_roles, get_writable_board_ids
+from goals.search import FullTextSearchFilter
+from goals.sparse import SparseFieldsetViewMixin
+from goals.stats import get_board_stats, invalidate_board_stats
+from goals.versions import BoardVersionETagMixin, bump_board_versions
 from goals.serializers import GoalCreateSerializer, GoalCategorySerializer, GoalCategoryCreateSerializer, \
     GoalSerializer, GoalCommentCreateSerializer, GoalCommentSerializer, BoardCreateSerializer, BoardSerializer, \
-    BoardListSerializer
+    BoardListSerializer, GoalBulkItemSerializer, GoalBatchStatusSerializer, BoardParticipantSerializer, \
+    BoardParticipantBulkSerializer, ParticipantCandidateSerializer
+
+PROFILE_DEFERRED_FIELDS = [
+    f"user__{field.name}" for field in User._meta.concrete_fields
+    if field.name not in ProfileSerializer.Meta.fields
+]
 
 
-class GoalListView(ListAPIView):
+def with_author(queryset: QuerySet) -> QuerySet:
+    """
+    Подгружаем автора тем же запросом (JOIN) и только с полями, которые отдаёт ProfileSerializer
+    """
+    return queryset.select_related("user").defer(*PROFILE_DEFERRED_FIELDS)
+
+
+class GoalListView(VersionedResponseCacheMixin, SparseFieldsetViewMixin, ListAPIView):
     """
     Список целей
     """
     model = Goal
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.OrderingFilter,
-        filters.SearchFilter,
+        FullTextSearchFilter,
     ]
     filterset_class = GoalDateFilter
     ordering_fields = ["title", "created"]
     ordering = ["title"]
     search_fields = ["title", "description"]
+    fast_rows = FastRows(GoalSerializer)
+
+    def get_renderers(self) -> typing.List[BaseRenderer]:
+        """
+        С GOALS_FAST_READ JSON собирает orjson (FastJSONRenderer), без него - обычный JSONRenderer
+        """
+        renderers = super().get_renderers()
+        if not settings.GOALS_FAST_READ:
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[Goal]]:
         """
         Фильтруем цели, если они не удалены и мы в них участники
         """
-        return Goal.objects.filter(category__board__participants__user=self.request.user).\
-            exclude(status=Goal.Status.archived)
+        return with_author(
+            Goal.objects.filter(board__participants__user=self.request.user, board__is_deleted=False)
+            .exclude(status=Goal.Status.archived)
+        )
+
+    def list(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        """
+        С GOALS_FAST_READ ответ собирается из строк .values() (автор приходит тем же JOIN),
+        минуя GoalSerializer; форма ответа та же. Запросы с ?fields= и ?include= идут обычным путём
+        """
+        if not settings.GOALS_FAST_READ or self.sparse is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.fast_rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_rows.render(page))
+        return Response(self.fast_rows.render(queryset))
 
 
 class GoalCategoryCreateView(CreateAPIView):
@@ -50,14 +112,14 @@ class GoalCategoryCreateView(CreateAPIView):
     permission_classes = [permissions.IsAuthenticated, CategoryPermissions]
 
 
-class GoalCategoryListView(ListAPIView):
+class GoalCategoryListView(VersionedResponseCacheMixin, SparseFieldsetViewMixin, ListAPIView):
     """
     Список категорий
     """
     model = GoalCategory
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCategorySerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [
         filters.OrderingFilter,
         filters.SearchFilter,
@@ -70,10 +132,14 @@ class GoalCategoryListView(ListAPIView):
         """
         Фильтруем категории, если они не удалены и мы в них участники
         """
-        return GoalCategory.objects.filter(board__participants__user=self.request.user, is_deleted=False)
+        return with_author(
+            GoalCategory.objects.filter(
+                board__participants__user=self.request.user, is_deleted=False, board__is_deleted=False
+            )
+        ).select_related("counters")
 
 
-class GoalCategoryView(RetrieveUpdateDestroyAPIView):
+class GoalCategoryView(BoardVersionETagMixin, SparseFieldsetViewMixin, RetrieveUpdateDestroyAPIView):
     """
     Просмотр, удаление и обновление категории
     """
@@ -83,9 +149,14 @@ class GoalCategoryView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[GoalCategory]]:
         """
-        Фильтруем категории, если они не удалены и мы в них участники
+        Фильтруем категории, если они не удалены и мы в них участники.
+        Доска и наша роль на ней приходят тем же запросом
         """
-        return GoalCategory.objects.filter(board__participants__user=self.request.user, is_deleted=False)
+        return annotate_role(
+            with_author(GoalCategory.objects.filter(is_deleted=False, board__is_deleted=False))
+            .select_related("board", "counters"),
+            self.request.user.pk,
+        )
 
     def perform_destroy(self, instance: GoalCategory) -> GoalCategory:
         """
@@ -95,6 +166,9 @@ class GoalCategoryView(RetrieveUpdateDestroyAPIView):
             instance.is_deleted = True
             instance.save()
             instance.goals.update(status=Goal.Status.archived)
+            recount_categories([instance.pk])
+            recount_boards([instance.board_id])
+            invalidate_board_stats(instance.board_id)
         return instance
 
 
@@ -107,7 +181,175 @@ class GoalCreateView(CreateAPIView):
     serializer_class = GoalCreateSerializer
 
 
-class GoalView(RetrieveUpdateDestroyAPIView):
+class GoalBulkView(GenericAPIView):
+    """
+    Пакетное создание и частичное обновление целей одним запросом и одной транзакцией
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GoalBulkItemSerializer
+    max_items = 1000
+
+    def post(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        """
+        Валидируем все элементы; если хоть один с ошибкой - ничего не сохраняем
+        и возвращаем ошибки списком в порядке элементов
+        """
+        items = request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return Response({"non_field_errors": ["Expected a list of objects"]}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"non_field_errors": [f"Ensure this list has no more than {self.max_items} items"]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        self.load_categories(items)
+        goals = with_author(Goal.objects.filter(board_id__in=get_board_roles(request).keys())).in_bulk(
+            self.get_ids(items, "id")
+        )
+        writable = set(get_writable_board_ids(request))
+
+        errors, valid, seen = [], [], set()
+        for item in items:
+            instance = None
+            if "id" in item:
+                # bool - тоже int: true не должен стать целью с id 1
+                instance = goals.get(item["id"]) if type(item["id"]) is int else None
+                if instance is None or item["id"] in seen:
+                    errors.append({"id": ["Goal not found or duplicated in this request"]})
+                    continue
+                seen.add(instance.pk)
+                if instance.board_id not in writable:
+                    errors.append({"non_field_errors": ["You do not have permission to perform this action."]})
+                    continue
+            serializer = self.get_serializer(instance, data=item, partial=instance is not None)
+            if serializer.is_valid():
+                errors.append({})
+                valid.append((instance, serializer.validated_data))
+            else:
+                errors.append(serializer.errors)
+
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(GoalSerializer(self.perform_bulk_save(valid), many=True).data, status=status.HTTP_200_OK)
+
+    def get_serializer_context(self) -> typing.Dict[str, typing.Any]:
+        return {**super().get_serializer_context(), **self.bulk_context}
+
+    def load_categories(self, items: typing.List[dict]) -> None:
+        """
+        Загружаем все категории пачки одним запросом и проверяем каждую один раз
+        """
+        categories = GoalCategory.objects.in_bulk(self.get_ids(items, "category"))
+        writable = set(get_writable_board_ids(self.request))
+        category_errors = {}
+        for category in categories.values():
+            if category.is_deleted:
+                category_errors[category.pk] = "not allowed in deleted category"
+            elif category.board_id not in writable:
+                category_errors[category.pk] = "You do not have permission to perform this action."
+        self.bulk_context = {"categories": categories, "category_errors": category_errors}
+
+    @staticmethod
+    def get_ids(items: typing.List[dict], key: str) -> typing.List[int]:
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item[key]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return list(ids)
+
+    def perform_bulk_save(self, valid: typing.List[typing.Tuple[typing.Optional[Goal], dict]]) -> typing.List[Goal]:
+        """
+        Сохраняем новые цели через bulk_create, изменённые - через bulk_update, отдельным на каждый набор
+        изменённых полей: каждой цели пишем только те поля, что пришли для неё.
+        Комментарии целей, перенесённых на другую доску, переносим за ними.
+        Счётчики затронутых категорий и досок пересчитываем
+        """
+        now = timezone.now()
+        result, to_create = [], []
+        to_update: typing.DefaultDict[typing.FrozenSet[str], typing.List[Goal]] = defaultdict(list)
+        old_board_ids: typing.Set[int] = set()
+        old_category_ids: typing.Set[int] = set()
+        moved: typing.DefaultDict[int, typing.List[int]] = defaultdict(list)
+
+        for instance, data in valid:
+            if instance is None:
+                instance = Goal(**data, user=self.request.user, board_id=data["category"].board_id)
+                to_create.append(instance)
+            else:
+                old_category_ids.add(instance.category_id)
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                fields = {*data, "updated"}
+                if "category" in data and instance.board_id != data["category"].board_id:
+                    old_board_ids.add(instance.board_id)
+                    instance.board_id = data["category"].board_id
+                    moved[instance.board_id].append(instance.pk)
+                    fields.add("board")
+                instance.updated = now
+                to_update[frozenset(fields)].append(instance)
+            result.append(instance)
+
+        with transaction.atomic():
+            Goal.objects.bulk_create(to_create)
+            for changed, instances in to_update.items():
+                Goal.objects.bulk_update(instances, fields=sorted(changed))
+            for board_id, goal_ids in moved.items():
+                GoalComment.objects.filter(goal_id__in=goal_ids).update(board_id=board_id)
+            board_ids = {goal.board_id for goal in result} | old_board_ids
+            recount_categories({goal.category_id for goal in result} | old_category_ids)
+            recount_boards(board_ids)
+            bump_board_versions(*board_ids)
+            invalidate_board_stats(*board_ids)
+        for goal in result:
+            goal._counted = goal.get_counted_state()
+        return result
+
+
+class GoalBatchStatusView(GenericAPIView):
+    """
+    Массовая смена статуса/приоритета целей одним UPDATE по доскам, где у нас есть право записи
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = GoalBatchStatusSerializer
+
+    def post(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = Goal.objects.filter(board_id__in=get_writable_board_ids(request))
+        if "ids" in data:
+            queryset = queryset.filter(pk__in=data["ids"])
+        else:
+            filterset = GoalDateFilter(
+                data=data["filter"], queryset=queryset.exclude(status=Goal.Status.archived), request=request
+            )
+            if not filterset.is_valid():
+                return Response({"filter": filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = filterset.qs
+
+        changes = {name: data[name] for name in ("status", "priority") if name in data}
+        with transaction.atomic():
+            # категории и доски запоминаем до UPDATE: после смены статуса фильтр по статусу их уже не найдёт
+            touched = list(queryset.order_by().values_list("category_id", "board_id").distinct())
+            if "ids" in data:
+                ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+            count = queryset.update(**changes, updated=timezone.now())
+            board_ids = {board_id for _, board_id in touched}
+            if "status" in changes:
+                recount_categories({category_id for category_id, _ in touched})
+                recount_boards(board_ids)
+            bump_board_versions(*board_ids)
+            invalidate_board_stats(*board_ids)
+
+        result: typing.Dict[str, typing.Any] = {"count": count}
+        if "ids" in data:
+            result.update(ids=ids, not_found=sorted(set(data["ids"]) - set(ids)))
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class GoalView(BoardVersionETagMixin, SparseFieldsetViewMixin, RetrieveUpdateDestroyAPIView):
     """
     Просмотр, удаление, обновление цели
     """
@@ -117,9 +359,13 @@ class GoalView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[Goal]]:
         """
-        Фильтруем цели, если они не удалены и мы в них участники
+        Фильтруем цели, в досках которых мы участники.
+        Категория, доска и наша роль на ней приходят тем же запросом
         """
-        return Goal.objects.filter(category__board__participants__user=self.request.user)
+        return annotate_role(
+            with_author(Goal.objects.filter(board__is_deleted=False)).select_related("category", "board"),
+            self.request.user.pk,
+        )
 
     def perform_destroy(self, instance: Goal) -> Goal:
         """
@@ -139,30 +385,33 @@ class GoalCommentCreateView(CreateAPIView):
     serializer_class = GoalCommentCreateSerializer
 
 
-class GoalCommentListView(ListAPIView):
+class GoalCommentListView(VersionedResponseCacheMixin, SparseFieldsetViewMixin, ListAPIView):
     """
     Просмотр списка комментариев
     """
     model = GoalComment
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GoalCommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.OrderingFilter,
-        filters.SearchFilter,
+        FullTextSearchFilter,
     ]
     ordering_fields = ["goal"]
     ordering = ["-created"]
+    search_fields = ["text"]
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[GoalComment]]:
         """
         Фильтруем комментарии, в которых мы являемся участниками
         """
-        return GoalComment.objects.filter(goal__category__board__participants__user=self.request.user)
+        return with_author(
+            GoalComment.objects.filter(board__participants__user=self.request.user, board__is_deleted=False)
+        )
 
 
-class GoalCommentView(RetrieveUpdateDestroyAPIView):
+class GoalCommentView(BoardVersionETagMixin, SparseFieldsetViewMixin, RetrieveUpdateDestroyAPIView):
     """
     Просмотр, удаление, обновление комментария
     """
@@ -172,9 +421,13 @@ class GoalCommentView(RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[GoalComment]]:
         """
-        Фильтруем комментарии, в которых мы являемся участниками
+        Фильтруем комментарии, в которых мы являемся участниками.
+        Цель с категорией, доска и наша роль на ней приходят тем же запросом
         """
-        return GoalComment.objects.filter(goal__category__board__participants__user=self.request.user)
+        return annotate_role(
+            with_author(GoalComment.objects.filter(board__is_deleted=False)).select_related("goal__category", "board"),
+            self.request.user.pk,
+        )
 
 
 class BoardCreateView(CreateAPIView):
@@ -186,42 +439,160 @@ class BoardCreateView(CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
-class BoardView(RetrieveUpdateDestroyAPIView):
+class BoardView(BoardVersionETagMixin, RetrieveUpdateDestroyAPIView):
     """
     Просмотр, удаление, обновление доски
     """
     model = Board
     permission_classes = [permissions.IsAuthenticated, BoardPermissions]
     serializer_class = BoardSerializer
+    etag_board_field = ""
 
     def get_queryset(self) -> typing.Union[QuerySet, typing.List[Board]]:
         """
-        Фильтруем доски, если они не удалены и мы в них участники
+        Фильтруем доски, если они не удалены и мы в них участники; роль и счётчики приходят тем же запросом.
+        Участников с пользователями BoardSerializer подгружает одним дополнительным запросом,
+        если их не больше BOARD_PARTICIPANTS_EMBED_LIMIT
         """
-        return Board.objects.filter(participants__user=self.request.user, is_deleted=False)
+        return annotate_role(Board.objects.filter(is_deleted=False), self.request.user.pk, "pk") \
+            .select_related("counters")
 
     def perform_destroy(self, instance: Board) -> Board:
         """
-        При удалении доски ставим флаг is_deleted, категориям так же ставится флаг is_deleted,
-        а целям статус archived. После чего сохраняем их в бд.
-
+        При удалении доски сразу ставим ей флаг is_deleted - она пропадает из всех выборок.
+        Категориям флаг is_deleted, а целям статус archived ставим пачками в коротких транзакциях;
+        что не успели за BOARD_DELETE_INLINE_BATCHES пачек, доделает manage.py resume_board_deletes по cron
         """
-        with transaction.atomic():
-            instance.is_deleted = True
-            instance.save()
-            instance.categories.update(is_deleted=True)
-            Goal.objects.filter(category__board=instance).update(status=Goal.Status.archived)
+        instance.is_deleted = True
+        instance.save()
+        invalidate_board_stats(instance.pk)
+        cascade_board_delete(instance.pk, max_batches=settings.BOARD_DELETE_INLINE_BATCHES)
         return instance
 
 
-class BoardListView(ListAPIView):
+def get_board_id(request: HttpRequest, pk: str, owner: bool = False) -> int:
+    """
+    Id доски из адреса; NotFound, если мы не её участники, PermissionDenied, если нужна роль владельца
+    """
+    try:
+        board_id = int(pk)
+    except ValueError:
+        raise NotFound
+    role = get_board_role(request, board_id)
+    if role is None:
+        raise NotFound
+    if owner and role != BoardParticipant.Role.owner:
+        raise PermissionDenied
+    return board_id
+
+
+class BoardParticipantListView(BoardVersionETagMixin, ListAPIView):
+    """
+    Участники доски постранично (keyset), фильтр ?role=.
+    POST - пакет изменений {"add": [...], "update": [...], "remove": [...]} одной транзакцией
+    """
+    model = Board
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BoardParticipantSerializer
+    pagination_class = AlwaysKeysetPagination
+    etag_board_field = ""
+
+    def get_queryset(self) -> typing.Union[QuerySet, typing.List[BoardParticipant]]:
+        """
+        Сортировка по (user, id) идёт по индексу уникальности (board, user)
+        """
+        queryset = BoardParticipant.objects.filter(board_id=get_board_id(self.request, self.kwargs["pk"])) \
+            .select_related("user").order_by("user", "id")
+        role = self.request.query_params.get("role")
+        if role:
+            if role not in {str(value) for value in BoardParticipant.Role.values}:
+                raise ValidationError({"role": [f'"{role}" is not a valid choice.']})
+            queryset = queryset.filter(role=int(role))
+        return queryset
+
+    def post(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        """
+        Добавлять можно только не участников, менять роль и удалять - только участников; себя не трогаем.
+        Если хоть одна операция с ошибкой - ничего не сохраняем
+        """
+        board = Board.objects.get(pk=get_board_id(request, kwargs["pk"], owner=True))
+        serializer = BoardParticipantBulkSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        users = [
+            *(item["user"] for item in data.get("add", [])),
+            *(item["user"] for item in data.get("update", [])),
+            *data.get("remove", []),
+        ]
+        existing = {
+            participant.user_id: participant
+            for participant in board.participants.filter(user_id__in=[user.pk for user in users])
+        }
+
+        errors: typing.Dict[str, typing.List[str]] = defaultdict(list)
+        for name in ("add", "update", "remove"):
+            for item in data.get(name, []):
+                user = item if name == "remove" else item["user"]
+                if user.pk == request.user.pk:
+                    errors[name].append(f"{user.username}: you can not change your own participation")
+                elif name == "add" and user.pk in existing:
+                    errors[name].append(f"{user.username}: already a participant")
+                elif name != "add" and user.pk not in existing:
+                    errors[name].append(f"{user.username}: not a participant")
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        create = [BoardParticipant(board=board, user=item["user"], role=item["role"]) for item in data.get("add", [])]
+        update = []
+        for item in data.get("update", []):
+            participant = existing[item["user"].pk]
+            if participant.role != item["role"]:
+                participant.role = item["role"]
+                update.append(participant)
+        delete = [existing[user.pk] for user in data.get("remove", [])]
+        apply_participant_changes(board, create, update, delete)
+        return Response({"added": len(create), "updated": len(update), "removed": len(delete)},
+                        status=status.HTTP_200_OK)
+
+
+class BoardParticipantLookupView(ListAPIView):
+    """
+    Подбор пользователей для приглашения на доску: ?username= - начало username (по индексу
+    user_username_prefix_idx), участники доски исключаются. Доступно владельцу доски
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ParticipantCandidateSerializer
+    pagination_class = None
+    max_results = 20
+
+    def get_queryset(self) -> typing.Union[QuerySet, typing.List[User]]:
+        board_id = get_board_id(self.request, self.kwargs["pk"], owner=True)
+        prefix = self.request.query_params.get("username", "").strip()
+        if not prefix:
+            raise ValidationError({"username": ["This query parameter is required."]})
+        return User.objects.filter(username__startswith=prefix, is_active=True) \
+            .exclude(participants_user__board_id=board_id).order_by("username")[:self.max_results]
+
+
+class BoardStatsView(GenericAPIView):
+    """
+    Сводка по доске: цели по категориям, статусам и приоритетам, просроченные и на этой неделе
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        return Response(get_board_stats(get_board_id(request, kwargs["pk"])))
+
+
+class BoardListView(VersionedResponseCacheMixin, ListAPIView):
     """
     Просмотр доски
     """
     model = Board
     permission_classes = [permissions.IsAuthenticated, BoardPermissions]
     serializer_class = BoardListSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering = ["title"]
 
@@ -229,4 +600,63 @@ class BoardListView(ListAPIView):
         """
         Фильтруем доски, если они не удалены и мы в них участники
         """
-        return Board.objects.filter(participants__user=self.request.user, is_deleted=False)
+        return Board.objects.filter(participants__user=self.request.user, is_deleted=False).select_related("counters")
+
+
+class GoalExportView(GenericAPIView):
+    """
+    Потоковая выгрузка целей и комментариев с наших досок: NDJSON (?format=ndjson), CSV (?format=csv)
+    или JSON-массив (?format=json или Accept: application/json).
+    Можно ограничить доской (?board=) или категорией (?category=)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer, JSONArrayRenderer]
+
+    def get(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        board_ids = list(get_board_roles(request))
+        goals = Goal.objects.filter(board_id__in=board_ids)
+        comments = GoalComment.objects.filter(board_id__in=board_ids)
+
+        board_id = self.get_id_param("board")
+        if board_id is not None:
+            if board_id not in board_ids:
+                raise NotFound
+            goals, comments = goals.filter(board_id=board_id), comments.filter(board_id=board_id)
+        category_id = self.get_id_param("category")
+        if category_id is not None:
+            if not GoalCategory.objects.filter(pk=category_id, board_id__in=board_ids).exists():
+                raise NotFound
+            goals, comments = goals.filter(category_id=category_id), comments.filter(goal__category_id=category_id)
+
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(export_rows(goals, comments), EXPORT_FIELDS),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = f'attachment; filename="goals.{renderer.format}"'
+        return response
+
+    def get_id_param(self, name: str) -> typing.Optional[int]:
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise NotFound
+
+
+class GoalImportView(GenericAPIView):
+    """
+    Импорт целей из загруженного файла NDJSON или CSV (поле file, формат - по расширению .csv).
+    Файл читается потоком и сохраняется пачками, в ответе - отчёт импорта
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request: HttpRequest, *args: typing.Any, **kwargs: typing.Any) -> HttpResponse:
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": ["No file was submitted."]})
+        report = GoalImporter(request.user).run(read_rows(upload, detect_format(upload.name)))
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import defaultdict
+
+from bot.dispatcher import UpdateDispatcher
+
+
+def test_keeps_order_within_chat():
+    handled = defaultdict(list)
+
+    def handler(update):
+        chat_id, number = update
+        time.sleep(0.001 * (number % 3))
+        handled[chat_id].append(number)
+
+    dispatcher = UpdateDispatcher(handler, workers=4, max_pending=10).start()
+    for number in range(30):
+        for chat_id in range(5):
+            dispatcher.submit(chat_id, (chat_id, number))
+    dispatcher.stop(timeout=10)
+
+    assert dict(handled) == {chat_id: list(range(30)) for chat_id in range(5)}
+
+
+def test_slow_chat_does_not_block_others():
+    release = threading.Event()
+    fast_done = threading.Event()
+
+    def handler(update):
+        if update == 'slow':
+            release.wait(5)
+        else:
+            fast_done.set()
+
+    dispatcher = UpdateDispatcher(handler, workers=2, max_pending=10).start()
+    dispatcher.submit(1, 'slow')
+    dispatcher.submit(2, 'fast')
+
+    assert fast_done.wait(5)
+    release.set()
+    dispatcher.stop(timeout=5)
+
+
+def test_backpressure():
+    release = threading.Event()
+    dispatcher = UpdateDispatcher(lambda update: release.wait(5), workers=1, max_pending=2).start()
+
+    assert dispatcher.submit(1, 'first')
+    assert dispatcher.submit(2, 'second')
+    assert not dispatcher.submit(3, 'third', timeout=0.05)
+    assert dispatcher.pending == 2
+
+    release.set()
+    assert dispatcher.join(timeout=5)
+    assert dispatcher.submit(3, 'third', timeout=1)
+    dispatcher.stop(timeout=5)
+
+
+def test_handler_errors_do_not_stop_workers():
+    handled = []
+
+    def handler(update):
+        if update == 'broken':
+            raise ValueError(update)
+        handled.append(update)
+
+    dispatcher = UpdateDispatcher(handler, workers=1, max_pending=5).start()
+    dispatcher.submit(1, 'broken')
+    dispatcher.submit(1, 'ok')
+    dispatcher.stop(timeout=5)
+
+    assert handled == ['ok']
@@ -0,0 +1,154 @@
+import json
+
+import marshmallow
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from bot.models import TgOutboxMessage, TgUser
+from bot.outbox import OutboxSender, RateLimiter, enqueue
+from bot.tg.client import TgRetryAfter
+
+
+class FakeResponse:
+    ok = True
+
+
+class FakeTgClient:
+    def __init__(self, fail_chats=()):
+        self.sent = []
+        self.fail_chats = set(fail_chats)
+
+    def send_message_to_url(self, chat_id, text):
+        if chat_id in self.fail_chats:
+            raise ConnectionError('telegram is down')
+        self.sent.append((chat_id, text))
+        return FakeResponse()
+
+
+def test_rate_limiter_per_chat_and_global():
+    limiter = RateLimiter(global_rate=3, chat_rate=1)
+
+    assert limiter.acquire(1) == 0
+    assert limiter.acquire(1) > 0
+    assert limiter.acquire(2) == 0
+    assert limiter.acquire(3) == 0
+    assert limiter.acquire(4) > 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sender_keeps_order_and_one_message_per_chat_per_pass():
+    for text in ('first', 'second', 'third'):
+        enqueue(1, text)
+    enqueue(2, 'other')
+    client = FakeTgClient()
+    sender = OutboxSender(client, limiter=RateLimiter(global_rate=100, chat_rate=1000))
+
+    assert sender.run_once()[0] == 2
+    assert client.sent == [(1, 'first'), (2, 'other')]
+    while sender.run_once()[0]:
+        pass
+
+    assert [text for chat_id, text in client.sent if chat_id == 1] == ['first', 'second', 'third']
+    assert not TgOutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db
+def test_long_chat_queue_does_not_starve_other_chats():
+    TgOutboxMessage.objects.bulk_create(TgOutboxMessage(chat_id=1, text=f'spam {number}') for number in range(600))
+    enqueue(2, 'notification')
+    client = FakeTgClient()
+    sender = OutboxSender(client, limiter=RateLimiter(global_rate=30, chat_rate=1), batch_size=500)
+
+    assert sender.run_once()[0] == 2
+    assert client.sent == [(1, 'spam 0'), (2, 'notification')]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rate_limited_messages_wait():
+    enqueue(1, 'first')
+    enqueue(1, 'second')
+    client = FakeTgClient()
+    sender = OutboxSender(client, limiter=RateLimiter(global_rate=30, chat_rate=1))
+
+    assert sender.run_once()[0] == 1
+    sent, wait = sender.run_once()
+
+    assert sent == 0
+    assert 0 < wait <= 1
+    assert TgOutboxMessage.objects.get().text == 'second'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_message_holds_back_its_chat():
+    enqueue(1, 'first')
+    enqueue(1, 'second')
+    enqueue(2, 'other')
+    client = FakeTgClient(fail_chats={1})
+    sender = OutboxSender(client, limiter=RateLimiter(global_rate=100, chat_rate=1000), retries=2)
+
+    assert sender.run_once()[0] == 1
+    first = TgOutboxMessage.objects.get(text='first')
+    assert first.attempts == 1 and 'telegram is down' in first.error
+    assert sender.run_once()[0] == 0
+    assert client.sent == [(2, 'other')]
+
+    TgOutboxMessage.objects.filter(pk=first.pk).update(next_attempt_at=first.created)
+    sender.run_once()
+    first.refresh_from_db()
+    assert first.status == TgOutboxMessage.Status.failed
+
+    client.fail_chats.clear()
+    sender.run_once()
+    assert client.sent[-1] == (1, 'second')
+
+
+@pytest.mark.django_db
+def test_verify_view_enqueues(auth_client, new_user):
+    TgUser.objects.create(tg_user_id=1, tg_chat_id=10, verification_code='code')
+
+    response = auth_client.patch(reverse('bot_verify'), data=json.dumps({'verification_code': 'code'}),
+                                 content_type='application/json')
+
+    assert response.status_code == 200
+    assert list(TgOutboxMessage.objects.values_list('chat_id', 'text')) == [(10, 'Верификация прошла успешно')]
+
+
+class RejectingTgClient:
+    def __init__(self, error):
+        self.error = error
+
+    def send_message_to_url(self, chat_id, text):
+        raise self.error
+
+
+@pytest.mark.django_db
+def test_retry_after_postpones_without_spending_attempt():
+    message = enqueue(1, 'hi')
+    sender = OutboxSender(RejectingTgClient(TgRetryAfter('sendMessage', 600)), retries=1,
+                          limiter=RateLimiter(global_rate=100, chat_rate=1000))
+
+    assert sender.run_once()[0] == 0
+
+    message.refresh_from_db()
+    assert message.status == TgOutboxMessage.Status.pending
+    assert message.attempts == 0
+    assert 590 < (message.next_attempt_at - timezone.now()).total_seconds() <= 600
+
+
+@pytest.mark.django_db
+def test_not_ok_response_is_a_failed_send():
+    message = enqueue(1, 'hi')
+    body = {'ok': False, 'error_code': 400, 'description': 'Bad Request: chat not found'}
+    error = marshmallow.ValidationError({'result': ['Missing data for required field.']}, data=body)
+    sender = OutboxSender(RejectingTgClient(error), retries=1, limiter=RateLimiter(global_rate=100, chat_rate=1000))
+
+    assert sender.run_once()[0] == 0
+
+    message.refresh_from_db()
+    assert message.status == TgOutboxMessage.Status.failed
+    assert message.error == 'not ok: Bad Request: chat not found'
+
+
+def test_default_client_does_not_retry():
+    assert OutboxSender(limiter=RateLimiter(global_rate=1, chat_rate=1)).tg_client.retries == 0
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from bot.management.commands.runbot import BotRunner
+from bot.models import TgChatState, TgOutboxMessage, TgUser
+from bot.state import ChatState, DatabaseStateStore, MemoryStateStore
+from bot.tg.dc import Chat, Message, MessageFrom
+from goals.models import Board, Goal
+from tests import factories
+
+
+class FakeTgClient:
+    def __init__(self):
+        self.sent = []
+
+    def send_message_to_url(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+def message(chat_id, text):
+    return Message(
+        message_id=1, message_from=MessageFrom(id=chat_id, is_bot=False, first_name=None, last_name=None,
+                                               username=f'user{chat_id}', language_code=None),
+        chat=Chat(id=chat_id, first_name=None, last_name=None, username=None, type='private'),
+        date=None, text=text, entities=None,
+    )
+
+
+@pytest.mark.parametrize('store_class', [MemoryStateStore, DatabaseStateStore])
+@pytest.mark.django_db
+def test_store_keeps_state_per_chat(store_class):
+    store = store_class(ttl=60)
+    store.set(1, ChatState(condition=2))
+
+    assert store.get(1) == ChatState(condition=2)
+    assert store.get(2) == ChatState()
+
+    store.delete(1)
+    assert store.get(1) == ChatState()
+
+
+def test_memory_store_ttl():
+    store = MemoryStateStore(ttl=-1)
+    store.set(1, ChatState(condition=2))
+
+    assert store.get(1) == ChatState()
+
+
+@pytest.mark.django_db
+def test_database_store_ttl_and_purge():
+    store = DatabaseStateStore(ttl=60)
+    store.set(1, ChatState(condition=2))
+    store.set(2, ChatState(condition=1))
+    TgChatState.objects.filter(chat_id=1).update(updated=timezone.now() - timedelta(seconds=120))
+
+    assert store.get(1) == ChatState()
+    store.purge()
+    assert list(TgChatState.objects.values_list('chat_id', flat=True)) == [2]
+
+
+@pytest.mark.parametrize('store_class', [MemoryStateStore, DatabaseStateStore])
+@pytest.mark.django_db
+def test_chats_do_not_share_state(new_user, category, store_class):
+    store = store_class(ttl=60)
+    client = FakeTgClient()
+    other = factories.UserFactory.create()
+    for chat_id, user in ((1, new_user), (2, other)):
+        TgUser.objects.create(tg_user_id=chat_id, tg_chat_id=chat_id, user=user, verification_code=f'code{chat_id}')
+
+    def send(chat_id, text):
+        next(BotRunner(msg=message(chat_id, text), tg_client=client, state_store=store).start_bot())
+
+    send(1, '/create')
+    send(2, '/goals')
+    send(1, category.title)
+    send(2, 'something')
+    send(1, 'new goal')
+
+    assert store.get(1) == ChatState()
+    assert store.get(2) == ChatState(condition=1)
+    assert Goal.objects.get(title='new goal').category == category
+    assert not Goal.objects.filter(title='something').exists()
+
+
+@pytest.mark.django_db
+def test_deleted_board_hidden_from_bot(new_user, board, category, goal):
+    store = MemoryStateStore(ttl=60)
+    client = FakeTgClient()
+    TgUser.objects.create(tg_user_id=1, tg_chat_id=1, user=new_user, verification_code='code1')
+    # каскад удаления ещё не дошёл до категорий и целей доски
+    Board.objects.filter(pk=board.pk).update(is_deleted=True)
+
+    def send(text):
+        next(BotRunner(msg=message(1, text), tg_client=client, state_store=store).start_bot())
+
+    send('/goals')
+    send('/create')
+    send(category.title)
+
+    texts = list(TgOutboxMessage.objects.order_by('pk').values_list('text', flat=True))
+    assert texts == ['Целей нет', 'Категорий нет', BotRunner.message_unknown_category]
+    assert Goal.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_database_store_locks_only_state(new_user, category, monkeypatch):
+    store = DatabaseStateStore(ttl=60)
+    TgUser.objects.create(tg_user_id=1, tg_chat_id=1, user=new_user, verification_code='code1')
+    store.set(1, ChatState(condition=3, category_id=category.pk))
+    in_transaction = []
+    monkeypatch.setattr('bot.management.commands.runbot.enqueue',
+                        lambda chat_id, text: in_transaction.append(connection.in_atomic_block))
+
+    next(BotRunner(msg=message(1, 'new goal'), tg_client=FakeTgClient(), state_store=store).start_bot())
+
+    assert in_transaction == [False]
+    assert Goal.objects.filter(title='new goal', category=category).exists()
+    assert store.get(1) == ChatState()
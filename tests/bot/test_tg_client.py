@@ -0,0 +1,146 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from bot.tg.client import TgClient, TgRetryAfter
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    """
+    Локальный Телеграм: отвечает keep-alive (HTTP/1.1) и отдаёт заранее заданные ошибки
+    """
+    protocol_version = 'HTTP/1.1'
+    failures = []
+    received = []
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.respond(body)
+
+    def respond(self, body=None):
+        self.received.append(self.path)
+        if self.failures:
+            status, data = self.failures.pop(0)
+            if status is None:
+                # запрос прочитан, но соединение рвётся без ответа
+                self.close_connection = True
+                return
+        elif self.path.split('?')[0].endswith('/getUpdates'):
+            status, data = 200, {'ok': True, 'result': []}
+        else:
+            status, data = 200, {'ok': True, 'result': {
+                'message_id': 1, 'from': {'id': 1, 'is_bot': True, 'username': 'todo_bot'},
+                'chat': {'id': body['chat_id'], 'type': 'private'}, 'text': body['text'],
+            }}
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def telegram():
+    FakeTelegram.failures = []
+    FakeTelegram.received = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTelegram)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_connections_are_reused(telegram):
+    client = TgClient('token', base_url=telegram)
+
+    for number in range(20):
+        assert client.send_message_to_url(chat_id=number, text='hi').result.text == 'hi'
+    assert client.get_updates(timeout=0).result == []
+
+    assert client.connection_stats() == {'requests': 21, 'connections': 1, 'reused': 20, 'retried': 0}
+
+
+def test_retries_honour_retry_after(telegram, monkeypatch):
+    delays = []
+    monkeypatch.setattr('bot.tg.client.time.sleep', delays.append)
+    FakeTelegram.failures = [
+        (429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 7}}),
+        (502, {'ok': False}),
+    ]
+    client = TgClient('token', base_url=telegram, backoff=0.5)
+
+    assert client.send_message_to_url(chat_id=1, text='hi').ok
+
+    assert delays == [7.0, 1.0]
+    assert client.connection_stats()['retried'] == 2
+
+
+def test_gives_up_after_retries(telegram, monkeypatch):
+    monkeypatch.setattr('bot.tg.client.time.sleep', lambda delay: None)
+    FakeTelegram.failures = [(500, {'ok': False})] * 3
+    client = TgClient('token', base_url=telegram, retries=2)
+
+    assert client.call('sendMessage', read_timeout=1, json={'chat_id': 1, 'text': 'hi'}) == {'ok': False}
+    assert client.connection_stats()['requests'] == 3
+
+
+def test_long_retry_after_is_left_to_caller(telegram, monkeypatch):
+    delays = []
+    monkeypatch.setattr('bot.tg.client.time.sleep', delays.append)
+    FakeTelegram.failures = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 3600}})]
+    client = TgClient('token', base_url=telegram, max_backoff=30)
+
+    with pytest.raises(TgRetryAfter) as error:
+        client.send_message_to_url(chat_id=1, text='hi')
+    assert error.value.retry_after == 3600
+    assert delays == []
+    assert len(FakeTelegram.received) == 1
+
+
+def test_retry_after_without_retries_left(telegram, monkeypatch):
+    monkeypatch.setattr('bot.tg.client.time.sleep', lambda delay: None)
+    FakeTelegram.failures = [(429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 5}})]
+    client = TgClient('token', base_url=telegram, retries=0)
+
+    with pytest.raises(TgRetryAfter) as error:
+        client.send_message_to_url(chat_id=1, text='hi')
+    assert error.value.retry_after == 5
+
+
+def test_aborted_send_is_not_retried(telegram, monkeypatch):
+    monkeypatch.setattr('bot.tg.client.time.sleep', lambda delay: None)
+    FakeTelegram.failures = [(None, None)]
+    client = TgClient('token', base_url=telegram)
+
+    with pytest.raises(requests.ConnectionError):
+        client.send_message_to_url(chat_id=1, text='hi')
+    assert len(FakeTelegram.received) == 1
+
+    FakeTelegram.failures = [(None, None)]
+    assert client.get_updates(timeout=0).result == []
+    assert len(FakeTelegram.received) == 3
+
+
+def test_send_retried_when_not_connected(monkeypatch):
+    delays = []
+    monkeypatch.setattr('bot.tg.client.time.sleep', delays.append)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+    client = TgClient('token', base_url=f'http://127.0.0.1:{closed_port}', retries=2)
+
+    with pytest.raises(requests.ConnectionError):
+        client.send_message_to_url(chat_id=1, text='hi')
+    assert len(delays) == 2
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from bot.dispatcher import UpdateDispatcher
+from bot.management.commands.bench_webhook import make_update
+from bot.management.commands.runbot import get_dispatcher, set_dispatcher, stop_dispatcher
+from bot.models import TgOutboxMessage, TgUpdate, TgUser
+
+SECRET_HEADER = 'HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN'
+
+
+@pytest.fixture
+def handled(settings):
+    settings.TG_WEBHOOK_SECRET = 'secret'
+    updates = []
+    set_dispatcher(UpdateDispatcher(updates.append, workers=2, max_pending=10).start())
+    yield updates
+    stop_dispatcher(timeout=5)
+
+
+def post(client, data, secret='secret'):
+    return client.post(reverse('bot_webhook'), data=json.dumps(data), content_type='application/json',
+                       **{SECRET_HEADER: secret})
+
+
+@pytest.mark.django_db
+def test_webhook_dispatches_update(client, handled):
+    response = post(client, make_update(7, chat_id=42))
+
+    assert response.status_code == 200
+    stop_dispatcher(timeout=5)
+    assert [(update.update_id, update.message.chat.id) for update in handled] == [(7, 42)]
+
+
+def test_webhook_checks_secret(client, handled, settings):
+    assert post(client, make_update(1, chat_id=1), secret='wrong').status_code == 403
+
+    settings.TG_WEBHOOK_SECRET = None
+    assert post(client, make_update(1, chat_id=1)).status_code == 404
+    stop_dispatcher(timeout=5)
+    assert handled == []
+
+
+def test_webhook_acks_updates_without_message(client, handled):
+    assert post(client, {'update_id': 1, 'edited_message': {}}).status_code == 200
+
+
+@pytest.mark.django_db
+def test_webhook_backpressure(client, settings):
+    settings.TG_WEBHOOK_SECRET = 'secret'
+    dispatcher = UpdateDispatcher(lambda update: None, workers=1, max_pending=1)
+    set_dispatcher(dispatcher)
+
+    assert post(client, make_update(1, chat_id=1)).status_code == 200
+    assert post(client, make_update(2, chat_id=1)).status_code == 503
+    assert list(TgUpdate.objects.values_list('update_id', flat=True)) == [1]
+
+    dispatcher.start()
+    stop_dispatcher(timeout=5)
+
+
+@pytest.mark.django_db
+def test_webhook_redelivery_is_handled_once(client, handled):
+    assert post(client, make_update(7, chat_id=42)).status_code == 200
+    assert post(client, make_update(7, chat_id=42)).status_code == 200
+
+    stop_dispatcher(timeout=5)
+    assert [update.update_id for update in handled] == [7]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_updates_accepted_before_restart_are_handled(settings):
+    settings.BOT_WORKERS = 1
+    TgUpdate.objects.create(update_id=5, data=make_update(5, chat_id=42))
+    TgUpdate.objects.create(update_id=4, data=make_update(4, chat_id=42), handled=True)
+
+    get_dispatcher()
+    stop_dispatcher(timeout=5)
+
+    assert TgUser.objects.filter(tg_chat_id=42).exists()
+    assert TgOutboxMessage.objects.filter(chat_id=42).count() == 1
+    assert not TgUpdate.objects.filter(handled=False).exists()
+
+
+@pytest.mark.skipif(connection.vendor == 'sqlite', reason='in-memory SQLite locks whole tables across threads')
+@pytest.mark.django_db(transaction=True)
+def test_bench_webhook(capsys):
+    call_command('bench_webhook', updates=200, chats=20, burst=50, pause_ms=0, workers=4, senders=4)
+
+    output = capsys.readouterr().out
+    assert 'handled: 200' in output
+    assert 'chats out of order: 0' in output
+    assert not TgUpdate.objects.exists()
+    assert not TgUser.objects.exists()
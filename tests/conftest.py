@@ -1,10 +1,18 @@
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 from core.models import User
+from goals.roles import board_roles_cache
 from tests import factories
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    board_roles_cache.clear()
+
+
 @pytest.fixture
 def create_user():
     user = User.objects.create_user(username="test_user", password="secret@@pass")
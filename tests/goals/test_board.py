@@ -64,3 +64,34 @@ def test_update(auth_client, new_user, board, participant):
 
     assert response.status_code == 200
     assert response.data.get('title') == "put test title"
+
+
+@pytest.mark.django_db
+def test_update_participants_diff(auth_client, new_user, board, participant):
+    kept, changed, removed, added = factories.UserFactory.create_batch(4)
+    factories.ParticipantFactory.create(board=board, user=kept, role=2)
+    factories.ParticipantFactory.create(board=board, user=changed, role=2)
+    factories.ParticipantFactory.create(board=board, user=removed, role=2)
+
+    response = auth_client.put(reverse('board', args=[board.pk]), content_type="application/json",
+                               data=json.dumps({"title": board.title, "participants": [
+                                   {"user": new_user.username, "role": 2},
+                                   {"user": kept.username, "role": 2},
+                                   {"user": changed.username, "role": 3},
+                                   {"user": added.username, "role": 3},
+                               ]}))
+
+    assert response.status_code == 200
+    roles = dict(board.participants.values_list("user__username", "role"))
+    assert roles == {new_user.username: 1, kept.username: 2, changed.username: 3, added.username: 3}
+    board.counters.refresh_from_db()
+    assert board.counters.participants == 4
+
+
+@pytest.mark.django_db
+def test_update_participants_unknown_user(auth_client, new_user, board, participant):
+    response = auth_client.put(reverse('board', args=[board.pk]), content_type="application/json",
+                               data=json.dumps({"title": board.title, "participants": [{"user": "nobody", "role": 2}]}))
+
+    assert response.status_code == 400
+    assert board.participants.count() == 1
@@ -0,0 +1,41 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from goals.models import BoardCounters, CategoryCounters, Goal, GoalCategory
+from tests import factories
+
+
+@pytest.mark.django_db
+def test_board_delete_cascades_in_batches(auth_client, settings, new_user, board, category):
+    settings.BOARD_DELETE_BATCH_SIZE = 2
+    settings.BOARD_DELETE_INLINE_BATCHES = 2
+    other_category = factories.CategoryFactory.create(board=board, user=new_user)
+    goals = factories.GoalFactory.create_batch(5, category=category, user=new_user)
+    factories.GoalFactory.create(category=other_category, user=new_user, status=Goal.Status.done)
+
+    response = auth_client.delete(reverse('board', args=[board.pk]))
+
+    assert response.status_code == 204
+    assert not GoalCategory.objects.filter(board=board, is_deleted=False).exists()
+    assert Goal.objects.filter(board=board).exclude(status=Goal.Status.archived).exists()
+    assert auth_client.get(reverse('goal_list')).data == []
+    assert auth_client.get(reverse('goal', args=[goals[-1].pk])).status_code == 404
+
+    call_command('resume_board_deletes')
+
+    assert not Goal.objects.filter(board=board).exclude(status=Goal.Status.archived).exists()
+    assert CategoryCounters.objects.get(pk=category.pk).goals_archived == 5
+    assert CategoryCounters.objects.get(pk=category.pk).goals_to_do == 0
+    counters = BoardCounters.objects.get(pk=board.pk)
+    assert (counters.goals_archived, counters.goals_done) == (6, 0)
+
+
+@pytest.mark.django_db
+def test_no_writes_into_deleted_board(auth_client, new_user, board, category, goal):
+    board.is_deleted = True
+    board.save()
+
+    response = auth_client.post(reverse('goal_create'), data={'title': 'x', 'category': category.pk})
+
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from goals.models import Goal
+from tests import factories
+
+
+@pytest.mark.django_db
+def test_board_stats(auth_client, new_user, board, category):
+    other_category = factories.CategoryFactory.create(board=board, user=new_user)
+    now = timezone.now()
+    factories.GoalFactory.create(category=category, user=new_user, status=Goal.Status.to_do,
+                                 priority=Goal.Priority.high, due_date=now - datetime.timedelta(days=30))
+    factories.GoalFactory.create(category=category, user=new_user, status=Goal.Status.done,
+                                 due_date=now - datetime.timedelta(days=30))
+    factories.GoalFactory.create(category=other_category, user=new_user, status=Goal.Status.in_progress)
+    factories.GoalFactory.create(category=other_category, user=new_user, status=Goal.Status.archived)
+
+    response = auth_client.get(reverse('board_stats', args=[board.pk]))
+
+    assert response.status_code == 200
+    assert response.data['total']['total'] == 3
+    assert response.data['total']['by_status'] == {1: 1, 2: 1, 3: 1}
+    assert response.data['total']['overdue'] == 1
+    first, second = response.data['categories']
+    assert first['category'] == category.pk
+    assert first['by_priority'] == {1: 0, 2: 1, 3: 1, 4: 0}
+    assert second['total'] == 1
+
+
+@pytest.mark.django_db
+def test_board_stats_cached_and_invalidated(auth_client, new_user, board, goal):
+    url = reverse('board_stats', args=[board.pk])
+    auth_client.get(url)
+
+    with CaptureQueriesContext(connection) as context:
+        auth_client.get(url)
+    assert not [query for query in context.captured_queries if 'goals_goal' in query['sql']]
+
+    goal.status = Goal.Status.done
+    goal.save()
+
+    assert auth_client.get(url).data['total']['by_status'][Goal.Status.done] == 1
+
+
+@pytest.mark.django_db
+def test_board_stats_not_participant(auth_client, new_user):
+    board = factories.BoardFactory.create()
+
+    response = auth_client.get(reverse('board_stats', args=[board.pk]))
+
+    assert response.status_code == 404
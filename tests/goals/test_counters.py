@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from goals.models import BoardCounters, CategoryCounters, Goal
+from tests import factories
+
+
+def counters(model, pk):
+    return model.objects.values(
+        'goals_to_do', 'goals_in_progress', 'goals_done', 'goals_archived', 'comments'
+    ).get(pk=pk)
+
+
+@pytest.mark.django_db
+def test_counters_follow_writes(new_user, board, category, goal, comment):
+    other_category = factories.CategoryFactory.create(board=board, user=new_user)
+    expected = dict(goals_to_do=1, goals_in_progress=0, goals_done=0, goals_archived=0, comments=1)
+    assert counters(CategoryCounters, category.pk) == expected
+    assert counters(BoardCounters, board.pk) == expected
+    assert BoardCounters.objects.get(pk=board.pk).participants == 1
+
+    goal = Goal.objects.get(pk=goal.pk)
+    goal.status = Goal.Status.done
+    goal.category = other_category
+    goal.save()
+
+    assert counters(CategoryCounters, category.pk) == dict(expected, goals_to_do=0, comments=0)
+    assert counters(CategoryCounters, other_category.pk) == dict(expected, goals_to_do=0, goals_done=1)
+    assert counters(BoardCounters, board.pk) == dict(expected, goals_to_do=0, goals_done=1)
+
+    comment.delete()
+    assert counters(CategoryCounters, other_category.pk)['comments'] == 0
+
+
+@pytest.mark.django_db
+def test_counters_after_board_destroy(auth_client, new_user, board, category, goal):
+    response = auth_client.delete(reverse('board', args=[board.pk]))
+
+    assert response.status_code == 204
+    assert counters(CategoryCounters, category.pk)['goals_archived'] == 1
+    assert counters(BoardCounters, board.pk)['goals_to_do'] == 0
+
+
+@pytest.mark.django_db
+def test_counters_after_batch_status(auth_client, new_user, board, category):
+    goals = factories.GoalFactory.create_batch(3, category=category, user=new_user)
+
+    auth_client.post(reverse('goal_batch_status'), data=json.dumps({'ids': [goal.pk for goal in goals], 'status': 2}),
+                     content_type='application/json')
+
+    assert counters(CategoryCounters, category.pk)['goals_in_progress'] == 3
+    assert counters(BoardCounters, board.pk)['goals_to_do'] == 0
+
+
+@pytest.mark.django_db
+def test_recount_counters_repairs_drift(new_user, board, category, goal):
+    CategoryCounters.objects.filter(pk=category.pk).update(goals_to_do=42)
+    BoardCounters.objects.filter(pk=board.pk).delete()
+
+    call_command('recount_counters', batch_size=1)
+
+    assert counters(CategoryCounters, category.pk)['goals_to_do'] == 1
+    assert BoardCounters.objects.get(pk=board.pk).participants == 1
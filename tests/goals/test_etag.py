@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests import factories
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route, fixture', [
+    ('goal_list', None), ('board_list', None), ('goal', 'goal'), ('board', 'board'),
+])
+def test_not_modified(auth_client, request, goal, route, fixture):
+    url = reverse(route, args=[request.getfixturevalue(fixture).pk] if fixture else [])
+    response = auth_client.get(url)
+    etag = response['ETag']
+
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not [query for query in context.captured_queries if 'FROM "goals_goal"' in query['sql']
+                and '"goals_goal"."title"' in query['sql']]
+
+
+@pytest.mark.django_db
+def test_etag_changes_on_write(auth_client, new_user, category, goal):
+    url = reverse('goal_list')
+    etag = auth_client.get(url)['ETag']
+
+    auth_client.patch(reverse('goal', args=[goal.pk]), data=json.dumps({'title': 'changed'}),
+                      content_type='application/json')
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert response.data[0]['title'] == 'changed'
+
+
+@pytest.mark.django_db
+def test_etag_changes_on_participant_write(auth_client, board, participant):
+    url = reverse('board', args=[board.pk])
+    etag = auth_client.get(url)['ETag']
+
+    factories.ParticipantFactory.create(board=board, user=factories.UserFactory.create())
+
+    assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_no_304_for_foreign_object(auth_client, goal):
+    other_goal = factories.GoalFactory.create(
+        category=factories.CategoryFactory.create(board=factories.BoardFactory.create(), user=goal.user),
+        user=goal.user,
+    )
+
+    response = auth_client.get(reverse('goal', args=[other_goal.pk]), HTTP_IF_NONE_MATCH='*')
+
+    assert response.status_code == 404
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+
+from goals import export
+from tests import factories
+
+
+def content(response):
+    assert response.status_code == 200
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_ndjson(auth_client, new_user, category, goal, comment, monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_FLUSH_ROWS', 1)
+    foreign = factories.CategoryFactory.create(board=factories.BoardFactory.create(), user=new_user)
+    factories.GoalFactory.create(category=foreign, user=new_user)
+
+    response = auth_client.get(reverse('goals_export'))
+    rows = [json.loads(line) for line in content(response).splitlines()]
+
+    assert response['Content-Type'] == 'application/x-ndjson; charset=utf-8'
+    assert [(row['type'], row['id']) for row in rows] == [('goal', goal.pk), ('comment', comment.pk)]
+    assert rows[0]['category'] == category.pk
+    assert rows[1]['user'] == new_user.username
+
+
+@pytest.mark.django_db
+def test_export_csv_scoped_to_category(auth_client, new_user, board, category, goal, comment):
+    other = factories.CategoryFactory.create(board=board, user=new_user)
+    factories.GoalFactory.create(category=other, user=new_user)
+
+    response = auth_client.get(f"{reverse('goals_export')}?format=csv&category={category.pk}")
+    rows = list(csv.DictReader(io.StringIO(content(response))))
+
+    assert response['Content-Disposition'] == 'attachment; filename="goals.csv"'
+    assert [(row['type'], row['id']) for row in rows] == [('goal', str(goal.pk)), ('comment', str(comment.pk))]
+    assert rows[0]['title'] == goal.title
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('flush_rows', [1, 500])
+def test_export_json_for_json_clients(auth_client, goal, comment, monkeypatch, flush_rows):
+    monkeypatch.setattr(export, 'EXPORT_FLUSH_ROWS', flush_rows)
+
+    response = auth_client.get(reverse('goals_export'), HTTP_ACCEPT='application/json')
+    rows = json.loads(content(response))
+
+    assert response['Content-Type'] == 'application/json; charset=utf-8'
+    assert [(row['type'], row['id']) for row in rows] == [('goal', goal.pk), ('comment', comment.pk)]
+
+
+@pytest.mark.django_db
+def test_export_json_empty_and_errors(auth_client, new_user):
+    assert json.loads(content(auth_client.get(f"{reverse('goals_export')}?format=json"))) == []
+
+    response = auth_client.get(f"{reverse('goals_export')}?format=json&board=0")
+
+    assert response.status_code == 404
+    assert 'detail' in json.loads(response.content)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('scope', ['board', 'category'])
+def test_export_foreign_scope(auth_client, new_user, goal, scope):
+    board = factories.BoardFactory.create()
+    target = board if scope == 'board' else factories.CategoryFactory.create(board=board, user=new_user)
+
+    response = auth_client.get(f"{reverse('goals_export')}?{scope}={target.pk}")
+
+    assert response.status_code == 404
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from goals.renderers import FastJSONRenderer
+
+from tests import factories
+
+
+@pytest.fixture
+def goals(new_user, category):
+    author = factories.UserFactory.create(first_name='Иван', last_name='Петров')
+    factories.GoalFactory.create(category=category, user=new_user, description='строка с разделителем',
+                                 due_date=timezone.now() + datetime.timedelta(days=3))
+    factories.GoalFactory.create(category=category, user=author, title='Цель', status=2, priority=4)
+    factories.GoalFactory.create_batch(3, category=category, user=new_user)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', [
+    '', '?limit=2&offset=1', '?page_size=2', '?ordering=-created&page_size=3', '?search=Цель&page_size=10',
+])
+def test_fast_read_is_byte_identical(auth_client, settings, goals, query):
+    settings.GOALS_RESPONSE_CACHE_TIMEOUT = 0
+    url = reverse('goal_list') + query
+
+    settings.GOALS_FAST_READ = False
+    expected = auth_client.get(url)
+    settings.GOALS_FAST_READ = True
+    response = auth_client.get(url)
+
+    assert response.status_code == expected.status_code == 200
+    assert response.content == expected.content
+
+
+def test_fast_renderer_matches_json_renderer():
+    data = {'title': 'цель\u2029', 'items': [1, None, True], 'nested': {'a': 'b'}}
+
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('data', [
+    {'value': 1e16}, {'items': [0.1, 1e-07]}, {'nested': {'ratio': float('inf')}},
+])
+def test_fast_renderer_falls_back_on_floats(data):
+    renderer = JSONRenderer()
+    renderer.strict = False
+
+    fast = FastJSONRenderer()
+    fast.strict = False
+
+    assert fast.render(data) == renderer.render(data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('fast_read, renderer', [(True, FastJSONRenderer), (False, JSONRenderer)])
+def test_fast_renderer_follows_setting(auth_client, settings, goals, fast_read, renderer):
+    settings.GOALS_RESPONSE_CACHE_TIMEOUT = 0
+    settings.GOALS_FAST_READ = fast_read
+
+    response = auth_client.get(reverse('goal_list'))
+
+    assert response.status_code == 200
+    assert type(response.accepted_renderer) is renderer
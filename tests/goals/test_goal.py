@@ -74,3 +74,18 @@ def test_update(auth_client, new_user, goal, category):
 def test_delete(auth_client, goal):
     response = auth_client.delete(reverse('goal', args=[goal.pk]))
     assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_move_to_other_board(auth_client, new_user, goal, comment):
+    other_board = factories.BoardFactory.create()
+    factories.ParticipantFactory.create(user=new_user, board=other_board)
+    other_category = factories.CategoryFactory.create(board=other_board, user=new_user)
+
+    response = auth_client.patch(reverse('goal', args=[goal.pk]), data=dict(category=other_category.pk))
+
+    goal.refresh_from_db()
+    comment.refresh_from_db()
+    assert response.status_code == 200
+    assert goal.board_id == other_board.pk
+    assert comment.board_id == other_board.pk
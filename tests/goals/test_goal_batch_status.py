@@ -0,0 +1,80 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from goals.models import Goal, BoardParticipant
+from tests import factories
+
+
+def post_batch(client, data):
+    return client.post(reverse('goal_batch_status'), data=json.dumps(data), content_type='application/json')
+
+
+@pytest.mark.django_db
+def test_batch_status_by_ids(auth_client, new_user, category):
+    goals = factories.GoalFactory.create_batch(3, category=category, user=new_user)
+    foreign = factories.GoalFactory.create(
+        category=factories.CategoryFactory.create(board=factories.BoardFactory.create(), user=new_user),
+        user=new_user,
+    )
+    ids = [goal.pk for goal in goals[:2]] + [foreign.pk]
+
+    response = post_batch(auth_client, {'ids': ids, 'status': Goal.Status.done})
+
+    assert response.status_code == 200
+    assert response.data == {'count': 2, 'ids': ids[:2], 'not_found': [foreign.pk]}
+    assert set(Goal.objects.filter(status=Goal.Status.done).values_list('pk', flat=True)) == set(ids[:2])
+
+
+@pytest.mark.django_db
+def test_batch_priority_by_filter(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(2, category=category, user=new_user, status=Goal.Status.in_progress)
+    todo = factories.GoalFactory.create(category=category, user=new_user, status=Goal.Status.to_do)
+
+    response = post_batch(auth_client, {'filter': {'status': Goal.Status.in_progress},
+                                        'priority': Goal.Priority.critical})
+
+    assert response.status_code == 200
+    assert response.data == {'count': 2}
+    todo.refresh_from_db()
+    assert todo.priority == Goal.Priority.medium
+
+
+@pytest.mark.django_db
+def test_batch_status_reader(auth_client, new_user, goal):
+    BoardParticipant.objects.filter(user=new_user).update(role=BoardParticipant.Role.reader)
+
+    response = post_batch(auth_client, {'ids': [goal.pk], 'status': Goal.Status.archived})
+
+    assert response.data['count'] == 0
+    assert response.data['not_found'] == [goal.pk]
+
+
+@pytest.mark.django_db
+def test_batch_status_validation(auth_client, new_user, goal):
+    assert post_batch(auth_client, {'ids': [goal.pk]}).status_code == 400
+    assert post_batch(auth_client, {'status': Goal.Status.done}).status_code == 400
+    assert post_batch(auth_client, {'filter': {'status': 100}, 'status': Goal.Status.done}).status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('goal_filter', [{}, {'stauts': Goal.Status.to_do}])
+def test_batch_status_rejects_empty_or_unknown_filter(auth_client, new_user, goal, goal_filter):
+    response = post_batch(auth_client, {'filter': goal_filter, 'status': Goal.Status.archived})
+
+    assert response.status_code == 400
+    assert 'filter' in response.data
+    goal.refresh_from_db()
+    assert goal.status != Goal.Status.archived
+
+
+@pytest.mark.django_db
+def test_batch_status_by_filter_recounts_counters(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(3, category=category, user=new_user, status=Goal.Status.to_do)
+
+    response = post_batch(auth_client, {'filter': {'status': Goal.Status.to_do}, 'status': Goal.Status.done})
+
+    assert response.data == {'count': 3}
+    category.counters.refresh_from_db()
+    assert (category.counters.goals_to_do, category.counters.goals_done) == (0, 3)
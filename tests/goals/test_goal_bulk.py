@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goals.models import Goal, BoardParticipant
+from tests import factories
+
+
+def post_bulk(client, items):
+    return client.post(reverse('goal_bulk'), data=json.dumps(items), content_type='application/json')
+
+
+@pytest.mark.django_db
+def test_bulk_create_and_update(auth_client, new_user, goal, comment, category):
+    other_board = factories.BoardFactory.create()
+    factories.ParticipantFactory.create(user=new_user, board=other_board)
+    other_category = factories.CategoryFactory.create(board=other_board, user=new_user)
+
+    response = post_bulk(auth_client, [
+        {'title': 'new goal', 'category': category.pk, 'priority': 3},
+        {'id': goal.pk, 'status': Goal.Status.done, 'category': other_category.pk},
+    ])
+
+    assert response.status_code == 200
+    assert response.data[0]['title'] == 'new goal'
+    assert response.data[0]['user']['id'] == new_user.pk
+    created = Goal.objects.get(pk=response.data[0]['id'])
+    assert created.board_id == category.board_id
+    goal.refresh_from_db()
+    comment.refresh_from_db()
+    assert goal.status == Goal.Status.done
+    assert goal.board_id == other_board.pk
+    assert comment.board_id == other_board.pk
+
+
+@pytest.mark.django_db
+def test_bulk_errors_per_item(auth_client, new_user, goal, category):
+    deleted = factories.CategoryFactory.create(board=category.board, user=new_user, is_deleted=True)
+
+    response = post_bulk(auth_client, [
+        {'title': 'ok', 'category': category.pk},
+        {'title': 'deleted', 'category': deleted.pk},
+        {'id': 100500, 'title': 'missing'},
+    ])
+
+    assert response.status_code == 400
+    assert response.data[0] == {}
+    assert 'category' in response.data[1]
+    assert 'id' in response.data[2]
+    assert Goal.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_reader_can_not_update(auth_client, new_user, goal):
+    BoardParticipant.objects.filter(user=new_user).update(role=BoardParticipant.Role.reader)
+
+    response = post_bulk(auth_client, [{'id': goal.pk, 'title': 'new title'}])
+
+    assert response.status_code == 400
+    assert 'non_field_errors' in response.data[0]
+
+
+@pytest.mark.django_db
+def test_bulk_queries_do_not_grow(auth_client, new_user, category):
+    def run(size):
+        with CaptureQueriesContext(connection) as context:
+            response = post_bulk(auth_client, [{'title': f'goal {i}', 'category': category.pk} for i in range(size)])
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    run(1)
+    assert run(2) == run(50)
+
+
+@pytest.mark.django_db
+def test_bulk_boolean_id_is_not_a_goal_id(auth_client, new_user, category):
+    goal = factories.GoalFactory.create(category=category, user=new_user)
+    Goal.objects.filter(pk=goal.pk).update(id=1)
+
+    response = post_bulk(auth_client, [{'id': True, 'title': 'hijacked'}])
+
+    assert response.status_code == 400
+    assert 'id' in response.data[0]
+    assert Goal.objects.get(pk=1).title == goal.title
+
+
+@pytest.mark.django_db
+def test_bulk_update_writes_only_fields_sent_for_each_goal(auth_client, new_user, category, monkeypatch):
+    first, second = factories.GoalFactory.create_batch(2, category=category, user=new_user)
+    bulk_update, written = Goal.objects.bulk_update, {}
+
+    def record(objs, fields, **kwargs):
+        written.update({obj.pk: sorted(fields) for obj in objs})
+        return bulk_update(objs, fields, **kwargs)
+
+    monkeypatch.setattr(Goal.objects, 'bulk_update', record)
+    response = post_bulk(auth_client, [
+        {'id': first.pk, 'description': 'new description'},
+        {'id': second.pk, 'title': 'new title'},
+    ])
+
+    assert response.status_code == 200
+    assert written == {first.pk: ['description', 'updated'], second.pk: ['title', 'updated']}
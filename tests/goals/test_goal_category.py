@@ -41,7 +41,12 @@ def test_retrieve(auth_client, new_user, category, board):
                              updated=response.data.get('updated'),
                              title=category.title,
                              is_deleted=False,
-                             board=board.pk
+                             board=board.pk,
+                             counters={'goals_to_do': 0,
+                                       'goals_in_progress': 0,
+                                       'goals_done': 0,
+                                       'goals_archived': 0,
+                                       'comments': 0}
                              )
 
     assert response.status_code == 200
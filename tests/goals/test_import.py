@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+
+from goals.importer import GoalImporter
+from goals.models import BoardCounters, CategoryCounters, Goal, GoalCategory
+from tests import factories
+
+
+def ndjson(rows):
+    return '\n'.join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+
+
+@pytest.mark.django_db
+def test_import_command_with_checkpoint(new_user, board, participant, category, tmp_path, capsys):
+    source = tmp_path / 'goals.ndjson'
+    source.write_bytes(ndjson(
+        [{'board': board.pk, 'category': category.title, 'title': f'goal {i}', 'status': 2} for i in range(5)]
+        + [{'board': board.pk, 'category': 'Новая', 'title': 'new', 'due_date': '2030-01-01T10:00:00'},
+           {'board': board.pk, 'category': 'Новая', 'title': ''}]
+    ))
+    checkpoint = tmp_path / 'goals.ckpt'
+
+    call_command('import_goals', str(source), user=new_user.username, batch_size=3, checkpoint=str(checkpoint))
+
+    assert Goal.objects.filter(board=board).count() == 6
+    new_category = GoalCategory.objects.get(board=board, title='Новая')
+    assert CategoryCounters.objects.get(pk=category.pk).goals_in_progress == 5
+    assert CategoryCounters.objects.get(pk=new_category.pk).goals_to_do == 1
+    assert BoardCounters.objects.get(pk=board.pk).goals_in_progress == 5
+    assert 'row 7: title' in capsys.readouterr().out
+    assert json.loads(checkpoint.read_text()) == {'rows': 7}
+
+    call_command('import_goals', str(source), user=new_user.username, checkpoint=str(checkpoint))
+    assert Goal.objects.filter(board=board).count() == 6
+
+
+@pytest.mark.django_db
+def test_import_endpoint_csv(auth_client, new_user, board, participant):
+    foreign = factories.BoardFactory.create()
+    upload = SimpleUploadedFile('goals.csv', (
+        'board,category,title,priority\n'
+        f'{board.pk},Работа,first,4\n'
+        f'{board.pk},Работа,second,\n'
+        f'{foreign.pk},Работа,foreign,\n'
+        f'{board.pk},Работа,bad,9\n'
+    ).encode())
+
+    response = auth_client.post(reverse('goals_import'), data={'file': upload}, format='multipart')
+
+    assert response.status_code == 200
+    assert response.data['goals'] == 2
+    assert response.data['categories'] == 1
+    assert [error['row'] for error in response.data['errors']] == [3, 4]
+    assert Goal.objects.get(title='first').priority == 4
+
+
+@pytest.mark.django_db
+def test_import_rejects_non_string_text(new_user, board, participant, category):
+    report = GoalImporter(new_user).run([
+        {'board': board.pk, 'category': category.title, 'title': ['a', 'b']},
+        {'board': board.pk, 'category': category.title, 'title': 'ok', 'description': {'text': 'x'}},
+        {'board': board.pk, 'category': 42, 'title': 'ok'},
+        {'board': board.pk, 'category': category.title, 'title': 'ok', 'description': 'text'},
+    ])
+
+    assert report.goals == 1
+    assert [(error['row'], error['error'].split(':')[0]) for error in report.errors] == [
+        (1, 'title'), (2, 'description'), (3, 'category'),
+    ]
+
+
+@pytest.mark.django_db
+def test_import_checkpoint_failure_rolls_back_batch(new_user, board, participant, category, tmp_path, monkeypatch):
+    importer = GoalImporter(new_user, batch_size=2, checkpoint=str(tmp_path / 'goals.ckpt'))
+    rows = [{'board': board.pk, 'category': category.title, 'title': f'goal {i}'} for i in range(3)]
+
+    def fail(rows):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(importer.checkpoint, 'save', fail)
+    with pytest.raises(OSError):
+        importer.run(rows)
+
+    assert not Goal.objects.filter(board=board).exists()
@@ -0,0 +1,98 @@
+import base64
+import json
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.urls import reverse
+
+from tests import factories
+
+
+def walk_pages(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.data["results"]]
+        url = response.data["next"]
+    return ids
+
+
+@pytest.mark.django_db
+def test_keyset_walks_all_pages(auth_client, new_user, category):
+    goals = factories.GoalFactory.create_batch(7, category=category, user=new_user, title="same title")
+
+    ids = walk_pages(auth_client, f"{reverse('goal_list')}?page_size=3")
+
+    assert ids == sorted(goal.pk for goal in goals)
+
+
+@pytest.mark.django_db
+def test_keyset_previous_link(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(5, category=category, user=new_user)
+
+    first = auth_client.get(f"{reverse('goal_list')}?page_size=2")
+    second = auth_client.get(first.data["next"])
+    back = auth_client.get(second.data["previous"])
+
+    assert first.data["previous"] is None
+    assert back.data["results"] == first.data["results"]
+
+
+@pytest.mark.django_db
+def test_keyset_stable_under_inserts(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(4, category=category, user=new_user, title="b")
+
+    first = auth_client.get(f"{reverse('goal_list')}?page_size=2")
+    factories.GoalFactory.create(category=category, user=new_user, title="a")
+    second = auth_client.get(first.data["next"])
+
+    first_ids = {item["id"] for item in first.data["results"]}
+    second_ids = {item["id"] for item in second.data["results"]}
+    assert not first_ids & second_ids
+    assert len(second_ids) == 2
+
+
+@pytest.mark.django_db
+def test_keyset_without_count(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(3, category=category, user=new_user)
+
+    with_count = auth_client.get(f"{reverse('goal_list')}?page_size=2")
+    without_count = auth_client.get(f"{reverse('goal_list')}?page_size=2&count=false")
+
+    assert with_count.data["count"] == 3
+    assert "count" not in without_count.data
+    assert without_count.data["results"] == with_count.data["results"]
+
+
+@pytest.mark.django_db
+def test_keyset_descending_ordering(auth_client, new_user, goal):
+    comments = factories.CommentFactory.create_batch(5, goal=goal, user=new_user)
+
+    ids = walk_pages(auth_client, f"{reverse('goal_comment_list')}?page_size=2")
+
+    assert ids == sorted((comment.pk for comment in comments), reverse=True)
+
+
+@pytest.mark.django_db
+def test_keyset_invalid_cursor(auth_client, new_user, category):
+    response = auth_client.get(f"{reverse('goal_list')}?cursor=broken")
+
+    assert response.status_code == 404
+
+
+def encode_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+@pytest.mark.django_db
+def test_keyset_tampered_cursor(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(3, category=category, user=new_user)
+    next_url = auth_client.get(f"{reverse('goal_list')}?page_size=1").data["next"]
+    cursor = json.loads(base64.urlsafe_b64decode(parse_qs(urlparse(next_url).query)["cursor"][0]))
+    width = len(cursor["p"])
+
+    for position in ["ab", {"id": 1}, ["not a number"] * width, [None] * width, [[1]] * width]:
+        response = auth_client.get(f"{reverse('goal_list')}?cursor={encode_cursor({'r': 0, 'p': position})}")
+
+        assert response.status_code == 404, position
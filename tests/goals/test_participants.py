@@ -0,0 +1,148 @@
+import json
+
+import factory
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests import factories
+
+
+def create_users(prefix, size):
+    return factories.UserFactory.create_batch(size, username=factory.Sequence(lambda n: f'{prefix}{n:03}'))
+
+
+def post_changes(client, board, data):
+    return client.post(reverse('board_participants', args=[board.pk]), data=json.dumps(data),
+                       content_type='application/json')
+
+
+@pytest.mark.django_db
+def test_list_walks_all_pages(auth_client, new_user, board, participant):
+    for user in create_users('member', 7):
+        factories.ParticipantFactory.create(board=board, user=user, role=3)
+
+    usernames, url = [], f"{reverse('board_participants', args=[board.pk])}?page_size=3"
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert 'count' in response.data
+        usernames += [item['user'] for item in response.data['results']]
+        url = response.data['next']
+
+    assert sorted(usernames) == sorted(board.participants.values_list('user__username', flat=True))
+    assert len(usernames) == 8
+
+
+@pytest.mark.django_db
+def test_list_role_filter(auth_client, new_user, board, participant):
+    writer, reader = create_users('member', 2)
+    factories.ParticipantFactory.create(board=board, user=writer, role=2)
+    factories.ParticipantFactory.create(board=board, user=reader, role=3)
+
+    response = auth_client.get(f"{reverse('board_participants', args=[board.pk])}?role=2")
+
+    assert [item['user'] for item in response.data['results']] == [writer.username]
+
+
+@pytest.mark.django_db
+def test_list_not_participant(auth_client, board):
+    response = auth_client.get(reverse('board_participants', args=[board.pk]))
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_bulk_changes(auth_client, new_user, board, participant):
+    changed, removed, kept, added = create_users('member', 4)
+    for user in (changed, removed, kept):
+        factories.ParticipantFactory.create(board=board, user=user, role=3)
+
+    response = post_changes(auth_client, board, {
+        'add': [{'user': added.username, 'role': 2}],
+        'update': [{'user': changed.username, 'role': 2}, {'user': kept.username, 'role': 3}],
+        'remove': [removed.username],
+    })
+
+    assert response.status_code == 200
+    assert response.data == {'added': 1, 'updated': 1, 'removed': 1}
+    roles = dict(board.participants.values_list('user__username', 'role'))
+    assert roles == {new_user.username: 1, changed.username: 2, kept.username: 3, added.username: 2}
+    board.counters.refresh_from_db()
+    assert board.counters.participants == 4
+
+
+@pytest.mark.django_db
+def test_bulk_changes_errors_save_nothing(auth_client, new_user, board, participant):
+    member, stranger = create_users('member', 2)
+    factories.ParticipantFactory.create(board=board, user=member, role=3)
+
+    response = post_changes(auth_client, board, {
+        'add': [{'user': member.username, 'role': 2}],
+        'update': [{'user': stranger.username, 'role': 2}],
+        'remove': [new_user.username],
+    })
+
+    assert response.status_code == 400
+    assert set(response.data) == {'add', 'update', 'remove'}
+    assert board.participants.count() == 2
+
+    response = post_changes(auth_client, board, {'add': [{'user': stranger.username, 'role': 2}],
+                                                 'remove': [stranger.username]})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_changes_owner_only(auth_client, new_user, board):
+    factories.ParticipantFactory.create(board=board, user=new_user, role=2)
+
+    response = post_changes(auth_client, board, {'remove': []})
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_bulk_changes_queries_do_not_grow(auth_client, new_user, board, participant):
+    def count(prefix, size):
+        users = create_users(prefix, size)
+        with CaptureQueriesContext(connection) as context:
+            response = post_changes(auth_client, board, {'add': [{'user': user.username, 'role': 3} for user in users]})
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    count('first', 1)
+    assert count('small', 2) == count('big', 40)
+
+
+@pytest.mark.django_db
+def test_lookup_by_prefix(auth_client, new_user, board, participant):
+    member, candidate, other = create_users('ann', 3)
+    factories.UserFactory.create(username='bob')
+    factories.ParticipantFactory.create(board=board, user=member, role=3)
+
+    response = auth_client.get(f"{reverse('board_participants_lookup', args=[board.pk])}?username=ann")
+
+    assert response.status_code == 200
+    assert [item['username'] for item in response.data] == [candidate.username, other.username]
+    assert auth_client.get(reverse('board_participants_lookup', args=[board.pk])).status_code == 400
+
+
+@pytest.mark.django_db
+def test_board_embeds_participants_under_limit(auth_client, new_user, board, participant, settings):
+    settings.BOARD_PARTICIPANTS_EMBED_LIMIT = 2
+    url = reverse('board', args=[board.pk])
+    factories.ParticipantFactory.create(board=board, user=create_users('member', 1)[0], role=3)
+
+    response = auth_client.get(url)
+    assert len(response.data['participants']) == 2
+    assert response.data['participants_count'] == 2
+
+    factories.ParticipantFactory.create(board=board, user=create_users('extra', 1)[0], role=3)
+    response = auth_client.get(url)
+    assert response.data['participants'] is None
+    assert response.data['participants_count'] == 3
+
+    response = auth_client.put(url, data=json.dumps({'title': 'renamed'}), content_type='application/json')
+    assert response.status_code == 200
+    assert board.participants.count() == 3
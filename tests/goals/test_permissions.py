@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goals.models import BoardParticipant
+from goals.roles import board_roles_cache
+
+
+def participant_queries(context):
+    return [query for query in context.captured_queries if query['sql'].startswith('SELECT "goals_boardparticipant"')]
+
+
+@pytest.mark.django_db
+def test_reader_can_not_update_goal(auth_client, new_user, goal):
+    BoardParticipant.objects.filter(user=new_user).update(role=BoardParticipant.Role.reader)
+
+    response = auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'new title'})
+
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+def test_role_change_invalidates_cache(auth_client, new_user, goal):
+    assert auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'first'}).status_code == 200
+
+    participant = BoardParticipant.objects.get(user=new_user, board=goal.board)
+    participant.role = BoardParticipant.Role.reader
+    participant.save()
+
+    assert auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'second'}).status_code == 403
+
+
+@pytest.mark.django_db
+def test_role_change_invalidates_cache_in_other_processes(auth_client, new_user, goal):
+    assert auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'first'}).status_code == 200
+    # LRU другого процесса: запись ролей в нём никто не сбрасывал
+    other_process_entries = dict(board_roles_cache._data)
+
+    participant = BoardParticipant.objects.get(user=new_user, board=goal.board)
+    participant.role = BoardParticipant.Role.reader
+    participant.save()
+    board_roles_cache._data.update(other_process_entries)
+
+    assert auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'second'}).status_code == 403
+
+
+@pytest.mark.django_db
+def test_write_without_permission_queries(auth_client, new_user, goal, comment):
+    with CaptureQueriesContext(connection) as context:
+        assert auth_client.patch(reverse('goal', args=[goal.pk]), data={'title': 'new'}).status_code == 200
+        assert auth_client.patch(reverse('goal_comment', args=[comment.pk]), data={'text': 'new'}).status_code == 200
+        assert auth_client.patch(reverse('goal_category', args=[goal.category_id]),
+                                 data={'title': 'new'}).status_code == 200
+
+    assert participant_queries(context) == []
@@ -0,0 +1,117 @@
+import json
+import re
+
+import factory
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests import factories
+
+
+# версия доски для ETag читается отдельным лёгким запросом до основного
+ETAG_QUERY = re.compile(r'^SELECT "\w+"\."(board_id|id)", "goals_board"\."version" FROM')
+
+
+def goals_queries(context):
+    return [query for query in context.captured_queries
+            if 'django_session' not in query['sql'] and not query['sql'].startswith('SELECT "core_user"')
+            and not ETAG_QUERY.match(query['sql'])]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_goal_list_queries_do_not_grow(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(2, category=category, user=factories.UserFactory.create())
+    small = count_queries(auth_client, reverse('goal_list'))
+
+    factories.GoalFactory.create_batch(20, category=category, user=factories.UserFactory.create())
+    big = count_queries(auth_client, reverse('goal_list'))
+
+    assert small == big
+
+
+@pytest.mark.django_db
+def test_category_list_queries_do_not_grow(auth_client, new_user, board, participant):
+    factories.CategoryFactory.create_batch(2, board=board, user=factories.UserFactory.create())
+    small = count_queries(auth_client, reverse('goal_category_list'))
+
+    factories.CategoryFactory.create_batch(20, board=board, user=factories.UserFactory.create())
+    big = count_queries(auth_client, reverse('goal_category_list'))
+
+    assert small == big
+
+
+@pytest.mark.django_db
+def test_comment_list_queries_do_not_grow(auth_client, new_user, goal):
+    factories.CommentFactory.create_batch(2, goal=goal, user=factories.UserFactory.create())
+    small = count_queries(auth_client, reverse('goal_comment_list'))
+
+    factories.CommentFactory.create_batch(20, goal=goal, user=factories.UserFactory.create())
+    big = count_queries(auth_client, reverse('goal_comment_list'))
+
+    assert small == big
+
+
+@pytest.mark.django_db
+def test_board_retrieve_queries_do_not_grow(auth_client, new_user, board, participant):
+    factories.ParticipantFactory.create(board=board, user=factories.UserFactory.create())
+    auth_client.get(reverse('board', args=[board.pk]))
+    small = count_queries(auth_client, reverse('board', args=[board.pk]))
+
+    for user in factories.UserFactory.create_batch(20):
+        factories.ParticipantFactory.create(board=board, user=user)
+    big = count_queries(auth_client, reverse('board', args=[board.pk]))
+
+    assert small == big
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route, fixture', [
+    ('goal', 'goal'), ('goal_comment', 'comment'), ('goal_category', 'category'), ('board', 'board'),
+])
+def test_retrieve_is_one_query(auth_client, request, participant, route, fixture):
+    obj = request.getfixturevalue(fixture)
+
+    with CaptureQueriesContext(connection) as context:
+        response = auth_client.get(reverse(route, args=[obj.pk]))
+
+    assert response.status_code == 200
+    # у доски есть ещё один запрос - prefetch участников
+    assert len(goals_queries(context)) == (2 if route == 'board' else 1)
+
+
+def put_participants(client, board, participants):
+    with CaptureQueriesContext(connection) as context:
+        response = client.put(reverse('board', args=[board.pk]), content_type='application/json',
+                              data=json.dumps({'title': board.title, 'participants': participants}))
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_board_update_participants_queries_do_not_grow(auth_client, new_user, board, participant):
+    """
+    Каждый PUT и удаляет, и меняет роль, и добавляет участников
+    """
+    def sync(prefix, size):
+        old = list(board.participants.exclude(user=new_user).values_list('user__username', flat=True))
+        users = factories.UserFactory.create_batch(size, username=factory.Sequence(lambda n: f'{prefix}{n}'))
+        return put_participants(auth_client, board, [
+            *({'user': username, 'role': 3} for username in old[:len(old) // 2]),
+            *({'user': user.username, 'role': 2} for user in users),
+        ])
+
+    sync('first', 4)
+    small = sync('small', 5)
+    sync('grow', 50)
+    big = sync('big', 50)
+
+    assert small == big
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from goals.response_cache import get_response_cache_stats
+from tests import factories
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route', ['goal_list', 'goal_category_list', 'goal_comment_list', 'board_list'])
+def test_second_request_is_cached(auth_client, comment, route):
+    first = auth_client.get(reverse(route))
+
+    with CaptureQueriesContext(connection) as context:
+        second = auth_client.get(reverse(route))
+
+    assert first['X-Cache'] == 'MISS'
+    assert second['X-Cache'] == 'HIT'
+    assert second.data == first.data
+    # только сессия, пользователь и версии досок
+    assert len(context.captured_queries) == 3
+    assert get_response_cache_stats() == {'hits': 1, 'misses': 1}
+
+
+@pytest.mark.django_db
+def test_write_changes_key(auth_client, new_user, category, goal):
+    url = f"{reverse('goal_list')}?page_size=10"
+    auth_client.get(url)
+
+    auth_client.patch(reverse('goal', args=[goal.pk]), data=json.dumps({'title': 'changed'}),
+                      content_type='application/json')
+    response = auth_client.get(url)
+
+    assert response['X-Cache'] == 'MISS'
+    assert response.data['results'][0]['title'] == 'changed'
+
+
+@pytest.mark.django_db
+def test_cache_is_per_user(auth_client, new_user, board, goal):
+    other = factories.UserFactory.create()
+    factories.ParticipantFactory.create(board=board, user=other)
+    auth_client.get(reverse('goal_list'))
+
+    auth_client.force_authenticate(other)
+    response = auth_client.get(reverse('goal_list'))
+
+    assert response['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_cache_disabled(auth_client, goal, settings, capsys):
+    settings.GOALS_RESPONSE_CACHE_TIMEOUT = 0
+    auth_client.get(reverse('goal_list'))
+
+    assert 'X-Cache' not in auth_client.get(reverse('goal_list'))
+    call_command('response_cache_stats')
+    assert 'hits: 0' in capsys.readouterr().out
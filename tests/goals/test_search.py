@@ -0,0 +1,96 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from goals.search import restore_sqlite_fts_triggers
+from tests import factories
+
+
+@pytest.mark.django_db
+def test_search_goals_ranked(auth_client, new_user, category):
+    in_description = factories.GoalFactory.create(category=category, user=new_user, title="first",
+                                                  description="buy milk tomorrow")
+    in_title = factories.GoalFactory.create(category=category, user=new_user, title="milk", description="")
+    factories.GoalFactory.create(category=category, user=new_user, title="bread", description="")
+
+    response = auth_client.get(reverse('goal_list'), {'search': 'milk'})
+
+    assert response.status_code == 200
+    assert [item['id'] for item in response.data] == [in_title.pk, in_description.pk]
+
+
+@pytest.mark.django_db
+def test_search_goals_all_terms(auth_client, new_user, category):
+    goal = factories.GoalFactory.create(category=category, user=new_user, title="Купить молоко")
+    factories.GoalFactory.create(category=category, user=new_user, title="Купить хлеб")
+
+    response = auth_client.get(reverse('goal_list'), {'search': 'купить МОЛОКО'})
+
+    assert [item['id'] for item in response.data] == [goal.pk]
+
+
+@pytest.mark.django_db
+def test_search_goals_updated_and_visible_only(auth_client, new_user, goal):
+    other_category = factories.CategoryFactory.create(board=factories.BoardFactory.create(), user=new_user)
+    factories.GoalFactory.create(category=other_category, user=new_user, title="secret plan")
+    goal.title = "secret goal"
+    goal.save()
+
+    response = auth_client.get(reverse('goal_list'), {'search': 'secret'})
+
+    assert [item['id'] for item in response.data] == [goal.pk]
+
+
+@pytest.mark.django_db
+def test_search_goals_with_keyset(auth_client, new_user, category):
+    goals = factories.GoalFactory.create_batch(5, category=category, user=new_user, title="plan")
+
+    ids, url = [], f"{reverse('goal_list')}?search=plan&page_size=2"
+    while url:
+        response = auth_client.get(url)
+        ids += [item['id'] for item in response.data['results']]
+        url = response.data['next']
+
+    assert sorted(ids) == sorted(goal.pk for goal in goals)
+
+
+@pytest.mark.django_db
+def test_search_comments(auth_client, new_user, goal):
+    comment = factories.CommentFactory.create(goal=goal, user=new_user, text="call the plumber")
+    factories.CommentFactory.create(goal=goal, user=new_user, text="water the plants")
+
+    response = auth_client.get(reverse('goal_comment_list'), {'search': 'plumber'})
+
+    assert [item['id'] for item in response.data] == [comment.pk]
+
+
+def sqlite_triggers():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%_fts_%'")
+        return {name for name, in cursor.fetchall()}
+
+
+FTS_TRIGGERS = {
+    f"{table}_fts_{suffix}" for table in ("goals_goal", "goals_goalcomment") for suffix in ("ai", "ad", "au")
+}
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="triggers are used only on SQLite")
+@pytest.mark.django_db
+def test_sqlite_fts_triggers_exist_after_migrate():
+    assert sqlite_triggers() == FTS_TRIGGERS
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="triggers are used only on SQLite")
+@pytest.mark.django_db
+def test_sqlite_fts_triggers_restored(auth_client, new_user, category):
+    # так триггеры теряет пересоздание таблицы при AlterField
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER goals_goal_fts_ai")
+    goal = factories.GoalFactory.create(category=category, user=new_user, title="unindexed milk")
+
+    assert restore_sqlite_fts_triggers() == ["goals_goal_fts_ai"]
+    assert sqlite_triggers() == FTS_TRIGGERS
+    assert restore_sqlite_fts_triggers() == []
+    response = auth_client.get(reverse('goal_list'), {'search': 'milk'})
+    assert [item['id'] for item in response.data] == [goal.pk]
@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tests import factories
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db
+def test_fields_prune_response_and_columns(auth_client, goal):
+    response, queries = get(auth_client, f"{reverse('goal_list')}?fields=id,title,status,priority,due_date")
+
+    assert list(response.data[0]) == ['id', 'title', 'due_date', 'priority', 'status']
+    goal_query = next(sql for sql in queries if sql.startswith('SELECT') and 'FROM "goals_goal"' in sql
+                      and '"goals_goal"."title"' in sql)
+    assert '"goals_goal"."description"' not in goal_query
+    assert '"core_user"' not in goal_query
+
+
+@pytest.mark.django_db
+def test_include_category_and_comment_count(auth_client, new_user, category, goal, comment):
+    factories.CommentFactory.create(goal=goal, user=new_user)
+    url = f"{reverse('goal_list')}?fields=id,title&include=category,comment_count&page_size=50"
+    response, small = get(auth_client, url)
+
+    result = response.data['results'][0]
+    assert result['category'] == {'id': category.pk, 'title': category.title, 'board': category.board_id}
+    assert result['comment_count'] == 2
+
+    factories.GoalFactory.create_batch(10, category=category, user=new_user)
+    _, big = get(auth_client, url)
+    assert len(small) == len(big)
+
+
+@pytest.mark.django_db
+def test_include_on_detail_and_comments(auth_client, goal, comment, category):
+    response, _ = get(auth_client, f"{reverse('goal_category', args=[category.pk])}?fields=title&include=board")
+    assert response.data == {'title': category.title, 'board': {'id': category.board_id, 'title': category.board.title}}
+
+    response, _ = get(auth_client, f"{reverse('goal_comment_list')}?fields=text&include=goal")
+    assert response.data[0]['goal'] == {'id': goal.pk, 'title': goal.title, 'status': goal.status}
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_with_sparse_fields(auth_client, new_user, category):
+    factories.GoalFactory.create_batch(5, category=category, user=new_user)
+    url = f"{reverse('goal_list')}?fields=id&ordering=-created&page_size=2"
+
+    first, _ = get(auth_client, url)
+    second, queries = get(auth_client, first.data['next'])
+
+    assert len(second.data['results']) == 2
+    assert not {row['id'] for row in first.data['results']} & {row['id'] for row in second.data['results']}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['fields=id,secret', 'include=board'])
+def test_unknown_fields(auth_client, goal, query):
+    response = auth_client.get(f"{reverse('goal_list')}?{query}")
+
+    assert response.status_code == 400
@@ -160,3 +160,33 @@ SOCIAL_AUTH_LOGIN_ERROR_URL = '/login-error/'
 
 # Телеграм токен
 TG_TOKEN = os.environ.get("TG_TOKEN")
+# Секрет вебхука бота (setWebhook secret_token); пока не задан, bot/webhook отвечает 404
+TG_WEBHOOK_SECRET = os.environ.get("TG_WEBHOOK_SECRET")
+# Бот (bot/dispatcher.py): потоков обработки обновлений и сколько обновлений держать в работе, пока ждёт getUpdates
+BOT_WORKERS = int(os.environ.get("BOT_WORKERS", 8))
+BOT_MAX_PENDING = int(os.environ.get("BOT_MAX_PENDING", 100))
+# Где хранить состояния диалогов с чатами (bot/state.py): "memory" - в процессе, "db" - общие для процессов;
+# сколько секунд помнить состояние чата без сообщений
+BOT_STATE_STORE = os.environ.get("BOT_STATE_STORE", "memory")
+BOT_STATE_TTL = int(os.environ.get("BOT_STATE_TTL", 3600))
+# Очередь исходящих сообщений (bot/outbox.py): лимиты Телеграма в сообщениях в секунду на бота и на чат,
+# сколько раз пытаться отправить сообщение
+BOT_SEND_RATE = float(os.environ.get("BOT_SEND_RATE", 30))
+BOT_CHAT_SEND_RATE = float(os.environ.get("BOT_CHAT_SEND_RATE", 1))
+BOT_SEND_RETRIES = int(os.environ.get("BOT_SEND_RETRIES", 5))
+
+# Сколько пользователей держать в LRU-кэше ролей на досках (goals/roles.py)
+BOARD_ROLES_CACHE_SIZE = int(os.environ.get("BOARD_ROLES_CACHE_SIZE", 10_000))
+
+# Сколько секунд хранить ответы списков в кэше по версиям досок (goals/response_cache.py), 0 - не кэшировать
+GOALS_RESPONSE_CACHE_TIMEOUT = int(os.environ.get("GOALS_RESPONSE_CACHE_TIMEOUT", 300))
+
+# Быстрое чтение списка целей из .values() в обход GoalSerializer (goals/fast_read.py)
+GOALS_FAST_READ = os.environ.get("GOALS_FAST_READ", "").lower() in ("1", "true", "yes")
+
+# Каскад удаления доски (goals/cascade.py): строк в пачке и сколько пачек выполнить прямо в запросе
+BOARD_DELETE_BATCH_SIZE = int(os.environ.get("BOARD_DELETE_BATCH_SIZE", 1000))
+BOARD_DELETE_INLINE_BATCHES = int(os.environ.get("BOARD_DELETE_INLINE_BATCHES", 10))
+
+# Сколько участников доски встраивать в goals/board/<pk>; у больших досок их отдаёт goals/board/<pk>/participants
+BOARD_PARTICIPANTS_EMBED_LIMIT = int(os.environ.get("BOARD_PARTICIPANTS_EMBED_LIMIT", 100))